@@ -12,7 +12,9 @@ https://docs.djangoproject.com/en/5.2/ref/settings/
 
 from pathlib import Path
 import os
+import tempfile
 from dotenv import load_dotenv
+from django.core.exceptions import ImproperlyConfigured
 
 load_dotenv()
 ENV = os.getenv('ENV', 'local')
@@ -63,17 +65,40 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'timesheet.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     )
 }
+# Cursor pagination for list endpoints (timesheet.pagination)
+API_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", 50))
+API_MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", 200))
+# Employee timesheet: default date window per page, and the widest window a request may ask for
+TIMESHEET_WINDOW_DAYS = int(os.getenv("TIMESHEET_WINDOW_DAYS", 31))
+TIMESHEET_MAX_WINDOW_DAYS = int(os.getenv("TIMESHEET_MAX_WINDOW_DAYS", 366))
+
 SIMPLE_JWT = {
     "BLACKLIST_AFTER_ROTATION": True,
+    # Tokens carry employee claims so authentication needs no query (timesheet.authentication)
+    "TOKEN_OBTAIN_SERIALIZER": "timesheet.authentication.ClaimsTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "timesheet.authentication.ClaimsTokenRefreshSerializer",
 }
+AUTH_STAMP_CACHE_TIMEOUT = int(os.getenv("AUTH_STAMP_CACHE_TIMEOUT", 60 * 60))
+# Per-worker Bloom filter in front of the refresh blacklist lookup (timesheet.blacklist_filter)
+TOKEN_BLACKLIST_FILTER = os.getenv("TOKEN_BLACKLIST_FILTER", "True") == "True"
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = float(os.getenv("TOKEN_BLACKLIST_FILTER_ERROR_RATE", 0.01))
+TOKEN_BLACKLIST_FILTER_MAX_AGE = int(os.getenv("TOKEN_BLACKLIST_FILTER_MAX_AGE", 60 * 60))
+# Login password checks per worker: LOGIN_HASH_WORKERS hashing, LOGIN_HASH_QUEUE waiting up to
+# LOGIN_HASH_WAIT seconds, the rest get 429 (timesheet.admission). Waiting logins hold a request
+# thread, so keep workers + queue well below gunicorn's --threads.
+LOGIN_ADMISSION_CONTROL = os.getenv("LOGIN_ADMISSION_CONTROL", "True") == "True"
+LOGIN_HASH_WORKERS = int(os.getenv("LOGIN_HASH_WORKERS", 1))
+LOGIN_HASH_QUEUE = int(os.getenv("LOGIN_HASH_QUEUE", 2))
+LOGIN_HASH_WAIT = float(os.getenv("LOGIN_HASH_WAIT", 1))
 
 MIDDLEWARE = [
+    'timesheet.middleware.RequestMetricsMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -128,10 +153,54 @@ if ENV == "production":
             'PASSWORD': os.getenv("DB_PASSWORD"),
             'HOST': os.getenv("DB_HOST"),
             'PORT': os.getenv("DB_PORT", 5432),
+            # Async reports query from pool threads; they keep their connection
+            # between requests instead of reconnecting for every query
+            'CONN_MAX_AGE': int(os.getenv("DB_CONN_MAX_AGE", 60)),
+            'CONN_HEALTH_CHECKS': True,
         }
     }
 
 
+# Cache
+# Per-employee day state is invalidated on write, so every worker must share
+# one cache outside local development.
+
+if os.getenv("REDIS_URL"):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv("REDIS_URL"),
+        }
+    }
+elif ENV == "production":
+    # Login, attendance, auth stamps, ETag versions and report snapshots all read the
+    # cache on every request; a database cache would put those queries back
+    raise ImproperlyConfigured("REDIS_URL must be set when ENV=production")
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+DAY_STATE_CACHE_TIMEOUT = int(os.getenv("DAY_STATE_CACHE_TIMEOUT", 60 * 60))
+# Snapshots of past daywise reports (timesheet.report_cache): lifetime, and how many
+# (employee, job_no) filter combinations one date keeps
+DAYWISE_CACHE_TIMEOUT = int(os.getenv("DAYWISE_CACHE_TIMEOUT", 7 * 24 * 60 * 60))
+DAYWISE_CACHE_FILTERS = int(os.getenv("DAYWISE_CACHE_FILTERS", 32))
+
+# Sessions left open on an earlier day, closed by the close_stale_attendance command:
+# "end_of_day" logs out at the end of the work day, "max_hours" after
+# ATTENDANCE_AUTO_CLOSE_HOURS (but no later than the end of the work day)
+ATTENDANCE_AUTO_CLOSE_POLICY = os.getenv("ATTENDANCE_AUTO_CLOSE_POLICY", "end_of_day")
+ATTENDANCE_AUTO_CLOSE_HOURS = float(os.getenv("ATTENDANCE_AUTO_CLOSE_HOURS", 9))
+
+# Request metrics: each worker snapshots its totals into METRICS_DIR so /api/metrics/
+# can sum all gunicorn workers. Empty disables sharing (single process only).
+METRICS_DIR = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "timesheet-metrics"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", 5))
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -150,13 +219,34 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+    'django.contrib.auth.hashers.Argon2PasswordHasher',
+    'django.contrib.auth.hashers.BCryptSHA256PasswordHasher',
+    'django.contrib.auth.hashers.ScryptPasswordHasher',
+    # Opening passwords from earlier bulk employee imports, upgraded to the first entry at first login
+    'timesheet.hashers.ImportPasswordHasher',
+    # Import hashes strengthened in place by the harden_import_passwords command
+    'timesheet.hashers.WrappedImportPasswordHasher',
+]
+
+# Bulk employee import (timesheet.employee_import): passwords are hashed at full
+# strength, in a pool of this many processes by the import_employees command
+# (default: one per CPU). The API hashes in-process inside the request, so a
+# real import there takes at most EMPLOYEE_IMPORT_API_MAX_ROWS rows (dry runs
+# any number); larger files go through the command.
+EMPLOYEE_IMPORT_PROCESSES = int(os.getenv("EMPLOYEE_IMPORT_PROCESSES", 0)) or None
+EMPLOYEE_IMPORT_API_MAX_ROWS = int(os.getenv("EMPLOYEE_IMPORT_API_MAX_ROWS", 25))
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/5.2/topics/i18n/
 
 LANGUAGE_CODE = 'en-us'
 
-TIME_ZONE = 'UTC'
+# Local day boundary used for Attendance.work_date
+TIME_ZONE = os.getenv('TIME_ZONE', 'UTC')
 
 USE_I18N = True
 
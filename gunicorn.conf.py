@@ -0,0 +1,20 @@
+# Loaded automatically by gunicorn from the working directory
+import os
+import shutil
+import tempfile
+
+
+def on_starting(server):
+    # Request metrics snapshots from a previous run would otherwise keep counting
+    directory = os.getenv("METRICS_DIR", os.path.join(tempfile.gettempdir(), "timesheet-metrics"))
+    if directory:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+# The deploy commands run threaded workers (--threads 8). ASGI workers (async report
+# endpoints under /api/async/):
+#   gunicorn config.asgi:application -k uvicorn_worker.UvicornWorker
+
+# Login admission control (timesheet.admission) keeps request threads free for other endpoints
+# during a login storm, which takes several request threads per worker; keep
+# LOGIN_HASH_WORKERS + LOGIN_HASH_QUEUE well below --threads
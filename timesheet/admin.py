@@ -1,9 +1,12 @@
 from django.contrib import admin
 from django.contrib.auth.models import User
-from .models import Employee, Attendance, Job, LeaveRecord, LeaveBalance
+from .models import Employee, Attendance, Job, LeaveRecord, LeaveBalance, LeaveAllocationPolicy, LeaveRollover, MonthClose
 
 admin.site.register(Employee)
 admin.site.register(Attendance)
 admin.site.register(Job)
 admin.site.register(LeaveRecord)
 admin.site.register(LeaveBalance)
+admin.site.register(LeaveAllocationPolicy)
+admin.site.register(LeaveRollover)
+admin.site.register(MonthClose)
@@ -0,0 +1,83 @@
+"""
+Admission control for password checks on login.
+
+Each authenticate() runs PBKDF2 for most of a second of CPU. At shift start,
+hundreds of logins would otherwise occupy every worker and starve the
+attendance endpoints. Password checks instead run in a small per-worker
+thread pool (LOGIN_HASH_WORKERS). At most LOGIN_HASH_QUEUE more may wait,
+each for up to LOGIN_HASH_WAIT seconds. Anything beyond that is refused at
+once with 429 and a Retry-After header, so the request thread goes back to
+serving other endpoints.
+"""
+import math
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.contrib.auth import authenticate
+from django.db import close_old_connections
+from rest_framework.exceptions import Throttled
+
+
+class LoginBusy(Throttled):
+    default_detail = "Too many logins in progress. Please try again shortly."
+    default_code = "login_busy"
+
+
+class PasswordCheckGate:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool = None
+        self._pid = None
+        self._pending = 0
+
+    def _executor(self):
+        # A pool created before a gunicorn fork has no threads in the child
+        if self._pid != os.getpid():
+            self._pool = ThreadPoolExecutor(
+                max_workers=settings.LOGIN_HASH_WORKERS, thread_name_prefix="password-check",
+            )
+            self._pid = os.getpid()
+            self._pending = 0
+        return self._pool
+
+    def _retry_after(self):
+        return max(1, math.ceil(self._pending / settings.LOGIN_HASH_WORKERS))
+
+    def _done(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def authenticate(self, **credentials):
+        """authenticate() behind the admission limit; raises LoginBusy when full"""
+        if not settings.LOGIN_ADMISSION_CONTROL:
+            return authenticate(**credentials)
+
+        with self._lock:
+            executor = self._executor()
+            if self._pending >= settings.LOGIN_HASH_WORKERS + settings.LOGIN_HASH_QUEUE:
+                raise LoginBusy(wait=self._retry_after())
+            self._pending += 1
+
+        future = executor.submit(_check_password, credentials)
+        future.add_done_callback(self._done)
+        try:
+            return future.result(timeout=settings.LOGIN_HASH_WAIT)
+        except TimeoutError:
+            # Still queued: give up the place. Already hashing: the answer is close.
+            if future.cancel():
+                raise LoginBusy(wait=self._retry_after())
+            return future.result()
+
+
+def _check_password(credentials):
+    # Pool threads live outside the request cycle, so manage connections as it would
+    close_old_connections()
+    try:
+        return authenticate(**credentials)
+    finally:
+        close_old_connections()
+
+
+password_gate = PasswordCheckGate()
@@ -0,0 +1,33 @@
+"""
+Per-group aggregates that work on both production Postgres and local SQLite.
+
+Postgres gets STRING_AGG with an explicit ORDER BY and BOOL_OR. SQLite (3.40
+has no ordered GROUP_CONCAT) joins values in scan order and ORs booleans with MAX.
+"""
+from django.db import connection
+from django.db.models import Aggregate, IntegerField, Max, TextField, Value
+from django.db.models.functions import Cast, NullIf
+
+
+class GroupConcat(Aggregate):
+    function = "GROUP_CONCAT"
+    output_field = TextField()
+
+
+def string_agg(field, separator=", ", order_by=()):
+    """Joined non-blank values of field, or None when there are none"""
+    expression = NullIf(field, Value(""))
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.aggregates import StringAgg
+
+        return StringAgg(expression, Value(separator), order_by=order_by)
+    return GroupConcat(expression, Value(separator))
+
+
+def bool_or(field):
+    """True if any value is true; None for a group with no rows to OR"""
+    if connection.vendor == "postgresql":
+        from django.contrib.postgres.aggregates import BoolOr
+
+        return BoolOr(field)
+    return Max(Cast(field, IntegerField()))
@@ -0,0 +1,218 @@
+"""
+Async (ASGI) variants of the report and dashboard endpoints.
+
+Same query parameters and JSON as the sync views. Independent heavy queries
+run concurrently, each in a worker thread with its own database connection:
+Django's async ORM runs every query on one shared thread, so gathering
+plain async queries would not overlap them. Under ASGI a slow report only
+holds those threads and leaves the event loop free for other requests.
+"""
+import asyncio
+from contextlib import ExitStack
+from datetime import date, datetime
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections, connections
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.utils.encoders import JSONEncoder
+
+from .authentication import ClaimsJWTAuthentication
+from .day_summary import wants_summary
+from .models import DailyStats, Employee
+from .month_close import get_month_close, month_snapshot
+from .report_cache import daywise_snapshot, etag_for, is_frozen
+from .reports import daywise_jobs, daywise_leaves, daywise_rows, summary_daywise_rows
+from .stats import combine_daily_stats, daily_stats_queries, store_daily_stats, summary_daily_stats
+from .timesheets import fill_month, month_annual_leaves, month_jobs, summary_month
+from .versions import conditional, employee_scope, month_scope, tagged
+
+_authenticator = ClaimsJWTAuthentication()
+
+
+def _json(data, status=200):
+    # DRF's encoder, so dates and times render exactly as the sync views render them
+    return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
+
+
+def jwt_api_view(admin_only=False):
+    """GET-only async view behind the same JWT authentication as the DRF views"""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method != "GET":
+                return _json({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+            try:
+                auth = await sync_to_async(_authenticator.authenticate)(request)
+            except exceptions.AuthenticationFailed as exc:
+                detail = exc.detail if isinstance(exc.detail, dict) else {"detail": exc.detail}
+                return _json(detail, status=401)
+            if auth is None:
+                return _json({"detail": "Authentication credentials were not provided."}, status=401)
+            request.user = auth[0]
+            if admin_only and not request.user.is_staff:
+                return _json({"detail": "You do not have permission to perform this action."}, status=403)
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+async def run_concurrently(**queries):
+    """
+    Run independent sync ORM callables at the same time; returns {name: result}.
+    The first runs on sync_to_async's shared thread and each of the others on a
+    pool thread of its own, so list the cheap lookup first and the heavy queries after.
+    """
+    # Hand the request's execute wrappers (request metrics) to each connection
+    wrappers = list(connections["default"].execute_wrappers)
+
+    def wrapped(query):
+        # Threads keep their own (thread-local) connection between calls, so the
+        # wrappers are taken off again before the thread serves anyone else
+        def run():
+            with ExitStack() as stack:
+                for wrapper in wrappers:
+                    stack.enter_context(connections["default"].execute_wrapper(wrapper))
+                return query()
+        return run
+
+    def pooled(query):
+        # Like a request thread: the connection is kept for the next call and
+        # closed only once it is broken or older than CONN_MAX_AGE
+        def run():
+            try:
+                return wrapped(query)()
+            finally:
+                close_old_connections()
+        return run
+
+    first, *rest = queries
+    results = await asyncio.gather(
+        sync_to_async(wrapped(queries[first]))(),
+        *(sync_to_async(pooled(queries[name]), thread_sensitive=False)() for name in rest),
+    )
+    return dict(zip([first, *rest], results))
+
+
+# 🔹 Dashboard
+@jwt_api_view()
+async def dashboard_today_stats(request):
+    today = timezone.localdate()
+    if wants_summary(request):
+        stats = DailyStats(date=today, **await sync_to_async(summary_daily_stats)(today))
+    else:
+        stats = await DailyStats.objects.filter(date=today).afirst()
+    if stats is None:
+        results = await run_concurrently(**daily_stats_queries(today))
+        stats = await sync_to_async(store_daily_stats)(today, combine_daily_stats(results))
+
+    active_employees = stats.total_employees - stats.suspended_employees
+
+    THRESHOLD_PERCENT = 80
+    required_attendance = max(1, round(active_employees * THRESHOLD_PERCENT / 100))
+    alert = stats.attendance_coverage < required_attendance
+
+    return _json({
+        "date": str(today),
+        "total_employees": stats.total_employees,
+        "active_employees": active_employees,
+        "attendance_coverage": stats.attendance_coverage,
+        "required_attendance": required_attendance,
+        "total_work_entries": stats.total_work_entries,
+        "total_leave_today": stats.total_leave_today,
+        "alert": alert,
+    })
+
+
+# 🔹 Day-wise report
+@jwt_api_view()
+async def daywise_report(request):
+    report_date_str = request.GET.get("date")
+    employee_id = request.GET.get("employee")
+    job_no = request.GET.get("job_no")
+
+    if not report_date_str:
+        return _json({"error": "date parameter is required (YYYY-MM-DD)"}, status=400)
+
+    try:
+        report_date = datetime.strptime(report_date_str, "%Y-%m-%d").date()
+    except ValueError:
+        return _json({"error": "Invalid date format"}, status=400)
+
+    if wants_summary(request):
+        rows = await sync_to_async(summary_daywise_rows)(report_date, employee_id, job_no)
+        etag = etag_for(rows)
+    elif is_frozen(report_date):
+        # Past days: the same snapshot the sync view serves
+        etag, rows = await sync_to_async(daywise_snapshot)(report_date, employee_id, job_no, lambda: daywise_rows(
+            daywise_leaves(report_date, employee_id), daywise_jobs(report_date, employee_id, job_no),
+        ))
+    else:
+        results = await run_concurrently(
+            leaves=lambda: list(daywise_leaves(report_date, employee_id)),
+            jobs=lambda: list(daywise_jobs(report_date, employee_id, job_no)),
+        )
+        rows = daywise_rows(results["leaves"], results["jobs"])
+        etag = etag_for(rows)
+
+    response = get_conditional_response(request, etag=etag) or _json(rows)
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+# 🔹 Monthly timesheet
+@jwt_api_view()
+async def monthly_timesheet(request):
+    employee_id = request.GET.get("employee")
+    month_str = request.GET.get("month")
+
+    try:
+        year, month = map(int, month_str.split("-"))
+        date(year, month, 1)
+    except (AttributeError, ValueError):
+        return _json({"error": "month parameter is required (YYYY-MM)"}, status=400)
+
+    etag, not_modified = await sync_to_async(conditional)(
+        request, [employee_scope(employee_id), month_scope(year, month)]
+    )
+    if not_modified:
+        return not_modified
+
+    def live_queries():
+        if wants_summary(request):
+            return {"data": lambda: summary_month(employee_id, year, month)}
+        return {
+            "jobs": lambda: list(month_jobs(year, month).filter(attendance__employee_id=employee_id)),
+            "leaves": lambda: list(month_annual_leaves(year, month).filter(employee_id=employee_id)),
+        }
+
+    # A payroll-closed month is served from its snapshot
+    close = await sync_to_async(get_month_close)(year, month)
+    results = await run_concurrently(
+        employee=lambda: Employee.objects.select_related("user").filter(id=employee_id).first(),
+        **({"snapshot": lambda: month_snapshot(close, employee_id)} if close else live_queries()),
+    )
+    employee = results["employee"]
+    if employee is None:
+        return _json({"error": "Employee not found"}, status=404)
+
+    data = results.get("snapshot")
+    if data is None and close:
+        # An employee added after the close has no snapshot
+        results = await run_concurrently(**live_queries())
+    if data is None and "data" in results:
+        data = results["data"]
+    elif data is None:
+        data = fill_month(year, month, results["jobs"], results["leaves"])
+
+    return tagged(_json({
+        "employee": employee.user.username,
+        "emp_no": employee.emp_no,
+        "month": month_str,
+        "closed": bool(close),
+        "data": list(data.values()),
+    }), etag)
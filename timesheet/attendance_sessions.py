@@ -0,0 +1,128 @@
+"""
+Closing attendance sessions with the duration computed by the database.
+
+duration = logout_time - login_time is written by the same UPDATE that sets
+logout_time, using the backend's own temporal subtraction. The stored column
+is then the one value that reports, serializers and
+Attendance.computed_duration read. Attendance.save() computes the same
+difference for rows written through the ORM (admin edits, imports).
+
+Sessions nobody closed are closed by close_stale_attendance (run nightly by
+the close_stale_attendance command), so the partial index on open sessions
+holds at most today's session per employee.
+"""
+from datetime import datetime, time, timedelta
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Value
+from django.db.models.functions import Least
+from django.utils import timezone
+
+from .day_state import invalidate_day_state
+from .day_summary import summaries_changed
+from .models import Attendance
+from .utils import supports_update_returning
+from .versions import bump_employees
+
+
+def close_open_attendance(employee_id, at=None):
+    """
+    Close the employee's latest open attendance in one statement.
+    Returns {"id", "work_date", "logout_time", "duration"} or None if nothing was open.
+    """
+    at = at or timezone.now()
+    if supports_update_returning():
+        qn = connection.ops.quote_name
+        table = qn(Attendance._meta.db_table)
+        logout = connection.ops.adapt_datetimefield_value(at)
+        duration_sql, duration_params = connection.ops.subtract_temporals(
+            "DateTimeField", ("%s", [logout]), (qn("login_time"), [])
+        )
+        with connection.cursor() as cursor:
+            # The outer "logout_time IS NULL" stops a concurrent logout closing the row twice
+            cursor.execute(
+                f"UPDATE {table} SET {qn('logout_time')} = %s, {qn('duration')} = {duration_sql} "
+                f"WHERE {qn('logout_time')} IS NULL AND {qn('id')} = ("
+                f"SELECT {qn('id')} FROM {table} WHERE {qn('employee_id')} = %s "
+                f"AND {qn('logout_time')} IS NULL ORDER BY {qn('id')} DESC LIMIT 1) "
+                f"RETURNING {qn('id')}, {qn('work_date')}, {qn('duration')}",
+                [logout, *duration_params, employee_id],
+            )
+            row = cursor.fetchone()
+        if row is None:
+            return None
+        attendance_id, work_date, duration = row
+        if not connection.features.has_native_duration_field:
+            duration = timedelta(microseconds=duration)
+        work_date = Attendance._meta.get_field("work_date").to_python(work_date)
+    else:
+        session = Attendance.objects.filter(
+            employee_id=employee_id, logout_time__isnull=True
+        ).order_by("-id").values("id", "work_date", "login_time").first()
+        if session is None or not Attendance.objects.filter(
+            pk=session["id"], logout_time__isnull=True
+        ).update(logout_time=at, duration=Value(at) - F("login_time")):
+            return None
+        attendance_id, work_date, duration = session["id"], session["work_date"], at - session["login_time"]
+
+    # A raw UPDATE skips attendance_saved, which would have dropped these
+    invalidate_day_state(employee_id, {work_date, timezone.localdate()})
+    summaries_changed(employee_id, {work_date})
+    bump_employees([employee_id])
+    return {"id": attendance_id, "work_date": work_date, "logout_time": at, "duration": duration}
+
+
+def _end_of_day(day):
+    return timezone.make_aware(datetime.combine(day, time.max), timezone.get_default_timezone())
+
+
+def _close_values(policy, day, hours):
+    """logout_time and duration expressions for stale sessions of one work day"""
+    end = Value(_end_of_day(day))
+    if policy == "end_of_day":
+        return {"logout_time": end, "duration": end - F("login_time")}
+    if policy == "max_hours":
+        # Assume a normal shift, but never run past the session's own day
+        shift = Value(timedelta(hours=hours))
+        return {
+            "logout_time": Least(F("login_time") + shift, end),
+            "duration": Least(shift, end - F("login_time")),
+        }
+    raise ValueError(f"Unknown auto-close policy {policy!r}; use end_of_day or max_hours")
+
+
+def close_stale_attendance(before=None, policy=None, hours=None, batch_size=1000):
+    """
+    Close every session still open from a work day before `before` (default today).
+    Each batch is one UPDATE with logout_time and duration computed in SQL.
+    Returns {"policy", "closed", "days": {work_date: count}}.
+    """
+    before = before or timezone.localdate()
+    policy = policy or settings.ATTENDANCE_AUTO_CLOSE_POLICY
+    hours = settings.ATTENDANCE_AUTO_CLOSE_HOURS if hours is None else hours
+    open_sessions = Attendance.objects.filter(logout_time__isnull=True, work_date__lt=before)
+
+    closed = {}
+    # Few distinct days, read from the partial index
+    for day in open_sessions.order_by("work_date").values_list("work_date", flat=True).distinct():
+        values = _close_values(policy, day, hours)
+        while True:
+            with transaction.atomic():
+                batch = list(
+                    open_sessions.filter(work_date=day).order_by("id")
+                    .values_list("id", "employee_id")[:batch_size]
+                )
+                if not batch:
+                    break
+                count = Attendance.objects.filter(
+                    id__in=[pk for pk, _ in batch], logout_time__isnull=True
+                ).update(**values)
+                # A raw UPDATE skips attendance_saved
+                for employee_id in {employee_id for _, employee_id in batch}:
+                    invalidate_day_state(employee_id, {day, timezone.localdate()})
+                    summaries_changed(employee_id, {day})
+                bump_employees(employee_id for _, employee_id in batch)
+            closed[day] = closed.get(day, 0) + count
+
+    return {"policy": policy, "closed": sum(closed.values()), "days": closed}
@@ -0,0 +1,182 @@
+"""
+JWT authentication without a database lookup on the common path.
+
+Tokens issued by LoginView, /api/token/ and /api/token/refresh/ carry the
+user's role, employee id, category and emp_no plus a stamp hashed from every
+field those claims depend on. While the cached current stamp for the user
+matches the token, request.user and request.user.employee are rebuilt from
+the claims. Saving or deleting a User or Employee drops the cached stamp; the
+next request then reloads the user once, and a changed stamp means the token's
+claims are stale, so the request is served from the database user instead
+(or rejected if the account was deactivated or suspended).
+"""
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .blacklist_filter import blacklist_filter
+from .models import Employee
+
+STAMP_CLAIM = "ver"
+
+
+def _employee_of(user):
+    try:
+        return user.employee
+    except Employee.DoesNotExist:
+        return None
+
+
+def _stamp(user, employee):
+    parts = (
+        user.is_active, user.username, user.is_staff, user.is_superuser,
+        employee and employee.pk, employee and employee.emp_no,
+        employee and employee.category, employee and employee.is_suspended,
+    )
+    return hashlib.blake2s(repr(parts).encode(), digest_size=6).hexdigest()
+
+
+def _stamp_key(user_id):
+    return f"auth_stamp:{user_id}"
+
+
+def principal_claims(user):
+    """Claims that let ClaimsJWTAuthentication rebuild the user without a query"""
+    employee = _employee_of(user)
+    if user.is_superuser:
+        role = "superadmin"
+    elif user.is_staff:
+        role = "staff"
+    else:
+        role = "employee"
+    return {
+        "username": user.username,
+        "role": role,
+        "is_staff": user.is_staff,
+        "is_superuser": user.is_superuser,
+        "employee_id": employee and employee.pk,
+        "emp_no": employee and employee.emp_no,
+        "category": employee and employee.category,
+        STAMP_CLAIM: _stamp(user, employee),
+    }
+
+
+def invalidate_auth_stamp(user_id):
+    """Drop the cached stamp now and again on commit, like invalidate_day_state"""
+    key = _stamp_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+def _from_values(model, values):
+    # A real instance with only these fields loaded; any other field loads on access
+    names = [f.attname for f in model._meta.concrete_fields if f.attname in values]
+    return model.from_db(DEFAULT_DB_ALIAS, names, [values[name] for name in names])
+
+
+def principal_from_claims(token):
+    user = _from_values(User, {
+        "id": token[api_settings.USER_ID_CLAIM],
+        "username": token["username"],
+        "is_active": True,
+        "is_staff": token["is_staff"],
+        "is_superuser": token["is_superuser"],
+    })
+    employee = None
+    if token["employee_id"] is not None:
+        employee = _from_values(Employee, {
+            "id": token["employee_id"],
+            "user_id": user.pk,
+            "emp_no": token["emp_no"],
+            "category": token["category"],
+            "is_suspended": False,
+        })
+        employee._state.fields_cache["user"] = user
+    # A cached None makes hasattr(user, "employee") False without a query
+    user._state.fields_cache["employee"] = employee
+    return user
+
+
+class ClaimsRefreshToken(RefreshToken):
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        # Access tokens made from this refresh token copy these claims
+        token.payload.update(principal_claims(user))
+        return token
+
+    def check_blacklist(self):
+        # A "no" from the filter is definite; a "maybe" still asks the database
+        if blacklist_filter.might_contain(self.payload[api_settings.JTI_CLAIM]):
+            super().check_blacklist()
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        # TokenRefreshSerializer.validate with a single user lookup, whose row also
+        # re-issues the tokens with current claims, so a refresh clears a stale stamp
+        refresh = self.token_class(attrs["refresh"])
+
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        if user_id:
+            user = User.objects.select_related("employee").filter(
+                **{api_settings.USER_ID_FIELD: user_id}
+            ).first()
+            if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+                raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+            refresh.payload.update(principal_claims(user))
+
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist()
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+
+        return data
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that trusts principal claims while their stamp is current"""
+
+    def get_user(self, validated_token):
+        if STAMP_CLAIM not in validated_token:
+            # Issued before tokens carried claims
+            return super().get_user(validated_token)
+
+        user_id = validated_token[api_settings.USER_ID_CLAIM]
+        if cache.get(_stamp_key(user_id)) == validated_token[STAMP_CLAIM]:
+            return principal_from_claims(validated_token)
+
+        user = User.objects.select_related("employee").filter(
+            **{api_settings.USER_ID_FIELD: user_id}
+        ).first()
+        if user is None:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+
+        employee = _employee_of(user)
+        if employee is not None and employee.is_suspended:
+            raise AuthenticationFailed("Your account is suspended", code="user_suspended")
+
+        cache.set(_stamp_key(user_id), _stamp(user, employee), settings.AUTH_STAMP_CACHE_TIMEOUT)
+        return user
@@ -0,0 +1,133 @@
+"""
+Per-worker Bloom filter over the unexpired part of the token blacklist.
+
+ClaimsRefreshToken.check_blacklist() asks the filter first. "Not present" is
+definite, so refreshing a token that was never blacklisted needs no query;
+"maybe" (blacklisted, or a false positive) falls back to simplejwt's lookup.
+
+Expired tokens are left out: simplejwt rejects them on exp anyway. To stay
+fresh, every blacklist insert replaces a version token in the shared cache once
+its transaction commits. A worker that sees a version it has not synced reads
+the rows added since its last sync before answering. Ids are not handed out in
+commit order, so that read overlaps the previous one by OVERLAP_ROWS; rows
+read again set no new bits and are not counted twice. The filter is rebuilt
+from scratch after TOKEN_BLACKLIST_FILTER_MAX_AGE seconds, or once it holds
+more entries than it was sized for.
+"""
+import hashlib
+import math
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+VERSION_KEY = "token_blacklist:version"
+OVERLAP_ROWS = 10000
+MIN_CAPACITY = 1024
+
+
+class BloomFilter:
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(1, capacity)
+        self.size = max(64, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item):
+        # Double hashing: k positions from one 128-bit digest
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, item):
+        """Set the item's bits; count it only if that changed a bit, so re-adding is free"""
+        added = False
+        for pos in self._positions(item):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                added = True
+        self.count += added
+        return added
+
+    def __contains__(self, item):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+
+def _expiry_cutoff():
+    leeway = api_settings.LEEWAY
+    if not isinstance(leeway, timedelta):
+        leeway = timedelta(seconds=leeway)
+    # Tokens that expired before this are refused on exp before the blacklist matters
+    return timezone.now() - leeway - timedelta(minutes=1)
+
+
+def blacklist_changed():
+    """Tell every worker to catch up, once the new blacklist row is visible"""
+    transaction.on_commit(lambda: cache.set(VERSION_KEY, uuid.uuid4().hex, None))
+
+
+class BlacklistFilter:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.bloom = None
+        self._version = None
+        self._high_water = 0
+        self._built_at = 0.0
+
+    def might_contain(self, jti):
+        if not settings.TOKEN_BLACKLIST_FILTER:
+            return True
+
+        # Read the version before the rows, so a change made meanwhile is seen next time
+        version = cache.get(VERSION_KEY)
+        if version is None:
+            cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+            version = cache.get(VERSION_KEY)
+
+        with self._lock:
+            if (
+                self.bloom is None
+                or self.bloom.count > self.bloom.capacity
+                or time.monotonic() - self._built_at > settings.TOKEN_BLACKLIST_FILTER_MAX_AGE
+            ):
+                self._rebuild(version)
+            elif version != self._version:
+                self._catch_up(version)
+            return jti in self.bloom
+
+    def _rows(self, **filters):
+        return BlacklistedToken.objects.filter(
+            token__expires_at__gt=_expiry_cutoff(), **filters
+        ).values_list("id", "token__jti")
+
+    def _rebuild(self, version):
+        live = self._rows()
+        bloom = BloomFilter(max(MIN_CAPACITY, live.count() * 2), settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE)
+        high_water = 0
+        for row_id, jti in live.iterator(chunk_size=10000):
+            bloom.add(jti)
+            high_water = max(high_water, row_id)
+        self.bloom, self._version, self._high_water = bloom, version, high_water
+        self._built_at = time.monotonic()
+
+    def _catch_up(self, version):
+        for row_id, jti in self._rows(id__gt=self._high_water - OVERLAP_ROWS).iterator():
+            self.bloom.add(jti)
+            self._high_water = max(self._high_water, row_id)
+        self._version = version
+
+
+blacklist_filter = BlacklistFilter()
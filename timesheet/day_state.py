@@ -0,0 +1,84 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, OuterRef, Q
+from django.utils import timezone
+
+from .models import Attendance, Employee, Job
+from .utils import leave_records_on
+
+ATTENDANCE_FIELDS = ("id", "work_date", "login_time", "selected_time", "logout_time")
+
+
+def _cache_key(employee_id, day):
+    return f"daystate:{employee_id}:{day.isoformat()}"
+
+
+def build_day_state(employee_id, day):
+    """
+    Everything the login, attendance and work-entry endpoints need to know about
+    one employee on one day, read in two queries:
+
+    on_leave            covered by a LeaveRecord
+    attendance          latest attendance of the day (dict) or None
+    open_today          latest attendance of the day still open, or None
+    open_attendance     latest open attendance on any day, or None
+    has_on_duty         on-duty job recorded against the day's attendance
+    has_leave           leave job recorded against the day's attendance
+    leave_marked_today  leave job created on the day
+    """
+    day_jobs = Job.objects.filter(attendance__employee_id=OuterRef("pk"), attendance__work_date=day)
+    flags = Employee.objects.filter(pk=employee_id).values_list(
+        Exists(leave_records_on(day).filter(employee_id=OuterRef("pk"))),
+        Exists(day_jobs.filter(status="on_duty")),
+        Exists(day_jobs.filter(status="leave")),
+        Exists(Job.objects.filter(
+            attendance__employee_id=OuterRef("pk"),
+            created_at__date=day,
+            status="leave",
+        )),
+    ).first() or (False, False, False, False)
+
+    attendances = list(
+        Attendance.objects.filter(employee_id=employee_id)
+        .filter(Q(work_date=day) | Q(logout_time__isnull=True))
+        .order_by("id")
+        .values(*ATTENDANCE_FIELDS)
+    )
+    today = [a for a in attendances if a["work_date"] == day]
+    open_today = [a for a in today if a["logout_time"] is None]
+    open_any = [a for a in attendances if a["logout_time"] is None]
+
+    return {
+        "on_leave": flags[0],
+        "attendance": today[-1] if today else None,
+        "open_today": open_today[-1] if open_today else None,
+        "open_attendance": open_any[-1] if open_any else None,
+        "has_on_duty": flags[1],
+        "has_leave": flags[2],
+        "leave_marked_today": flags[3],
+    }
+
+
+def get_day_state(employee, day=None):
+    """Cached build_day_state(); invalidated by the Attendance, Job and LeaveRecord signals"""
+    day = day or timezone.localdate()
+    employee_id = getattr(employee, "pk", employee)
+    key = _cache_key(employee_id, day)
+
+    state = cache.get(key)
+    if state is None:
+        state = build_day_state(employee_id, day)
+        cache.set(key, state, settings.DAY_STATE_CACHE_TIMEOUT)
+    return state
+
+
+def invalidate_day_state(employee_id, days):
+    """
+    Drop cached state for these days now, so reads later in the same transaction
+    see the write, and again on commit in case another request refilled it meanwhile.
+    """
+    keys = [_cache_key(employee_id, day) for day in days if day]
+    if keys:
+        cache.delete_many(keys)
+        transaction.on_commit(lambda: cache.delete_many(keys))
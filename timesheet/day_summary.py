@@ -0,0 +1,131 @@
+"""
+EmployeeDaySummary: one row per employee per day with activity.
+
+status        leave (LeaveRecord or leave job) > on_duty (on-duty job) > present
+duration      sum of the day's closed attendance sessions
+job_no        job numbers, joined like EmployeeTimeSheetView joins them
+job_details   job descriptions, same
+worked_on     the four flags, OR-ed over the day's jobs
+work_entries  on-duty jobs (the dashboard's total_work_entries)
+leave_type    from a covering LeaveRecord, else from a leave job
+
+Rows are rebuilt from the source tables, never patched: writes mark
+(employee, day) pairs dirty and the pairs are rebuilt once when the
+transaction commits, so a batch of writes costs one rebuild. The
+rebuild_day_summaries command rebuilds any date range.
+
+Reports take ?source=summary to read only this table.
+"""
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, Max, Q, Sum
+
+from .aggregates import bool_or, string_agg
+from .models import Attendance, EmployeeDaySummary, Job, LeaveRecord
+
+FLAGS = ["holiday_worked", "off_station", "local_site", "driv"]
+
+# (employee_id -> days) waiting for the current transaction to commit, per thread
+_pending = threading.local()
+
+
+def wants_summary(request):
+    return request.GET.get("source") == "summary"
+
+
+# 🔹 Building rows from the source tables
+
+def _scoped(queryset, employee_field, employee_ids):
+    return queryset if employee_ids is None else queryset.filter(**{f"{employee_field}__in": employee_ids})
+
+
+def build_summaries(days, employee_ids=None):
+    """Unsaved EmployeeDaySummary rows for these days (and employees), in three queries"""
+    days = sorted(set(days))
+    if not days:
+        return []
+    rows = defaultdict(dict)
+
+    sessions = _scoped(Attendance.objects.filter(work_date__in=days), "employee_id", employee_ids)
+    for employee_id, day, duration in sessions.values("employee_id", "work_date").annotate(
+        total=Sum("duration")
+    ).values_list("employee_id", "work_date", "total"):
+        rows[employee_id, day].update(status="present", duration=duration)
+
+    order = ("-attendance__login_time", "id")
+    jobs = _scoped(Job.objects.filter(attendance__work_date__in=days), "attendance__employee_id", employee_ids)
+    for job in jobs.values("attendance__employee_id", "attendance__work_date").annotate(
+        job_no_agg=string_agg("job_no", order_by=order),
+        job_details_agg=string_agg("description", order_by=order),
+        on_duty=Count("id", filter=Q(status="on_duty")),
+        job_leave_type=Max("leave_type", filter=Q(status="leave")),
+        **{f"{flag}_agg": bool_or(flag) for flag in FLAGS},
+    ).order_by():
+        row = rows[job["attendance__employee_id"], job["attendance__work_date"]]
+        row.update(
+            job_no=job["job_no_agg"] or "",
+            job_details=job["job_details_agg"] or "",
+            work_entries=job["on_duty"],
+            **{flag: bool(job[f"{flag}_agg"]) for flag in FLAGS},
+        )
+        if job["job_leave_type"]:
+            row.update(status="leave", leave_type=job["job_leave_type"])
+        elif job["on_duty"]:
+            row["status"] = "on_duty"
+
+    wanted = set(days)
+    leaves = _scoped(
+        LeaveRecord.objects.filter(start_date__lte=days[-1], end_date__gte=days[0]), "employee_id", employee_ids
+    )
+    # Later records win, like the latest job wins in the monthly timesheet
+    for employee_id, start, end, leave_type in leaves.order_by("id").values_list(
+        "employee_id", "start_date", "end_date", "leave_type"
+    ):
+        day = max(start, days[0])
+        while day <= min(end, days[-1]):
+            if day in wanted:
+                rows[employee_id, day].update(status="leave", leave_type=leave_type)
+            day += timedelta(days=1)
+
+    return [
+        EmployeeDaySummary(employee_id=employee_id, date=day, **values)
+        for (employee_id, day), values in sorted(rows.items())
+    ]
+
+
+def rebuild_day_summaries(days, employee_ids=None, batch_size=1000):
+    """Replace the summaries of these days (and employees); returns the number of rows written"""
+    days = set(days)
+    if not days:
+        return 0
+    with transaction.atomic():
+        summaries = build_summaries(days, employee_ids)
+        _scoped(EmployeeDaySummary.objects.filter(date__in=days), "employee_id", employee_ids).delete()
+        EmployeeDaySummary.objects.bulk_create(summaries, batch_size=batch_size)
+    return len(summaries)
+
+
+# 🔹 Incremental maintenance
+
+def summaries_changed(employee_id, days):
+    """Rebuild these days of one employee once the current transaction commits"""
+    days = {day for day in days if day}
+    if not days:
+        return
+    if not hasattr(_pending, "days"):
+        _pending.days = defaultdict(set)
+    # Marks in one transaction share a single rebuild; marks left behind by a
+    # rollback are rebuilt (harmlessly) with the next commit
+    _pending.days[employee_id].update(days)
+    # Derived data: a failed rebuild is logged, not raised into a committed write
+    transaction.on_commit(_flush, robust=True)
+
+
+def _flush():
+    pending = getattr(_pending, "days", None)
+    while pending:
+        employee_id, days = pending.popitem()
+        rebuild_day_summaries(days, [employee_id])
@@ -0,0 +1,169 @@
+"""
+Bulk employee onboarding: users, employees and opening leave balances from
+CSV or JSON, written with a few bulk inserts.
+
+Every row is validated before anything is written, and one bad row refuses
+the whole import. A dry run therefore reports exactly what a real run would
+reject. Passwords are hashed at full strength with the default hasher. The
+import_employees command spreads that over a process pool; the API hashes
+in-process (a web worker runs other threads and must not fork), so it only
+takes EMPLOYEE_IMPORT_API_MAX_ROWS rows per import and large files go
+through the command.
+
+CSV columns: username, password, emp_no, mobile, category, is_suspended, plus
+one column per leave type (sick, casual, ...) holding the opening allocation.
+JSON takes the same keys, with balances either flat or under "balances".
+"""
+import csv
+import io
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+
+from . import stats
+from .hashers import WrappedImportPasswordHasher
+from .models import Employee, LeaveBalance
+from .serializers import EmployeeImportSerializer
+
+LEAVE_TYPES = [leave_type for leave_type, _ in LeaveBalance.LEAVE_TYPES]
+
+
+def parse_csv(text):
+    rows = []
+    for record in csv.DictReader(io.StringIO(text)):
+        row = {key.strip(): (value or "").strip() for key, value in record.items() if key}
+        balances = {t: row.pop(t) for t in LEAVE_TYPES if row.get(t)}
+        row = {key: value for key, value in row.items() if value and key not in LEAVE_TYPES}
+        if balances:
+            row["balances"] = balances
+        rows.append(row)
+    return rows
+
+
+def parse_json(data):
+    if isinstance(data, dict):
+        data = data.get("employees")
+    if not isinstance(data, list):
+        raise ValueError("expected a list of employees or {\"employees\": [...]}")
+
+    rows = []
+    for item in data:
+        if isinstance(item, dict):
+            item = dict(item)
+            flat = {t: item.pop(t) for t in LEAVE_TYPES if t in item}
+            if flat:
+                nested = item.get("balances")
+                item["balances"] = {**flat, **nested} if isinstance(nested, dict) else flat
+        rows.append(item)
+    return rows
+
+
+def _existing(field, values, model):
+    values = list(values)
+    found = set()
+    for start in range(0, len(values), 1000):
+        found.update(model.objects.filter(
+            **{f"{field}__in": values[start:start + 1000]}
+        ).values_list(field, flat=True))
+    return found
+
+
+def validate_rows(rows):
+    """Returns (validated rows, [{"row": n, "errors": {...}}]) with 1-based row numbers"""
+    valid, errors = {}, {}
+    for i, row in enumerate(rows):
+        serializer = EmployeeImportSerializer(data=row)
+        if serializer.is_valid():
+            valid[i] = serializer.validated_data
+        else:
+            errors[i] = dict(serializer.errors)
+
+    # Uniqueness against the database and within the file, one query per chunk
+    for field, model in (("username", User), ("emp_no", Employee)):
+        taken = _existing(field, {data[field] for data in valid.values()}, model)
+        first_seen = {}
+        for i, data in valid.items():
+            value = data[field]
+            if value in taken:
+                errors.setdefault(i, {})[field] = [f"{value} already exists."]
+            elif value in first_seen:
+                errors.setdefault(i, {})[field] = [f"{value} is repeated from row {first_seen[value] + 1}."]
+            else:
+                first_seen[value] = i
+
+    report = [{"row": i + 1, "errors": errors[i]} for i in sorted(errors)]
+    return [valid[i] for i in sorted(valid) if i not in errors], report
+
+
+def _hash(password):
+    return make_password(password)
+
+
+def _wrap(encoded):
+    return WrappedImportPasswordHasher().wrap(encoded)
+
+
+def _map(func, items, processes):
+    # processes > 1 forks a pool: management commands only, never a web worker
+    # Forked children inherit the configured settings; elsewhere run in-process
+    if processes <= 1 or len(items) < 2 or "fork" not in multiprocessing.get_all_start_methods():
+        return [func(item) for item in items]
+    with ProcessPoolExecutor(processes, mp_context=multiprocessing.get_context("fork")) as pool:
+        return list(pool.map(func, items, chunksize=max(1, len(items) // (processes * 4))))
+
+
+def hash_passwords(passwords, processes=1):
+    """Default-hasher hashes of these passwords"""
+    return _map(_hash, passwords, processes)
+
+
+def wrap_import_hashes(hashes, processes=1):
+    """Full-strength wrapped versions of these import hashes (see WrappedImportPasswordHasher)"""
+    return _map(_wrap, hashes, processes)
+
+
+def import_employees(rows, dry_run=False, batch_size=1000, processes=1):
+    """Validate and (unless dry_run or any row is invalid) create everything; returns a report"""
+    valid, errors = validate_rows(rows)
+    report = {"rows": len(rows), "valid": len(valid), "errors": errors, "dry_run": dry_run,
+              "created": 0, "balances": 0}
+    if dry_run or errors:
+        return report
+
+    # Hash before the transaction opens, so no locks are held meanwhile
+    hashes = hash_passwords([data["password"] for data in valid], processes)
+
+    with transaction.atomic():
+        users = User.objects.bulk_create(
+            [User(username=data["username"], password=hashed) for data, hashed in zip(valid, hashes)],
+            batch_size=batch_size,
+        )
+        employees = Employee.objects.bulk_create(
+            [
+                Employee(
+                    user=user,
+                    emp_no=data["emp_no"],
+                    mobile=data.get("mobile"),
+                    category=data.get("category"),
+                    is_suspended=data["is_suspended"],
+                )
+                for user, data in zip(users, valid)
+            ],
+            batch_size=batch_size,
+        )
+        balances = LeaveBalance.objects.bulk_create(
+            [
+                LeaveBalance(employee=employee, leave_type=leave_type, total_allocated=amount)
+                for employee, data in zip(employees, valid)
+                for leave_type, amount in data.get("balances", {}).items()
+            ],
+            batch_size=batch_size,
+        )
+        # bulk_create skips employee_saved; new users have no cached auth stamp to drop
+        stats.employees_changed()
+
+    report.update(created=len(employees), balances=len(balances))
+    return report
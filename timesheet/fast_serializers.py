@@ -0,0 +1,121 @@
+"""
+Read-only fast path for work entry listings.
+
+Builds the same rows as JobSerializer straight from a .values() projection,
+without per-row field objects or nested serializers. The output must stay
+byte-identical to JobSerializer; benchmark_job_serializer checks it.
+"""
+import datetime
+
+from django.conf import settings
+from django.utils import timezone
+from django.utils.duration import duration_string
+from rest_framework.settings import ISO_8601, api_settings
+
+JOB_ROW_COLUMNS = (
+    "id", "status", "description", "start_time", "end_time", "job_no", "ship_name",
+    "location", "holiday_worked", "off_station", "local_site", "driv", "leave_type",
+    "leave_reason", "created_at", "attendance_id", "attendance__login_time",
+    "attendance__logout_time", "attendance__duration",
+    "attendance__employee__user__username", "attendance__employee__category",
+)
+
+
+def job_rows(queryset):
+    """Project a Job queryset onto the columns serialize_job_rows() needs"""
+    return queryset.values(*JOB_ROW_COLUMNS)
+
+
+def _datetime_formatter():
+    # Mirrors rest_framework.fields.DateTimeField.to_representation
+    output_format = api_settings.DATETIME_FORMAT
+    field_timezone = timezone.get_current_timezone() if settings.USE_TZ else None
+
+    def fmt(value):
+        if not value:
+            return None
+        if output_format is None:
+            return value
+        if field_timezone is not None:
+            value = value.astimezone(field_timezone) if timezone.is_aware(value) \
+                else timezone.make_aware(value, field_timezone)
+        elif timezone.is_aware(value):
+            value = timezone.make_naive(value, datetime.timezone.utc)
+        if output_format.lower() == ISO_8601:
+            value = value.isoformat()
+            if value.endswith("+00:00"):
+                value = value[:-6] + "Z"
+            return value
+        return value.strftime(output_format)
+
+    return fmt
+
+
+def _time_formatter():
+    # Mirrors rest_framework.fields.TimeField.to_representation
+    output_format = api_settings.TIME_FORMAT
+
+    def fmt(value):
+        if value in (None, ""):
+            return None
+        if output_format is None:
+            return value
+        if output_format.lower() == ISO_8601:
+            return value.isoformat()
+        return value.strftime(output_format)
+
+    return fmt
+
+
+def serialize_job_rows(rows):
+    """Turn job_rows() dicts into JobSerializer-shaped dicts"""
+    fmt_datetime = _datetime_formatter()
+    fmt_time = _time_formatter()
+    weekdays = {}
+    result = []
+
+    for row in rows:
+        login_time = row["attendance__login_time"]
+        login = fmt_datetime(login_time)
+        username = row["attendance__employee__user__username"]
+        category = row["attendance__employee__category"]
+        duration = row["attendance__duration"]
+
+        day = ""
+        if login_time:
+            # JobSerializer.get_day formats the stored (UTC) login_time
+            day_key = login_time.date()
+            day = weekdays.get(day_key)
+            if day is None:
+                day = weekdays[day_key] = login_time.strftime("%A")
+
+        result.append({
+            "id": row["id"],
+            "employee_name": username,
+            "attendance": {
+                "id": row["attendance_id"],
+                "employee_name": username,
+                "login_time": login,
+                "logout_time": fmt_datetime(row["attendance__logout_time"]),
+                "duration": duration_string(duration) if duration is not None else None,
+            },
+            "status": row["status"],
+            "description": row["description"],
+            "start_time": fmt_time(row["start_time"]),
+            "end_time": fmt_time(row["end_time"]),
+            "job_no": row["job_no"],
+            "ship_name": row["ship_name"],
+            "location": row["location"],
+            "holiday_worked": row["holiday_worked"],
+            "off_station": row["off_station"],
+            "local_site": row["local_site"],
+            "driv": row["driv"],
+            "leave_type": row["leave_type"],
+            "leave_reason": row["leave_reason"],
+            "date": login,
+            "day": day,
+            "created_at": fmt_datetime(row["created_at"]),
+            "category": category,
+        })
+
+    return result
@@ -0,0 +1,32 @@
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+
+
+class ImportPasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 with fewer iterations, which earlier versions of the bulk employee
+    import used for opening passwords. Kept so those hashes still verify; it is
+    not the preferred hasher, so Django re-hashes the password with the default
+    one at the user's first successful login.
+    """
+    algorithm = "pbkdf2_sha256_import"
+    iterations = 20000
+
+
+class WrappedImportPasswordHasher(PBKDF2PasswordHasher):
+    """
+    An import hash that was never upgraded, wrapped in full-strength PBKDF2 by
+    the harden_import_passwords command, which never sees the password. The
+    salt carries the import hash's own iterations and salt ("<iterations>.<salt>"),
+    so checking a password runs both rounds. The first login upgrades it to the
+    default hasher like any other non-preferred hash.
+    """
+    algorithm = "pbkdf2_sha256_import_wrapped"
+
+    def wrap(self, import_encoded):
+        decoded = ImportPasswordHasher().decode(import_encoded)
+        return super().encode(decoded["hash"], f"{decoded['iterations']}.{decoded['salt']}")
+
+    def encode(self, password, salt, iterations=None):
+        inner_iterations, inner_salt = salt.split(".", 1)
+        inner = ImportPasswordHasher().encode(password, inner_salt, int(inner_iterations))
+        return super().encode(ImportPasswordHasher().decode(inner)["hash"], salt, iterations)
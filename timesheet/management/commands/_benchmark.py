@@ -0,0 +1,30 @@
+"""Helpers shared by the benchmark_* management commands"""
+import statistics
+import time
+
+from django.contrib.auth.models import User
+
+from timesheet.models import Employee
+
+
+def create_bench_employees(prefix, count, category="A"):
+    """Bulk create count users with matching employees, returned in id order"""
+    User.objects.bulk_create(
+        User(username=f"{prefix}_{i}", password="!") for i in range(count)
+    )
+    users = User.objects.filter(username__startswith=f"{prefix}_").order_by("id")
+    Employee.objects.bulk_create(
+        Employee(user=user, emp_no=f"{prefix.upper()}-{i}", category=category)
+        for i, user in enumerate(users)
+    )
+    return list(Employee.objects.filter(emp_no__startswith=f"{prefix.upper()}-").order_by("id"))
+
+
+def median_ms(fn, iterations):
+    """Median wall time of fn() in milliseconds"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
@@ -0,0 +1,120 @@
+import asyncio
+import contextlib
+import io
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from timesheet.authentication import ClaimsRefreshToken
+from timesheet.models import Employee
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire admin report requests and employee attendance status requests at the same "
+        "time, once through sync workers (a thread pool of --workers WSGI handlers) and once "
+        "through one ASGI event loop using the /api/async/ report views, and compare latency. "
+        "Needs seeded data (see seed_organisation); nothing is written."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="seed", help="Username prefix used by seed_organisation")
+        parser.add_argument("--workers", type=int, default=4, help="Sync worker slots")
+        parser.add_argument("--reports", type=int, default=30, help="Concurrent admin report requests")
+        parser.add_argument("--attendance", type=int, default=120, help="Concurrent attendance status requests")
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        admin = User.objects.filter(username=f"{prefix}_admin").first()
+        employees = list(Employee.objects.select_related("user").filter(
+            user__username__startswith=f"{prefix}_"
+        ).order_by("id")[:50])
+        if not admin or not employees:
+            raise CommandError(f"No seeded data with prefix '{prefix}'; run seed_organisation first")
+
+        day = timezone.localdate() - timedelta(days=1)
+        admin_token = f"Bearer {ClaimsRefreshToken.for_user(admin).access_token}"
+        employee_tokens = [f"Bearer {ClaimsRefreshToken.for_user(e.user).access_token}" for e in employees]
+
+        def reports(base):
+            paths = [
+                f"/api/{base}daywise-report/?date={day}",
+                f"/api/{base}timesheet/monthly/?employee={employees[0].pk}&month={day:%Y-%m}",
+                f"/api/{base}dashboard/today/",
+            ]
+            return [("report", paths[i % len(paths)], admin_token) for i in range(options["reports"])]
+
+        attendance = [
+            ("attendance", "/api/attendance/status/", employee_tokens[i % len(employee_tokens)])
+            for i in range(options["attendance"])
+        ]
+
+        # Reports first, so attendance requests arrive while the reports are in flight
+        results = {}
+        with override_settings(ALLOWED_HOSTS=["testserver"]), contextlib.redirect_stdout(io.StringIO()):
+            results["sync"] = self._run_sync(reports("") + attendance, options["workers"])
+            results["async"] = asyncio.run(self._run_async(reports("async/") + attendance))
+
+        self.stdout.write(
+            f"{options['reports']} report + {options['attendance']} attendance requests, "
+            f"sync workers: {options['workers']}, async: 1 event loop"
+        )
+        self.stdout.write(f"{'mode':<6} {'kind':<11} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'errors':>7} {'wall ms':>9}")
+        for mode, (samples, errors, wall) in results.items():
+            for kind in ("report", "attendance"):
+                values = samples[kind]
+                self.stdout.write(
+                    f"{mode:<6} {kind:<11} {statistics.median(values):>9.1f} "
+                    f"{self._p95(values):>9.1f} {max(values):>9.1f} {errors[kind]:>7} {wall:>9.1f}"
+                )
+
+    def _p95(self, values):
+        if len(values) < 2:
+            return values[0]
+        return statistics.quantiles(values, n=20, method="inclusive")[18]
+
+    def _run_sync(self, requests, workers):
+        def call(item, submitted):
+            kind, path, token = item
+            try:
+                response = Client().get(path, headers={"authorization": token})
+            finally:
+                connections.close_all()
+            # Latency includes time queued behind busy workers, as a client sees it
+            return kind, (time.perf_counter() - submitted) * 1000, response.status_code
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(call, item, time.perf_counter()) for item in requests]
+            outcomes = [future.result() for future in futures]
+        return self._summarise(outcomes, start)
+
+    async def _run_async(self, requests):
+        client = AsyncClient()
+
+        async def call(item):
+            kind, path, token = item
+            submitted = time.perf_counter()
+            response = await client.get(path, headers={"authorization": token})
+            return kind, (time.perf_counter() - submitted) * 1000, response.status_code
+
+        start = time.perf_counter()
+        outcomes = await asyncio.gather(*(call(item) for item in requests))
+        return self._summarise(outcomes, start)
+
+    def _summarise(self, outcomes, start):
+        wall = (time.perf_counter() - start) * 1000
+        samples = {"report": [], "attendance": []}
+        errors = {"report": 0, "attendance": 0}
+        for kind, elapsed, status in outcomes:
+            samples[kind].append(elapsed)
+            errors[kind] += status >= 400
+        return samples, errors, wall
@@ -0,0 +1,325 @@
+import contextlib
+import io
+import json
+import logging
+import statistics
+import subprocess
+import time
+import tracemalloc
+from collections import Counter, namedtuple
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLResolver, get_resolver, resolve
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from timesheet.authentication import ClaimsRefreshToken
+from timesheet.models import Attendance, Employee, Job, LeaveBalance, LeaveRecord
+from timesheet.utils import employees_on_leave
+
+# path and data are callables of the fixture context; setup may add keys to it
+Endpoint = namedtuple("Endpoint", "method path user data setup", defaults=(None, None))
+
+
+def _open_attendance(ctx):
+    return {"attendance": Attendance.objects.create(employee=ctx["employee"])}
+
+
+def _staff_user(ctx):
+    return {"staff": User.objects.create_user("bench_staff", password="!", is_staff=True)}
+
+
+ON_DUTY = {
+    "status": "on_duty", "start_time": "08:00", "end_time": "12:00", "description": "Benchmark",
+    "ship_name": "Ocean Pearl", "job_no": "JB-BENCH", "location": "Kochi",
+}
+
+ENDPOINTS = [
+    # 🔹 Reads
+    Endpoint("get", lambda c: "/api/", "admin"),
+    Endpoint("get", lambda c: "/api/dashboard/today/", "employee"),
+    Endpoint("get", lambda c: "/api/attendance/status/", "employee"),
+    Endpoint("get", lambda c: "/api/profile/", "employee"),
+    Endpoint("get", lambda c: "/api/employees/me/", "employee"),
+    Endpoint("get", lambda c: "/api/workentries/", "employee"),
+    Endpoint("get", lambda c: "/api/workentries/", "admin"),
+    Endpoint("get", lambda c: "/api/workentries/search/?q=pump", "admin"),
+    Endpoint("get", lambda c: f"/api/workentries/{c['job'].pk}/", "employee"),
+    Endpoint("get", lambda c: f"/api/timesheet/{c['employee'].pk}/?start={c['month_start']}&end={c['yesterday']}", "admin"),
+    Endpoint("get", lambda c: f"/api/timesheet/monthly/?employee={c['employee'].pk}&month={c['month']}", "employee"),
+    Endpoint("get", lambda c: f"/api/timesheet/monthly/export/?month={c['month']}&output=csv", "admin"),
+    Endpoint("get", lambda c: f"/api/daywise-report/?date={c['yesterday']}", "admin"),
+    Endpoint("get", lambda c: f"/api/leaves/report/employee/?employee={c['employee'].pk}&month={c['month']}", "employee"),
+    Endpoint("get", lambda c: "/api/leavebalances/", "admin"),
+    Endpoint("get", lambda c: "/api/leavebalances/me/", "employee"),
+    Endpoint("get", lambda c: f"/api/leavebalances/{c['balance'].pk}/", "admin"),
+    Endpoint("get", lambda c: "/api/employees/", "admin"),
+    Endpoint("get", lambda c: f"/api/employees/{c['employee'].pk}/", "admin"),
+    Endpoint("get", lambda c: f"/api/employees/{c['employee'].pk}/attendances/", "admin"),
+    Endpoint("get", lambda c: f"/api/employees/{c['employee'].pk}/jobs/", "admin"),
+    Endpoint("get", lambda c: "/api/leaves/", "admin"),
+    Endpoint("get", lambda c: f"/api/leaves/{c['leave'].pk}/", "admin"),
+    Endpoint("get", lambda c: "/api/admin/profile/", "admin"),
+    Endpoint("get", lambda c: "/api/admin/manage-admins/", "admin"),
+    Endpoint("get", lambda c: "/api/metrics/", "admin"),
+
+    # 🔹 Writes (each iteration is rolled back)
+    Endpoint("post", lambda c: "/api/login/", None,
+             lambda c: {"username": c["employee"].user.username, "password": c["password"]}),
+    Endpoint("post", lambda c: "/api/attendance/login/", "employee", lambda c: {}),
+    Endpoint("post", lambda c: "/api/attendance/logout/", "employee", lambda c: {}, _open_attendance),
+    Endpoint("post", lambda c: "/api/workentries/", "employee", lambda c: ON_DUTY, _open_attendance),
+    Endpoint("patch", lambda c: f"/api/workentries/{c['job'].pk}/", "employee",
+             lambda c: {"description": "Benchmark edit"}),
+    Endpoint("delete", lambda c: f"/api/workentries/{c['job'].pk}/", "employee"),
+    Endpoint("post", lambda c: "/api/leaves/apply/", "employee",
+             lambda c: {"leave_type": "casual", "start_date": str(c["tomorrow"]),
+                        "end_date": str(c["tomorrow"]), "reason": "Benchmark"}),
+    Endpoint("post", lambda c: f"/api/employees/{c['employee'].pk}/suspend/", "admin", lambda c: {}),
+    Endpoint("post", lambda c: "/api/employees/", "admin",
+             lambda c: {"username": "bench_new_employee", "password": "bench", "emp_no": "BENCH-NEW", "category": "B"}),
+    Endpoint("patch", lambda c: f"/api/employees/{c['employee'].pk}/", "admin", lambda c: {"mobile": "9000000000"}),
+    Endpoint("delete", lambda c: f"/api/employees/{c['employee'].pk}/", "admin"),
+    Endpoint("post", lambda c: "/api/leaves/", "admin",
+             lambda c: {"employee": c["employee"].pk, "leave_type": "sick", "reason": "Benchmark"}),
+    Endpoint("patch", lambda c: f"/api/leaves/{c['leave'].pk}/", "admin", lambda c: {"reason": "Benchmark edit"}),
+    Endpoint("delete", lambda c: f"/api/leaves/{c['leave'].pk}/", "admin"),
+    Endpoint("post", lambda c: "/api/leavebalances/", "admin",
+             lambda c: {"employee": c["employee"].pk, "leave_type": "sick", "action": "add", "amount": 1}),
+    Endpoint("patch", lambda c: f"/api/leavebalances/{c['balance'].pk}/", "admin", lambda c: {"total_allocated": 20}),
+    Endpoint("delete", lambda c: f"/api/leavebalances/{c['balance'].pk}/", "admin"),
+    Endpoint("put", lambda c: "/api/admin/profile/update/", "admin", lambda c: {"first_name": "Bench"}),
+    Endpoint("post", lambda c: "/api/admin/profile/change-password/", "admin",
+             lambda c: {"old_password": c["password"], "new_password": "bench-new-password"}),
+    Endpoint("post", lambda c: "/api/admin/create/", "admin",
+             lambda c: {"username": "bench_new_admin", "email": "bench@example.com", "password": "bench", "role": "staff"}),
+    Endpoint("delete", lambda c: f"/api/admin/manage-admins/{c['staff'].pk}/delete/", "admin", None, _staff_user),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every timesheet API endpoint through the test client against seeded data "
+        "(see seed_organisation) and write a JSON report of p50/p95/p99 latency, SQL "
+        "queries and peak memory per endpoint. Writes are rolled back after each request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=50)
+        parser.add_argument("--memory-iterations", type=int, default=3,
+                            help="Requests per endpoint measured under tracemalloc, separately from timing")
+        parser.add_argument("--prefix", default="seed", help="Username prefix used by seed_organisation")
+        parser.add_argument("--password", default="seed-password", help="Password of the seeded users")
+        parser.add_argument("--only", help="Only run endpoints whose name contains this text")
+        parser.add_argument("--output", help="Write the report here instead of stdout")
+
+    def handle(self, *args, **options):
+        endpoints = [(self._name(e), e) for e in ENDPOINTS]
+        if options["only"]:
+            endpoints = [(name, e) for name, e in endpoints if options["only"] in name]
+
+        # 500s are part of the report, not log noise
+        logging.getLogger("django.request").setLevel(logging.CRITICAL)
+
+        report = {"meta": self._meta(options), "endpoints": {}}
+        with override_settings(ALLOWED_HOSTS=["testserver"]), transaction.atomic():
+            ctx = self._fixtures(options)
+            clients = self._clients(ctx)
+            report["meta"]["rows"] = {
+                "employees": Employee.objects.count(),
+                "attendance": Attendance.objects.count(),
+                "jobs": Job.objects.count(),
+                "leave_records": LeaveRecord.objects.count(),
+            }
+            cache.clear()
+
+            for name, endpoint in endpoints:
+                self.stderr.write(f"{name} ...")
+                report["endpoints"][name] = self._measure(clients, endpoint, ctx, options)
+
+            transaction.set_rollback(True)
+
+        cache.clear()
+        report["uncovered"] = sorted(self._api_routes() - self._covered_routes(ctx))
+
+        output = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(output + "\n")
+            self.stderr.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        else:
+            self.stdout.write(output)
+
+    def _name(self, endpoint):
+        # Stable key for diffing reports: route pattern rather than concrete ids
+        sample = endpoint.path(_RouteContext())
+        return f"{endpoint.method.upper()} {sample} ({endpoint.user or 'anonymous'})"
+
+    def _fixtures(self, options):
+        prefix = options["prefix"]
+        admin = User.objects.filter(username=f"{prefix}_admin").first()
+        today = timezone.localdate()
+        employee = Employee.objects.select_related("user").filter(
+            user__username__startswith=f"{prefix}_", category="A", is_suspended=False,
+            attendance_records__work_date__lt=today,
+        ).exclude(attendance_records__work_date=today).exclude(
+            pk__in=employees_on_leave(today)
+        ).order_by("id").first()
+        if not admin or not employee:
+            raise CommandError(f"No seeded data with prefix '{prefix}'; run seed_organisation first")
+
+        yesterday = today - timedelta(days=1)
+        balance, _ = LeaveBalance.objects.get_or_create(
+            employee=employee, leave_type="casual", defaults={"total_allocated": 12}
+        )
+        # Leave apply must have room for one day
+        LeaveBalance.objects.filter(pk=balance.pk).update(total_allocated=balance.used + 12)
+        leave = LeaveRecord.objects.filter(employee=employee).order_by("-id").first() or LeaveRecord.objects.create(
+            employee=employee, leave_type="sick", start_date=yesterday, end_date=yesterday, total_days=1,
+        )
+        return {
+            "admin": admin,
+            "employee": employee,
+            "password": options["password"],
+            "job": Job.objects.filter(attendance__employee=employee).order_by("-id").first(),
+            "leave": leave,
+            "balance": balance,
+            "today": today,
+            "tomorrow": today + timedelta(days=1),
+            "yesterday": yesterday,
+            "month_start": yesterday.replace(day=1),
+            "month": yesterday.strftime("%Y-%m"),
+        }
+
+    def _clients(self, ctx):
+        clients = {None: APIClient(raise_request_exception=False)}
+        for role in ("admin", "employee"):
+            user = ctx[role] if role == "admin" else ctx[role].user
+            client = APIClient(raise_request_exception=False)
+            # A real access token, so authentication costs what it does in production
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(user).access_token}")
+            clients[role] = client
+        return clients
+
+    def _request(self, clients, endpoint, ctx):
+        with transaction.atomic():
+            if endpoint.setup:
+                ctx = {**ctx, **endpoint.setup(ctx)}
+            path = endpoint.path(ctx)
+            data = endpoint.data(ctx) if endpoint.data else None
+
+            # Some views print debug lines; keep them out of the report
+            with CaptureQueriesContext(connection) as captured, contextlib.redirect_stdout(io.StringIO()):
+                start = time.perf_counter()
+                response = getattr(clients[endpoint.user], endpoint.method)(path, data, format="json")
+                if response.streaming:
+                    b"".join(response.streaming_content)
+                elapsed = (time.perf_counter() - start) * 1000
+
+            transaction.set_rollback(True)
+
+        if endpoint.method != "get":
+            # Rolled back writes may have refreshed cached day state
+            cache.clear()
+        return response.status_code, elapsed, len(captured.captured_queries)
+
+    def _measure(self, clients, endpoint, ctx, options):
+        samples, queries, statuses = [], [], Counter()
+        for _ in range(options["iterations"]):
+            status, elapsed, query_count = self._request(clients, endpoint, ctx)
+            samples.append(elapsed)
+            queries.append(query_count)
+            statuses[str(status)] += 1
+
+        peak = 0
+        for _ in range(options["memory_iterations"]):
+            tracemalloc.start()
+            try:
+                self._request(clients, endpoint, ctx)
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            finally:
+                tracemalloc.stop()
+
+        return {
+            "p50_ms": round(self._percentile(samples, 50), 3),
+            "p95_ms": round(self._percentile(samples, 95), 3),
+            "p99_ms": round(self._percentile(samples, 99), 3),
+            "queries": max(queries),
+            "queries_min": min(queries),
+            "peak_memory_kib": round(peak / 1024, 1),
+            "status": dict(statuses),
+        }
+
+    def _percentile(self, samples, pct):
+        if len(samples) < 2:
+            return samples[0]
+        return statistics.quantiles(samples, n=100, method="inclusive")[pct - 1]
+
+    def _meta(self, options):
+        try:
+            revision = subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR,
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            revision = None
+        return {
+            "database": connection.vendor,
+            "git_revision": revision,
+            "iterations": options["iterations"],
+            "memory_iterations": options["memory_iterations"],
+            "generated_at": timezone.now().isoformat(),
+        }
+
+    def _api_routes(self):
+        for pattern in get_resolver().url_patterns:
+            if isinstance(pattern, URLResolver) and pattern.urlconf_name == "timesheet.urls":
+                return {
+                    route for route in _flatten(pattern.url_patterns, str(pattern.pattern))
+                    # DefaultRouter adds .json/.api suffix variants of every route
+                    if "<format>" not in route and "(?P<format>" not in route
+                }
+        return set()
+
+    def _covered_routes(self, ctx):
+        ctx = {**ctx, "staff": ctx["admin"]}
+        covered = set()
+        for endpoint in ENDPOINTS:
+            path = endpoint.path(ctx).split("?")[0]
+            covered.add(resolve(path).route)
+        return covered
+
+
+def _flatten(patterns, prefix):
+    """Full route strings of a urlconf, joined the way ResolverMatch.route joins them"""
+    for pattern in patterns:
+        route = str(pattern.pattern)
+        if prefix and route.startswith("^"):
+            route = route[1:]
+        if isinstance(pattern, URLResolver):
+            yield from _flatten(pattern.url_patterns, prefix + route)
+        else:
+            yield prefix + route
+
+
+class _RouteContext(dict):
+    """Fixture stand-in that renders ids as <pk> when naming endpoints"""
+
+    def __missing__(self, key):
+        return _Placeholder(key)
+
+
+class _Placeholder:
+    def __init__(self, key):
+        self.key = key
+        self.pk = "<pk>"
+        self.user = self
+
+    def __str__(self):
+        return f"<{self.key}>"
@@ -0,0 +1,89 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from timesheet.models import Attendance, Job
+from timesheet.search import search_jobs
+
+from ._benchmark import create_bench_employees, median_ms
+
+SHIPS = ["Ocean Pearl", "Sea Falcon", "Northern Star", "Blue Marlin", "Coral Queen", "Harbor Light"]
+LOCATIONS = ["Kochi", "Mumbai", "Chennai", "Vizag", "Goa", "Mangalore"]
+WORDS = ["engine", "overhaul", "pump", "valve", "inspection", "welding", "hull", "generator",
+         "survey", "painting", "alignment", "compressor", "boiler", "calibration"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ranked job search against the icontains filters it replaces. "
+        "Runs inside a transaction that is rolled back, so no data is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=200000)
+        parser.add_argument("--employees", type=int, default=200)
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--page-size", type=int, default=50)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        page = options["page_size"]
+        terms = ["JB-104", "marlin", "compressor", "Vizag"]
+
+        with transaction.atomic():
+            self._seed(options["jobs"], options["employees"], rng)
+
+            rows = []
+            for term in terms:
+                def icontains():
+                    return list(Job.objects.filter(
+                        Q(job_no__icontains=term) | Q(ship_name__icontains=term)
+                        | Q(location__icontains=term) | Q(description__icontains=term)
+                    ).order_by("-created_at")[:page])
+
+                def ranked():
+                    return list(search_jobs(Job.objects.all(), term)[:page])
+
+                rows.append((
+                    term,
+                    median_ms(icontains, options["iterations"]),
+                    median_ms(ranked, options["iterations"]),
+                ))
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{options['jobs']} jobs on {connection.vendor}, first page of {page}")
+        self.stdout.write(f"{'term':<12} {'icontains ms':>13} {'search ms':>10}")
+        for term, legacy, ranked in rows:
+            self.stdout.write(f"{term:<12} {legacy:>13.3f} {ranked:>10.3f}")
+
+    def _seed(self, count, employee_count, rng):
+        employees = create_bench_employees("bench_search", employee_count)
+        now = timezone.now()
+        attendances = Attendance.objects.bulk_create(
+            Attendance(employee=employee, login_time=now - timedelta(days=day),
+                       work_date=Attendance.local_date(now - timedelta(days=day)))
+            for day in range(max(1, count // (employee_count * 3)))
+            for employee in employees
+        )
+        if attendances[0].pk is None:
+            attendances = list(Attendance.objects.filter(employee__in=employees))
+
+        batch = []
+        for i in range(count):
+            batch.append(Job(
+                attendance=attendances[i % len(attendances)],
+                job_no=f"JB-{rng.randrange(100000)}",
+                ship_name=rng.choice(SHIPS),
+                location=rng.choice(LOCATIONS),
+                description=" ".join(rng.sample(WORDS, 4)),
+            ))
+            if len(batch) >= 5000:
+                Job.objects.bulk_create(batch)
+                batch = []
+        Job.objects.bulk_create(batch)
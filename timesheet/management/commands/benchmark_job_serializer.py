@@ -0,0 +1,97 @@
+import random
+import time
+from datetime import time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from timesheet.fast_serializers import job_rows, serialize_job_rows
+from timesheet.models import Attendance, Job
+from timesheet.serializers import JobSerializer
+
+from ._benchmark import create_bench_employees
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/sec of JobSerializer against the flat work entry serializer "
+        "and check both render byte-identical JSON. Data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--jobs", type=int, default=20000)
+        parser.add_argument("--repeat", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        renderer = JSONRenderer()
+
+        with transaction.atomic():
+            self._seed(options["jobs"], random.Random(options["seed"]))
+            queryset = Job.objects.select_related("attendance__employee__user").order_by("-created_at", "-id")
+
+            # Query time is excluded: both paths are timed on rows already in memory
+            instances = list(queryset)
+            rows = list(job_rows(queryset))
+
+            slow = renderer.render(JobSerializer(instances, many=True).data)
+            fast = renderer.render(serialize_job_rows(rows))
+            if slow != fast:
+                raise CommandError("Flat serializer output differs from JobSerializer")
+
+            slow_rate = self._rate(lambda: JobSerializer(instances, many=True).data, len(instances), options["repeat"])
+            fast_rate = self._rate(lambda: serialize_job_rows(rows), len(rows), options["repeat"])
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{len(rows)} rows, JSON identical ({len(fast)} bytes)")
+        self.stdout.write(f"JobSerializer        {slow_rate:>12,.0f} rows/sec")
+        self.stdout.write(f"serialize_job_rows   {fast_rate:>12,.0f} rows/sec  ({fast_rate / slow_rate:.1f}x)")
+
+    def _rate(self, fn, count, repeat):
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return count / best
+
+    def _seed(self, count, rng):
+        employees = create_bench_employees("bench_serializer", 50)
+        now = timezone.now()
+        attendances = []
+        for day in range(max(1, count // 150)):
+            for employee in employees:
+                login = now - timedelta(days=day, minutes=rng.randrange(600))
+                closed = rng.random() < 0.9
+                attendances.append(Attendance(
+                    employee=employee,
+                    login_time=login,
+                    logout_time=login + timedelta(hours=8, seconds=rng.randrange(3600)) if closed else None,
+                    duration=timedelta(hours=8, seconds=rng.randrange(3600)) if closed else None,
+                    work_date=Attendance.local_date(login),
+                ))
+        Attendance.objects.bulk_create(attendances)
+        attendances = list(Attendance.objects.filter(employee__in=employees))
+
+        jobs = []
+        for i in range(count):
+            leave = rng.random() < 0.1
+            jobs.append(Job(
+                attendance=attendances[i % len(attendances)],
+                status="leave" if leave else "on_duty",
+                leave_type="sick" if leave else None,
+                leave_reason="Fever" if leave else None,
+                description=None if leave else f"Work item {i}",
+                start_time=None if leave else dt_time(8, rng.randrange(60)),
+                end_time=None if leave else dt_time(17, 0, rng.randrange(60), rng.choice([0, 500])),
+                job_no=None if leave else f"JB-{i}",
+                ship_name=None if leave else "Ocean Pearl",
+                location=None if leave else "Kochi",
+                holiday_worked=rng.random() < 0.1,
+                off_station=rng.random() < 0.2,
+            ))
+        Job.objects.bulk_create(jobs, batch_size=5000)
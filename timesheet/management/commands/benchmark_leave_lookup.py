@@ -0,0 +1,80 @@
+import random
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from timesheet.models import LeaveRecord
+from timesheet.utils import (
+    bulk_expand_leave_days, employees_on_leave, is_employee_on_leave, uses_leave_range_index,
+)
+
+from ._benchmark import create_bench_employees, median_ms
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the leave interval index against start_date/end_date range scans. "
+        "Runs inside a transaction that is rolled back, so no data is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=5000)
+        parser.add_argument("--years", type=int, default=5)
+        parser.add_argument("--leaves-per-year", type=int, default=8)
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        today = timezone.localdate()
+
+        with transaction.atomic():
+            employees = create_bench_employees("bench_leave", options["employees"])
+            leave_count, day_count = self._seed_leaves(employees, today, rng, options)
+            target = employees[len(employees) // 2]
+
+            results = [
+                ("is E on leave on D (index)", median_ms(
+                    lambda: is_employee_on_leave(target, today), options["iterations"])),
+                ("is E on leave on D (range scan)", median_ms(
+                    lambda: LeaveRecord.objects.filter(
+                        employee=target, start_date__lte=today, end_date__gte=today
+                    ).exists(), options["iterations"])),
+                ("who is on leave on D (index)", median_ms(
+                    lambda: employees_on_leave(today), options["iterations"])),
+                ("who is on leave on D (range scan)", median_ms(
+                    lambda: set(LeaveRecord.objects.filter(
+                        start_date__lte=today, end_date__gte=today
+                    ).values_list("employee_id", flat=True)), options["iterations"])),
+            ]
+
+            transaction.set_rollback(True)
+
+        backend = "daterange GiST" if uses_leave_range_index() else "LeaveDay"
+        self.stdout.write(f"{leave_count} leave records, {day_count} leave days, index: {backend}")
+        for label, ms in results:
+            self.stdout.write(f"{label:<36} {ms:8.3f} ms")
+
+    def _seed_leaves(self, employees, today, rng, options):
+        first_day = today - timedelta(days=365 * options["years"])
+        span = (today - first_day).days
+        leaves = []
+        for employee in employees:
+            for _ in range(options["leaves_per_year"] * options["years"]):
+                start = first_day + timedelta(days=rng.randrange(span))
+                length = rng.choice([1, 1, 1, 2, 3, 5, 10])
+                leaves.append(LeaveRecord(
+                    employee=employee,
+                    leave_type=rng.choice(["sick", "casual", "annual"]),
+                    start_date=start,
+                    end_date=start + timedelta(days=length - 1),
+                    total_days=length,
+                ))
+        LeaveRecord.objects.bulk_create(leaves, batch_size=5000)
+
+        # bulk_create skips the signal that normally expands LeaveDay rows
+        day_count = bulk_expand_leave_days(LeaveRecord.objects.filter(employee__in=employees))
+
+        return len(leaves), day_count
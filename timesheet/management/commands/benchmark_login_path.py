@@ -0,0 +1,79 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from timesheet.models import Attendance
+
+from ._benchmark import create_bench_employees, median_ms
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the morning login attendance lookup while attendance history grows. "
+        "Runs inside a transaction that is rolled back, so no data is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", default="10000,100000,1000000",
+            help="Comma separated history sizes (total attendance rows) to measure at",
+        )
+        parser.add_argument("--employees", type=int, default=500)
+        parser.add_argument("--iterations", type=int, default=200)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        sizes = sorted(int(s) for s in options["sizes"].split(","))
+
+        with transaction.atomic():
+            employees = create_bench_employees("bench_login", options["employees"])
+            target = employees[0]
+            today = timezone.localdate()
+
+            rows = []
+            created = 0
+            for size in sizes:
+                created = self._grow_history(
+                    employees, created, size, options["batch_size"]
+                )
+                rows.append((
+                    size,
+                    median_ms(lambda: Attendance.objects.filter(
+                        employee=target, work_date=today
+                    ).last(), options["iterations"]),
+                    median_ms(lambda: Attendance.objects.filter(
+                        employee=target, login_time__date=today
+                    ).last(), options["iterations"]),
+                ))
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{'rows':>10}  {'work_date p50 ms':>17}  {'login_time__date p50 ms':>24}")
+        for size, indexed, legacy in rows:
+            self.stdout.write(f"{size:>10}  {indexed:>17.3f}  {legacy:>24.3f}")
+
+    def _grow_history(self, employees, created, target_size, batch_size):
+        now = timezone.now()
+        per_day = len(employees)
+        batch = []
+        while created < target_size:
+            # Fill history backwards from yesterday, one row per employee per day
+            day_offset = created // per_day + 1
+            employee = employees[created % per_day]
+            login = now - timedelta(days=day_offset)
+            batch.append(Attendance(
+                employee=employee,
+                login_time=login,
+                logout_time=login + timedelta(hours=8),
+                duration=timedelta(hours=8),
+                work_date=Attendance.local_date(login),
+            ))
+            created += 1
+            if len(batch) >= batch_size:
+                Attendance.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Attendance.objects.bulk_create(batch)
+        return created
@@ -0,0 +1,115 @@
+import contextlib
+import io
+import random
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import Client
+from django.test.utils import override_settings
+
+from timesheet.authentication import ClaimsRefreshToken
+from timesheet.models import Employee
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a shift-start login storm against one worker with --threads request "
+        "threads, while attendance status requests keep arriving, and compare attendance "
+        "latency with login admission control off and on. Needs seeded data "
+        "(see seed_organisation) with a known password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="seed", help="Username prefix used by seed_organisation")
+        parser.add_argument("--password", default="seed-password")
+        parser.add_argument("--logins", type=int, default=500, help="Logins fired at once")
+        parser.add_argument("--threads", type=int, default=8, help="Request threads in the simulated worker")
+        parser.add_argument("--interval", type=float, default=0.05,
+                            help="Seconds between attendance status requests")
+        parser.add_argument("--baseline", type=int, default=100, help="Attendance requests without a storm")
+
+    def handle(self, *args, **options):
+        employees = list(Employee.objects.select_related("user").filter(
+            user__username__startswith=f"{options['prefix']}_"
+        ).order_by("id")[:200])
+        if not employees:
+            raise CommandError(f"No seeded data with prefix '{options['prefix']}'; run seed_organisation first")
+
+        tokens = [f"Bearer {ClaimsRefreshToken.for_user(e.user).access_token}" for e in employees]
+        logins = [
+            {"username": employees[i % len(employees)].user.username, "password": options["password"]}
+            for i in range(options["logins"])
+        ]
+
+        runs = []
+        with override_settings(ALLOWED_HOSTS=["testserver"]), contextlib.redirect_stdout(io.StringIO()):
+            runs.append(("baseline", self._run([], tokens, options)))
+            for label, enabled in (("storm, no admission", False), ("storm, admission", True)):
+                with override_settings(LOGIN_ADMISSION_CONTROL=enabled):
+                    runs.append((label, self._run(logins, tokens, options)))
+
+        self.stdout.write(
+            f"{options['logins']} logins, {options['threads']} request threads, "
+            f"attendance every {options['interval'] * 1000:.0f} ms"
+        )
+        self.stdout.write(
+            f"{'run':<20} {'att p50 ms':>11} {'att p95 ms':>11} {'att max ms':>11} "
+            f"{'login p50 s':>12} {'login max s':>12} {'429s':>6} {'errors':>7} {'wall s':>8}"
+        )
+        for label, (latencies, outcomes, wall) in runs:
+            waits = [elapsed for elapsed, _, _ in outcomes] or [0.0]
+            refused = sum(attempts - 1 for _, _, attempts in outcomes)
+            errors = sum(status >= 400 for _, status, _ in outcomes)
+            self.stdout.write(
+                f"{label:<20} {statistics.median(latencies):>11.1f} {self._p95(latencies):>11.1f} "
+                f"{max(latencies):>11.1f} {statistics.median(waits):>12.1f} {max(waits):>12.1f} "
+                f"{refused:>6} {errors:>7} {wall:>8.1f}"
+            )
+
+    def _p95(self, values):
+        if len(values) < 2:
+            return values[0]
+        return statistics.quantiles(values, n=20, method="inclusive")[18]
+
+    def _run(self, logins, tokens, options):
+        server = ThreadPoolExecutor(max_workers=options["threads"])
+
+        def call(method, path, submitted, **kwargs):
+            try:
+                response = getattr(Client(), method)(path, **kwargs)
+            finally:
+                connections.close_all()
+            # Latency includes time queued behind busy request threads
+            return (time.perf_counter() - submitted) * 1000, response
+
+        def employee_login(data):
+            # A client that honours Retry-After (with jitter) until it gets an answer
+            submitted, attempts = time.perf_counter(), 0
+            while True:
+                attempts += 1
+                _, response = server.submit(
+                    call, "post", "/api/login/", time.perf_counter(),
+                    data=data, content_type="application/json",
+                ).result()
+                if response.status_code != 429:
+                    return (time.perf_counter() - submitted), response.status_code, attempts
+                time.sleep(int(response["Retry-After"]) * random.uniform(1, 2))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, len(logins))) as clients:
+            login_futures = [clients.submit(employee_login, data) for data in logins]
+            attendance_futures = []
+            while len(attendance_futures) < options["baseline"] or not all(f.done() for f in login_futures):
+                token = tokens[len(attendance_futures) % len(tokens)]
+                attendance_futures.append(server.submit(
+                    call, "get", "/api/attendance/status/", time.perf_counter(),
+                    headers={"authorization": token},
+                ))
+                time.sleep(options["interval"])
+            latencies = [f.result()[0] for f in attendance_futures]
+            outcomes = [f.result() for f in login_futures]
+        server.shutdown()
+        return latencies, outcomes, time.perf_counter() - start
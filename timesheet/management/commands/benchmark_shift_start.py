@@ -0,0 +1,70 @@
+import contextlib
+import io
+from collections import defaultdict
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from ._benchmark import create_bench_employees
+
+DUMMY_CACHE = {"default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}}
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "shift"}}
+
+# The requests a technician's app makes when a shift starts
+SHIFT = [
+    ("get", "/api/profile/", None),
+    ("get", "/api/attendance/status/", None),
+    ("post", "/api/attendance/login/", {}),
+    ("get", "/api/attendance/status/", None),
+    ("get", "/api/profile/", None),
+    ("post", "/api/workentries/", {
+        "status": "on_duty", "start_time": "08:00", "end_time": "12:00",
+        "description": "Shift start", "ship_name": "Bench", "job_no": "B-1", "location": "Yard",
+    }),
+    ("get", "/api/profile/", None),
+    ("get", "/api/attendance/status/", None),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Simulate a shift start and report SQL queries per request with the "
+        "day state cache enabled and disabled. Data is rolled back afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=100)
+
+    def handle(self, *args, **options):
+        results = {}
+        for label, caches in (("no cache", DUMMY_CACHE), ("day state cache", LOCMEM_CACHE)):
+            with override_settings(CACHES=caches, ALLOWED_HOSTS=["testserver"]), transaction.atomic():
+                results[label] = self._run_shift(options["employees"])
+                transaction.set_rollback(True)
+
+        self.stdout.write(f"{'request':<32} {'no cache':>9} {'cached':>9}")
+        for key in results["no cache"]:
+            before = results["no cache"][key]
+            after = results["day state cache"][key]
+            self.stdout.write(f"{key:<32} {before:>9.2f} {after:>9.2f}")
+
+    def _run_shift(self, count):
+        employees = create_bench_employees("bench_shift", count)
+        queries = defaultdict(list)
+
+        for employee in employees:
+            client = APIClient()
+            for method, url, data in SHIFT:
+                # Fresh user per request so request.user.employee costs what it does in production
+                client.force_authenticate(User.objects.get(pk=employee.user_id))
+                # AttendanceStatusView prints debug lines; keep them out of the report
+                with CaptureQueriesContext(connection) as ctx, contextlib.redirect_stdout(io.StringIO()):
+                    response = getattr(client, method)(url, data, format="json")
+                if response.status_code >= 400:
+                    self.stderr.write(f"{method.upper()} {url}: {response.status_code} {response.content[:200]}")
+                queries[f"{method.upper()} {url}"].append(len(ctx.captured_queries))
+
+        return {key: sum(values) / len(values) for key, values in queries.items()}
@@ -0,0 +1,80 @@
+import time
+import uuid
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from timesheet.authentication import ClaimsRefreshToken, ClaimsTokenRefreshSerializer
+from timesheet.blacklist_filter import blacklist_filter
+
+from ._benchmark import create_bench_employees
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure /api/token/refresh/ throughput against a large token blacklist, with the "
+        "per-worker blacklist filter on and off. Runs inside a transaction that is rolled "
+        "back, so no data is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=2_000_000, help="Blacklisted tokens")
+        parser.add_argument("--expired-share", type=float, default=0.5,
+                            help="Share of blacklisted tokens that have already expired")
+        parser.add_argument("--refreshes", type=int, default=2000)
+        parser.add_argument("--batch-size", type=int, default=10000)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = create_bench_employees("bench_refresh", 1)[0].user
+            self._fill_blacklist(user, options)
+            tokens = [str(ClaimsRefreshToken.for_user(user)) for _ in range(50)]
+
+            blacklist_filter.reset()
+            start = time.perf_counter()
+            ClaimsRefreshToken(tokens[0])
+            build_ms = (time.perf_counter() - start) * 1000
+            bloom = blacklist_filter.bloom
+
+            rows = []
+            for label, enabled in (("database", False), ("filter", True)):
+                with override_settings(TOKEN_BLACKLIST_FILTER=enabled):
+                    rows.append((label, self._refreshes_per_second(tokens, options["refreshes"])))
+
+            transaction.set_rollback(True)
+        blacklist_filter.reset()
+
+        self.stdout.write(
+            f"{options['rows']} blacklisted tokens ({options['expired_share']:.0%} expired); "
+            f"filter built in {build_ms:.0f} ms: {bloom.count} entries, "
+            f"{len(bloom.bits) / 1024:.0f} KiB, {bloom.hashes} hashes"
+        )
+        self.stdout.write(f"{'blacklist check':<16} {'refreshes/s':>12}")
+        for label, rate in rows:
+            self.stdout.write(f"{label:<16} {rate:>12.0f}")
+
+    def _fill_blacklist(self, user, options):
+        now = timezone.now()
+        expired = int(options["rows"] * options["expired_share"])
+        size = options["batch_size"]
+        for offset in range(0, options["rows"], size):
+            outstanding = OutstandingToken.objects.bulk_create(
+                OutstandingToken(
+                    user=user, jti=uuid.uuid4().hex, token="",
+                    created_at=now - timedelta(days=1),
+                    expires_at=now + (timedelta(days=-1) if i < expired else timedelta(days=1)),
+                )
+                for i in range(offset, min(offset + size, options["rows"]))
+            )
+            BlacklistedToken.objects.bulk_create(BlacklistedToken(token=t) for t in outstanding)
+
+    def _refreshes_per_second(self, tokens, count):
+        start = time.perf_counter()
+        for i in range(count):
+            serializer = ClaimsTokenRefreshSerializer(data={"refresh": tokens[i % len(tokens)]})
+            serializer.is_valid(raise_exception=True)
+        return count / (time.perf_counter() - start)
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from timesheet.month_close import close_month, get_month_close, parse_month, reopen_month
+
+
+class Command(BaseCommand):
+    help = (
+        "Close a payroll month: snapshot every employee's monthly timesheet so the "
+        "monthly report and export stop changing. Run it again to take a fresh "
+        "snapshot of a month flagged needs_reclose, or pass --reopen to go back to live data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--month", required=True, help="Month to close (YYYY-MM)")
+        parser.add_argument("--reopen", action="store_true", help="Drop the month's close instead")
+        parser.add_argument("--batch-size", type=int, default=1000, help="Snapshots written per insert")
+
+    def handle(self, *args, **options):
+        try:
+            year, month = parse_month(options["month"])
+        except ValueError:
+            raise CommandError("--month must be YYYY-MM")
+
+        if options["reopen"]:
+            if not reopen_month(year, month):
+                raise CommandError(f"{options['month']} is not closed")
+            self.stdout.write(self.style.SUCCESS(f"Reopened {options['month']}"))
+            return
+
+        previous = get_month_close(year, month)
+        start = time.perf_counter()
+        close = close_month(year, month, batch_size=max(1, options["batch_size"]))
+        self.stdout.write(self.style.SUCCESS(
+            f"{'Re-closed' if previous else 'Closed'} {options['month']}: "
+            f"{close.employees} employee snapshot(s) in {time.perf_counter() - start:.1f}s"
+        ))
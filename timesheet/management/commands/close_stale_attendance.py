@@ -0,0 +1,37 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from timesheet.attendance_sessions import close_stale_attendance
+
+
+class Command(BaseCommand):
+    help = (
+        "Close attendance sessions left open on an earlier work day, in batches of one "
+        "UPDATE each, with logout time and duration computed in the database. Meant to "
+        "run on a schedule (e.g. nightly cron, shortly after midnight)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--policy", choices=["end_of_day", "max_hours"],
+                            help="Defaults to ATTENDANCE_AUTO_CLOSE_POLICY")
+        parser.add_argument("--hours", type=float,
+                            help="Session length for max_hours (defaults to ATTENDANCE_AUTO_CLOSE_HOURS)")
+        parser.add_argument("--before", type=date.fromisoformat,
+                            help="Close sessions from work days before this date (default: today)")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        try:
+            summary = close_stale_attendance(
+                before=options["before"], policy=options["policy"],
+                hours=options["hours"], batch_size=options["batch_size"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        for day, count in summary["days"].items():
+            self.stdout.write(f"{day}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Closed {summary['closed']} stale session(s) ({summary['policy']})"
+        ))
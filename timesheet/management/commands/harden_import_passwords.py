@@ -0,0 +1,48 @@
+import multiprocessing
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from timesheet.employee_import import wrap_import_hashes
+from timesheet.hashers import ImportPasswordHasher
+
+
+class Command(BaseCommand):
+    help = (
+        "Wrap the fast hashes left by earlier bulk imports, on accounts that have not logged in "
+        "since, in full-strength PBKDF2. Passwords keep working, and the next login upgrades "
+        "them to the default hasher as usual."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than-days", type=int, default=7,
+                            help="Only accounts created at least this many days ago")
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument("--processes", type=int, help="Hashing processes (default: one per CPU)")
+
+    def handle(self, *args, **options):
+        processes = options["processes"] or settings.EMPLOYEE_IMPORT_PROCESSES or multiprocessing.cpu_count()
+        stale = User.objects.filter(
+            password__startswith=f"{ImportPasswordHasher.algorithm}$",
+            date_joined__lte=timezone.now() - timedelta(days=options["older_than_days"]),
+        ).order_by("id")
+        start = time.perf_counter()
+        last_id = hardened = 0
+
+        while True:
+            batch = list(stale.filter(id__gt=last_id).values_list("id", "password")[:options["batch_size"]])
+            if not batch:
+                break
+            last_id = batch[-1][0]
+            wrapped = wrap_import_hashes([password for _, password in batch], processes)
+            for (user_id, password), new in zip(batch, wrapped):
+                # A login since the read has already upgraded the hash
+                hardened += User.objects.filter(id=user_id, password=password).update(password=new)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Hardened {hardened} import password hash(es) in {time.perf_counter() - start:.1f}s"
+        ))
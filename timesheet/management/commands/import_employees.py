@@ -0,0 +1,66 @@
+import json
+import multiprocessing
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from timesheet.employee_import import import_employees, parse_csv, parse_json
+
+
+class Command(BaseCommand):
+    help = (
+        "Create employees, their users and opening leave balances from a CSV or JSON file "
+        "with bulk inserts. Nothing is written if any row is invalid; --dry-run only "
+        "prints the validation report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file")
+        parser.add_argument("--format", choices=["csv", "json"], help="Defaults to the file extension")
+        parser.add_argument("--dry-run", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--processes", type=int, help="Password hashing processes (default: one per CPU)")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        fmt = options["format"] or path.suffix.lstrip(".").lower()
+        if fmt not in ("csv", "json"):
+            raise CommandError("Use --format csv or --format json")
+
+        try:
+            text = path.read_text(encoding="utf-8-sig")
+            rows = parse_csv(text) if fmt == "csv" else parse_json(json.loads(text))
+        except (OSError, ValueError) as exc:
+            raise CommandError(f"Could not read {path}: {exc}")
+
+        start = time.perf_counter()
+        report = import_employees(
+            rows, dry_run=options["dry_run"],
+            batch_size=options["batch_size"],
+            processes=options["processes"] or settings.EMPLOYEE_IMPORT_PROCESSES or multiprocessing.cpu_count(),
+        )
+        elapsed = time.perf_counter() - start
+
+        for item in report["errors"]:
+            details = "; ".join(self._messages(item["errors"]))
+            self.stdout.write(self.style.WARNING(f"row {item['row']}: {details}"))
+
+        if report["errors"]:
+            raise CommandError(f"{len(report['errors'])} of {report['rows']} row(s) invalid; nothing imported")
+        if options["dry_run"]:
+            self.stdout.write(self.style.SUCCESS(f"{report['rows']} row(s) valid (dry run, nothing written)"))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} employee(s) and {report['balances']} leave balance(s) "
+            f"in {elapsed:.1f}s"
+        ))
+
+    def _messages(self, errors, prefix=""):
+        # Balance errors nest one level deeper: {"balances": {"sick": [...]}}
+        for field, messages in errors.items():
+            if isinstance(messages, dict):
+                yield from self._messages(messages, f"{prefix}{field}.")
+            else:
+                yield f"{prefix}{field}: {' '.join(map(str, messages))}"
@@ -0,0 +1,46 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding tokens and their blacklist entries in small batches, "
+        "each in its own transaction, so no lock is held for long. Meant to run on a schedule "
+        "(e.g. nightly cron) instead of flushexpiredtokens, which deletes everything at once."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--sleep", type=float, default=0.0,
+                            help="Seconds to pause between batches")
+        parser.add_argument("--max-batches", type=int, help="Stop after this many batches")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now()
+        batches = deleted = 0
+
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            with transaction.atomic():
+                # Walks the expires_at index (migration 0019)
+                ids = list(
+                    OutstandingToken.objects.filter(expires_at__lte=cutoff)
+                    .order_by("expires_at")
+                    .values_list("id", flat=True)[:options["batch_size"]]
+                )
+                if not ids:
+                    break
+                BlacklistedToken.objects.filter(token_id__in=ids).delete()
+                deleted += OutstandingToken.objects.filter(id__in=ids).delete()[1].get(
+                    OutstandingToken._meta.label, 0
+                )
+            batches += 1
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {deleted} expired token(s) in {batches} batch(es)"
+        ))
@@ -0,0 +1,71 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from timesheet.models import DailyStats
+from timesheet.stats import COUNTER_FIELDS, compute_daily_stats, date_range
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild DailyStats rows from Attendance, Job, LeaveRecord and Employee "
+        "and report any counters that had drifted."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Single day (YYYY-MM-DD), defaults to today")
+        parser.add_argument("--start", help="First day of a range (YYYY-MM-DD)")
+        parser.add_argument("--end", help="Last day of a range (YYYY-MM-DD)")
+        parser.add_argument(
+            "--check", action="store_true",
+            help="Only compare stored counters with the source tables; exit non-zero on mismatch",
+        )
+
+    def handle(self, *args, **options):
+        days = self._days(options)
+        mismatches = 0
+
+        for day in days:
+            with transaction.atomic():
+                expected = compute_daily_stats(day)
+                stored = DailyStats.objects.select_for_update().filter(date=day).first()
+
+                if stored:
+                    diff = {
+                        field: (getattr(stored, field), expected[field])
+                        for field in COUNTER_FIELDS
+                        if getattr(stored, field) != expected[field]
+                    }
+                    if diff:
+                        mismatches += 1
+                        details = ", ".join(f"{f}: {old} -> {new}" for f, (old, new) in diff.items())
+                        self.stdout.write(self.style.WARNING(f"{day} mismatch ({details})"))
+                    else:
+                        self.stdout.write(f"{day} ok")
+
+                if not options["check"]:
+                    DailyStats.objects.update_or_create(date=day, defaults=expected)
+
+        if options["check"] and mismatches:
+            raise CommandError(f"{mismatches} day(s) out of sync")
+
+        action = "Checked" if options["check"] else "Rebuilt"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(days)} day(s)"))
+
+    def _days(self, options):
+        try:
+            if options["start"] or options["end"]:
+                if not (options["start"] and options["end"]):
+                    raise CommandError("--start and --end must be given together")
+                start = datetime.strptime(options["start"], "%Y-%m-%d").date()
+                end = datetime.strptime(options["end"], "%Y-%m-%d").date()
+                if start > end:
+                    raise CommandError("--start must not be after --end")
+                return date_range(start, end)
+            if options["date"]:
+                return [datetime.strptime(options["date"], "%Y-%m-%d").date()]
+        except ValueError:
+            raise CommandError("Dates must be YYYY-MM-DD")
+        return [timezone.localdate()]
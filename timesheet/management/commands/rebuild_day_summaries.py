@@ -0,0 +1,55 @@
+import time
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from timesheet.day_summary import rebuild_day_summaries
+from timesheet.stats import date_range
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild EmployeeDaySummary rows for a date range from Attendance, Job and "
+        "LeaveRecord, one transaction per chunk of days. Run once over the whole "
+        "history after deploying the table, and after bulk loads that skip signals."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--date", help="Single day (YYYY-MM-DD), defaults to today")
+        parser.add_argument("--start", help="First day of a range (YYYY-MM-DD)")
+        parser.add_argument("--end", help="Last day of a range (YYYY-MM-DD)")
+        parser.add_argument("--employee", type=int, action="append", help="Only this employee id (repeatable)")
+        parser.add_argument("--chunk-days", type=int, default=31, help="Days rebuilt per transaction")
+
+    def handle(self, *args, **options):
+        days = self._days(options)
+        chunk = max(1, options["chunk_days"])
+        start = time.perf_counter()
+        written = 0
+
+        for i in range(0, len(days), chunk):
+            part = days[i:i + chunk]
+            count = rebuild_day_summaries(part, options["employee"])
+            written += count
+            self.stdout.write(f"{part[0]} .. {part[-1]}: {count} row(s)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Rebuilt {written} summary row(s) over {len(days)} day(s) in {time.perf_counter() - start:.1f}s"
+        ))
+
+    def _days(self, options):
+        try:
+            if options["start"] or options["end"]:
+                if not (options["start"] and options["end"]):
+                    raise CommandError("--start and --end must be given together")
+                start = datetime.strptime(options["start"], "%Y-%m-%d").date()
+                end = datetime.strptime(options["end"], "%Y-%m-%d").date()
+                if start > end:
+                    raise CommandError("--start must not be after --end")
+                return date_range(start, end)
+            if options["date"]:
+                return [datetime.strptime(options["date"], "%Y-%m-%d").date()]
+        except ValueError:
+            raise CommandError("Dates must be YYYY-MM-DD")
+        return [timezone.localdate()]
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from timesheet.rollover import RolloverKeyConflict, run_rollover
+
+
+class Command(BaseCommand):
+    help = (
+        "Apply the year-end leave allocation policies to every leave balance in one "
+        "transaction. A key that was already applied is not applied again."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--year", type=int, help="Allocation year (defaults to the current year)")
+        parser.add_argument("--key", help="Idempotency key (defaults to rollover-<year>)")
+        parser.add_argument("--preview", action="store_true", help="Report the changes, then roll them back")
+
+    def handle(self, *args, **options):
+        year = options["year"] or timezone.localdate().year
+        try:
+            summary = run_rollover(year, options["key"] or f"rollover-{year}", preview=options["preview"])
+        except RolloverKeyConflict as exc:
+            raise CommandError(str(exc))
+
+        if summary.get("already_applied"):
+            self.stdout.write(self.style.WARNING(
+                f"Key {summary['key']} was already applied at {summary['applied_at']}; nothing changed"
+            ))
+
+        self.stdout.write(
+            f"{'cat':<4} {'leave type':<18} {'rollover':<14} {'updated':>8} {'prorated':>9} "
+            f"{'created':>8} {'allocated before':>17} {'after':>8}"
+        )
+        for row in summary.get("policies", []):
+            self.stdout.write(
+                f"{row['category']:<4} {row['leave_type']:<18} {row['rollover']:<14} {row['updated']:>8} "
+                f"{row['prorated']:>9} {row['created']:>8} {row['allocated_before']:>17} {row['allocated_after']:>8}"
+            )
+
+        if summary.get("preview"):
+            self.stdout.write(self.style.SUCCESS("Preview only; nothing written"))
+        elif not summary.get("already_applied"):
+            self.stdout.write(self.style.SUCCESS(f"Rollover {year} applied (key {summary['key']})"))
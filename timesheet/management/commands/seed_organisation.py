@@ -0,0 +1,227 @@
+import random
+from datetime import datetime, time, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.utils import timezone
+
+from timesheet.models import Attendance, DailyStats, Employee, Job, LeaveBalance, LeaveRecord
+from timesheet.day_summary import rebuild_day_summaries
+from timesheet.stats import date_range
+from timesheet.utils import bulk_expand_leave_days
+
+DAILY_LEAVE_TYPES = ["sick", "casual", "compoff", "restrictedholiday"]
+ALLOCATIONS = {
+    "sick": 12, "casual": 12, "annual": 24,
+    "compoff": 6, "lossofpay": 30, "restrictedholiday": 2,
+}
+SHIPS = ["Ocean Pearl", "Sea Falcon", "Northern Star", "Blue Marlin", "Coral Queen", "Harbor Light"]
+LOCATIONS = ["Kochi", "Mumbai", "Chennai", "Vizag", "Goa", "Mangalore"]
+TASKS = ["Engine overhaul", "Pump inspection", "Valve replacement", "Hull survey",
+         "Generator service", "Boiler calibration", "Shaft alignment", "Office work"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a synthetic organisation with bulk inserts: employees in categories A/B/C, "
+        "attendance and jobs for the last N days, daily and annual leave, leave balances "
+        "and an admin user. All seeded users share one password."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--employees", type=int, default=200)
+        parser.add_argument("--days", type=int, default=90, help="Days of history ending yesterday")
+        parser.add_argument("--jobs-per-day", type=int, default=3)
+        parser.add_argument("--categories", default="A=50,B=30,C=20",
+                            help="Category weights, e.g. A=50,B=30,C=20")
+        parser.add_argument("--attendance-rate", type=float, default=0.9,
+                            help="Chance an employee works on a given weekday")
+        parser.add_argument("--daily-leave-rate", type=float, default=0.03,
+                            help="Chance of a one-day leave instead of work")
+        parser.add_argument("--annual-leaves-per-year", type=int, default=2)
+        parser.add_argument("--prefix", default="seed")
+        parser.add_argument("--password", default="seed-password")
+        parser.add_argument("--seed", type=int, default=1)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(f"Users prefixed '{prefix}_' already exist; use another --prefix or a fresh database")
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.categories = self._parse_categories(options["categories"])
+
+        today = timezone.localdate()
+        first_day = today - timedelta(days=options["days"])
+        days = [first_day + timedelta(days=i) for i in range(options["days"])]
+
+        with transaction.atomic():
+            employees = self._create_people(options)
+            annual_days = self._create_annual_leave(employees, first_day, today, options)
+            counts = self._create_work(employees, days, annual_days, options)
+            self._create_balances(employees)
+
+            # auto_now_add stamps every bulk-created job with now; date them by their attendance
+            Job.objects.filter(attendance__employee__in=employees).update(created_at=Subquery(
+                Attendance.objects.filter(pk=OuterRef("attendance_id")).values("login_time")[:1]
+            ))
+
+            bulk_expand_leave_days(LeaveRecord.objects.filter(employee__in=employees))
+            # Rows for seeded days are rebuilt from source on next read
+            DailyStats.objects.filter(date__gte=first_day).delete()
+            # bulk_create skips the signals that maintain the day summaries
+            last_day = max(today, LeaveRecord.objects.filter(employee__in=employees).aggregate(
+                last=Max("end_date"))["last"] or today)
+            seeded_days = date_range(first_day, last_day)
+            for i in range(0, len(seeded_days), 31):
+                rebuild_day_summaries(seeded_days[i:i + 31])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(employees)} employees, {counts['attendance']} attendances, "
+            f"{counts['jobs']} jobs, {counts['leaves']} leave records over {len(days)} days. "
+            f"Admin: {prefix}_admin / {options['password']}"
+        ))
+
+    def _parse_categories(self, spec):
+        try:
+            weights = {k.strip(): int(v) for k, v in (part.split("=") for part in spec.split(","))}
+        except ValueError:
+            raise CommandError("--categories must look like A=50,B=30,C=20")
+        unknown = set(weights) - {code for code, _ in Employee.CATEGORY_CHOICES}
+        if unknown:
+            raise CommandError(f"Unknown categories: {', '.join(sorted(unknown))}")
+        return weights
+
+    def _create_people(self, options):
+        prefix = options["prefix"]
+        # Hash once: PBKDF2 per user would dominate seeding time
+        password = make_password(options["password"])
+
+        User.objects.create_superuser(f"{prefix}_admin", f"{prefix}_admin@example.com", options["password"])
+        User.objects.bulk_create(
+            (User(username=f"{prefix}_{i:05d}", password=password) for i in range(options["employees"])),
+            batch_size=self.batch_size,
+        )
+        users = User.objects.filter(username__startswith=f"{prefix}_").exclude(
+            username=f"{prefix}_admin"
+        ).order_by("username")
+
+        codes, weights = zip(*self.categories.items())
+        Employee.objects.bulk_create(
+            (Employee(user=user, emp_no=f"{prefix.upper()}-{i:05d}", mobile=f"9{i:09d}",
+                      category=self.rng.choices(codes, weights)[0])
+             for i, user in enumerate(users)),
+            batch_size=self.batch_size,
+        )
+        return list(Employee.objects.filter(user__in=users).order_by("id"))
+
+    def _create_annual_leave(self, employees, first_day, today, options):
+        """Multi-day annual leave; returns {employee_id: set of days on leave}"""
+        span = (today - first_day).days
+        per_employee = max(0, round(options["annual_leaves_per_year"] * span / 365))
+        leaves = []
+        on_leave = {}
+        for employee in employees:
+            for _ in range(per_employee):
+                start = first_day + timedelta(days=self.rng.randrange(max(1, span)))
+                # Ends by yesterday so today is free for live attendance
+                end = min(start + timedelta(days=self.rng.randint(3, 10) - 1), today - timedelta(days=1))
+                length = (end - start).days + 1
+                leaves.append(LeaveRecord(
+                    employee=employee, leave_type="annual", start_date=start, end_date=end,
+                    total_days=length, reason="Annual leave",
+                ))
+                on_leave.setdefault(employee.id, set()).update(start + timedelta(days=d) for d in range(length))
+        LeaveRecord.objects.bulk_create(leaves, batch_size=self.batch_size)
+        self.leave_usage = {(lv.employee_id, "annual"): 0 for lv in leaves}
+        for lv in leaves:
+            self.leave_usage[(lv.employee_id, "annual")] += lv.total_days
+        return on_leave
+
+    def _create_work(self, employees, days, annual_days, options):
+        tz = timezone.get_current_timezone()
+        counts = {"attendance": 0, "jobs": 0, "leaves": 0}
+
+        # Attendance first so jobs can reference the returned primary keys
+        plan = []
+        for day in days:
+            if day.weekday() == 6:
+                continue
+            for employee in employees:
+                if day in annual_days.get(employee.id, ()):
+                    continue
+                if self.rng.random() > options["attendance_rate"]:
+                    continue
+                plan.append((employee, day, self.rng.random() < options["daily_leave_rate"]))
+
+        for start in range(0, len(plan), self.batch_size):
+            chunk = plan[start:start + self.batch_size]
+            attendances = []
+            for employee, day, _ in chunk:
+                login = timezone.make_aware(datetime.combine(day, time(8, self.rng.randrange(60))), tz)
+                logout = login + timedelta(hours=8, minutes=self.rng.randrange(120))
+                attendances.append(Attendance(
+                    employee=employee, login_time=login, selected_time=login.time(),
+                    logout_time=logout, duration=logout - login, work_date=day,
+                ))
+            Attendance.objects.bulk_create(attendances)
+            if attendances and attendances[0].pk is None:
+                raise CommandError("Database did not return primary keys from bulk_create")
+
+            jobs = []
+            leaves = []
+            for attendance, (employee, day, takes_leave) in zip(attendances, chunk):
+                if takes_leave:
+                    leave_type = self.rng.choice(DAILY_LEAVE_TYPES)
+                    jobs.append(Job(attendance=attendance, status="leave", leave_type=leave_type,
+                                    leave_reason="Personal"))
+                    leaves.append(LeaveRecord(employee=employee, leave_type=leave_type, start_date=day,
+                                              end_date=day, total_days=1, reason="Personal"))
+                    key = (employee.id, leave_type)
+                    self.leave_usage[key] = self.leave_usage.get(key, 0) + 1
+                    continue
+                for n in range(options["jobs_per_day"]):
+                    jobs.append(self._job(attendance, employee, n))
+
+            Job.objects.bulk_create(jobs, batch_size=self.batch_size)
+            LeaveRecord.objects.bulk_create(leaves, batch_size=self.batch_size)
+            counts["attendance"] += len(attendances)
+            counts["jobs"] += len(jobs)
+            counts["leaves"] += len(leaves)
+
+        counts["leaves"] += sum(1 for key in self.leave_usage if key[1] == "annual")
+        return counts
+
+    def _job(self, attendance, employee, n):
+        start = time(8 + 3 * n % 12, 0)
+        end = time(min(23, 10 + 3 * n % 12), 30)
+        job = Job(
+            attendance=attendance, status="on_duty", start_time=start, end_time=end,
+            description=self.rng.choice(TASKS),
+        )
+        if employee.category == "A":
+            job.job_no = f"JB-{self.rng.randrange(100000):05d}"
+            job.ship_name = self.rng.choice(SHIPS)
+            job.location = self.rng.choice(LOCATIONS)
+            job.off_station = self.rng.random() < 0.2
+            job.local_site = self.rng.random() < 0.3
+            job.driv = self.rng.random() < 0.1
+            job.holiday_worked = attendance.work_date.weekday() == 5 and self.rng.random() < 0.5
+        return job
+
+    def _create_balances(self, employees):
+        LeaveBalance.objects.bulk_create(
+            (LeaveBalance(
+                employee=employee, leave_type=leave_type,
+                total_allocated=max(total, self.leave_usage.get((employee.id, leave_type), 0)),
+                used=self.leave_usage.get((employee.id, leave_type), 0),
+            )
+             for employee in employees
+             for leave_type, total in ALLOCATIONS.items()),
+            batch_size=self.batch_size,
+        )
@@ -0,0 +1,175 @@
+"""
+In-process request metrics with Prometheus text exposition.
+
+Each worker aggregates into plain dicts under a lock. When METRICS_DIR is set,
+workers periodically write a snapshot of their totals to their own file there,
+and the metrics endpoint sums every snapshot, so counters cover all gunicorn
+workers (including ones that have since exited) whichever worker serves the
+scrape. gunicorn.conf.py empties the directory when the server starts.
+"""
+import contextlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from bisect import bisect_left
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _empty_series():
+    # requests, latency sum, latency bucket counts, queries, db seconds,
+    # response bytes and a {status: count} map
+    return [0, 0.0, [0] * (len(LATENCY_BUCKETS) + 1), 0, 0.0, 0, {}]
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._series = {}
+        # Unique per process lifetime, so a recycled pid never overwrites a dead worker's file
+        self._worker_id = f"{self._pid}-{uuid.uuid4().hex[:8]}"
+        self._last_flush = 0.0
+
+    def observe(self, endpoint, method, status, seconds, queries, db_seconds, size):
+        with self._lock:
+            if os.getpid() != self._pid:
+                # Forked from a preloaded master: start from zero under our own file
+                self._reset()
+            series = self._series.get((endpoint, method))
+            if series is None:
+                series = self._series[(endpoint, method)] = _empty_series()
+            series[0] += 1
+            series[1] += seconds
+            series[2][bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            series[3] += queries
+            series[4] += db_seconds
+            series[5] += size
+            status = str(status)
+            series[6][status] = series[6].get(status, 0) + 1
+        self._maybe_flush()
+
+    def snapshot(self):
+        with self._lock:
+            return [
+                [endpoint, method, s[0], s[1], list(s[2]), s[3], s[4], s[5], dict(s[6])]
+                for (endpoint, method), s in self._series.items()
+            ]
+
+    def _maybe_flush(self, force=False):
+        directory = getattr(settings, "METRICS_DIR", None)
+        if not directory:
+            return
+        now = time.monotonic()
+        with self._lock:
+            # One thread per interval claims the flush
+            if not force and now - self._last_flush < settings.METRICS_FLUSH_INTERVAL:
+                return
+            self._last_flush = now
+        path = os.path.join(directory, f"{self._worker_id}.json")
+        tmp = None
+        try:
+            os.makedirs(directory, exist_ok=True)
+            # A temp file of its own, so a forced flush can't interleave with a timed one
+            fd, tmp = tempfile.mkstemp(dir=directory, prefix=f"{self._worker_id}.", suffix=".tmp")
+            with os.fdopen(fd, "w") as fh:
+                json.dump(self.snapshot(), fh)
+            # Readers never see a half written file
+            os.replace(tmp, path)
+        except OSError:
+            # Metrics must never fail the request; the next flush tries again
+            logger.warning("Could not write request metrics to %s", directory, exc_info=True)
+            if tmp:
+                with contextlib.suppress(OSError):
+                    os.remove(tmp)
+
+    def collect(self):
+        """Series summed over every worker's latest snapshot"""
+        directory = getattr(settings, "METRICS_DIR", None)
+        if not directory:
+            return self.snapshot()
+
+        self._maybe_flush(force=True)
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return self.snapshot()
+        merged = {}
+        for name in names:
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, name)) as fh:
+                    rows = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            for endpoint, method, count, total, buckets, queries, db_seconds, size, statuses in rows:
+                series = merged.get((endpoint, method))
+                if series is None:
+                    series = merged[(endpoint, method)] = _empty_series()
+                series[0] += count
+                series[1] += total
+                series[2] = [a + b for a, b in zip(series[2], buckets)]
+                series[3] += queries
+                series[4] += db_seconds
+                series[5] += size
+                for code, n in statuses.items():
+                    series[6][code] = series[6].get(code, 0) + n
+        return [
+            [endpoint, method, s[0], s[1], s[2], s[3], s[4], s[5], s[6]]
+            for (endpoint, method), s in merged.items()
+        ]
+
+
+registry = Registry()
+
+
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def render_prometheus(rows):
+    """Prometheus text format (version 0.0.4) for Registry.collect() rows"""
+    rows = sorted(rows, key=lambda row: (row[0], row[1]))
+    requests, duration, queries, db_time, size = [], [], [], [], []
+
+    for endpoint, method, count, total, buckets, query_count, db_seconds, response_bytes, statuses in rows:
+        labels = f'endpoint="{_label(endpoint)}",method="{_label(method)}"'
+        for code in sorted(statuses):
+            requests.append(f'timesheet_http_requests_total{{{labels},status="{code}"}} {statuses[code]}')
+
+        cumulative = 0
+        for bound, n in zip(LATENCY_BUCKETS, buckets):
+            cumulative += n
+            duration.append(f'timesheet_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+        duration.append(f'timesheet_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {count}')
+        duration.append(f"timesheet_http_request_duration_seconds_sum{{{labels}}} {total}")
+        duration.append(f"timesheet_http_request_duration_seconds_count{{{labels}}} {count}")
+
+        queries.append(f"timesheet_db_queries_total{{{labels}}} {query_count}")
+        db_time.append(f"timesheet_db_query_duration_seconds_total{{{labels}}} {db_seconds}")
+        size.append(f"timesheet_http_response_size_bytes_total{{{labels}}} {response_bytes}")
+
+    lines = []
+    for name, kind, help_text, samples in (
+        ("timesheet_http_requests_total", "counter", "Requests by endpoint, method and status", requests),
+        ("timesheet_http_request_duration_seconds", "histogram", "Request latency", duration),
+        ("timesheet_db_queries_total", "counter", "SQL queries run while serving requests", queries),
+        ("timesheet_db_query_duration_seconds_total", "counter", "Time spent in SQL while serving requests", db_time),
+        ("timesheet_http_response_size_bytes_total", "counter", "Response body bytes", size),
+    ):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,110 @@
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+
+from .metrics import registry
+
+
+class _QueryTimer:
+    """connection.execute_wrapper that counts queries and their wall time"""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+    def install(self):
+        stack = ExitStack()
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(self))
+        return stack
+
+
+class RequestMetricsMiddleware:
+    """
+    Record latency, SQL query count, SQL time and response size per resolved
+    URL name (or route when the pattern is unnamed). Exposed at /api/metrics/.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        timer = _QueryTimer()
+        start = time.perf_counter()
+        with timer.install():
+            response = self.get_response(request)
+
+        if response.streaming:
+            # Exports keep querying while the body streams; finish measuring at the end
+            response.streaming_content = self._stream(
+                request, response, response.streaming_content, timer, start
+            )
+            return response
+
+        self._record(request, response, timer, start, len(response.content))
+        return response
+
+    async def __acall__(self, request):
+        timer = _QueryTimer()
+        start = time.perf_counter()
+        with timer.install():
+            response = await self.get_response(request)
+
+        if response.streaming:
+            stream = self._astream if response.is_async else self._stream
+            response.streaming_content = stream(
+                request, response, response.streaming_content, timer, start
+            )
+            return response
+
+        self._record(request, response, timer, start, len(response.content))
+        return response
+
+    def _stream(self, request, response, content, timer, start):
+        size = 0
+        try:
+            with timer.install():
+                for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self._record(request, response, timer, start, size)
+
+    async def _astream(self, request, response, content, timer, start):
+        size = 0
+        try:
+            with timer.install():
+                async for chunk in content:
+                    size += len(chunk)
+                    yield chunk
+        finally:
+            self._record(request, response, timer, start, size)
+
+    def _record(self, request, response, timer, start, size):
+        match = request.resolver_match
+        if match is None:
+            endpoint = "<unresolved>"
+        else:
+            endpoint = match.url_name or match.route
+        registry.observe(
+            endpoint, request.method, response.status_code,
+            time.perf_counter() - start, timer.count, timer.seconds, size,
+        )
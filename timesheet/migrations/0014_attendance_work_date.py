@@ -0,0 +1,58 @@
+from django.db import migrations, models
+from django.utils import timezone
+
+
+BATCH_SIZE = 5000
+
+
+def backfill_work_date(apps, schema_editor):
+    Attendance = apps.get_model('timesheet', 'Attendance')
+    tz = timezone.get_default_timezone()
+
+    last_id = 0
+    while True:
+        batch = list(
+            Attendance.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .only('id', 'login_time')[:BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        for attendance in batch:
+            login = attendance.login_time
+            if timezone.is_naive(login):
+                login = timezone.make_aware(login, tz)
+            attendance.work_date = timezone.localtime(login, tz).date()
+
+        Attendance.objects.bulk_update(batch, ['work_date'])
+        last_id = batch[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet', '0013_alter_leavebalance_leave_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attendance',
+            name='work_date',
+            field=models.DateField(editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_work_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='attendance',
+            name='work_date',
+            field=models.DateField(editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['employee', 'work_date'], name='attendance_emp_workdate_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(fields=['work_date'], name='attendance_workdate_idx'),
+        ),
+    ]
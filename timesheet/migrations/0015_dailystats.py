@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet', '0014_attendance_work_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyStats',
+            fields=[
+                ('date', models.DateField(primary_key=True, serialize=False)),
+                ('total_employees', models.PositiveIntegerField(default=0)),
+                ('suspended_employees', models.PositiveIntegerField(default=0)),
+                ('attendance_coverage', models.PositiveIntegerField(default=0)),
+                ('total_work_entries', models.PositiveIntegerField(default=0)),
+                ('total_leave_today', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
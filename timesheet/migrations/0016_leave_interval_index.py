@@ -0,0 +1,69 @@
+# Generated by Django 5.2.7 on 2026-10-17 19:57
+
+import django.db.models.deletion
+from datetime import timedelta
+from django.db import migrations, models
+
+
+PERIOD_INDEX_SQL = [
+    "CREATE EXTENSION IF NOT EXISTS btree_gist",
+    "CREATE INDEX IF NOT EXISTS leaverecord_period_gist ON timesheet_leaverecord "
+    "USING gist (employee_id, daterange(start_date, end_date, '[]')) "
+    "WHERE start_date IS NOT NULL AND end_date IS NOT NULL",
+]
+
+
+def create_period_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for sql in PERIOD_INDEX_SQL:
+        schema_editor.execute(sql)
+
+
+def drop_period_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute("DROP INDEX IF EXISTS leaverecord_period_gist")
+
+
+def expand_leave_days(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        return
+    LeaveRecord = apps.get_model('timesheet', 'LeaveRecord')
+    LeaveDay = apps.get_model('timesheet', 'LeaveDay')
+
+    batch = []
+    leaves = LeaveRecord.objects.filter(
+        start_date__isnull=False, end_date__isnull=False
+    ).values_list('id', 'employee_id', 'start_date', 'end_date')
+    for leave_id, employee_id, start, end in leaves.iterator():
+        for offset in range((end - start).days + 1):
+            batch.append(LeaveDay(leave_id=leave_id, employee_id=employee_id, date=start + timedelta(days=offset)))
+        if len(batch) >= 5000:
+            LeaveDay.objects.bulk_create(batch)
+            batch = []
+    LeaveDay.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet', '0015_dailystats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveDay',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='leave_days', to='timesheet.employee')),
+                ('leave', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='days', to='timesheet.leaverecord')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['employee', 'date'], name='leaveday_emp_date_idx'), models.Index(fields=['date'], name='leaveday_date_idx')],
+            },
+        ),
+        migrations.RunPython(expand_leave_days, migrations.RunPython.noop),
+        migrations.RunPython(create_period_index, drop_period_index),
+    ]
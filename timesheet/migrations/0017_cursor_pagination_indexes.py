@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet', '0016_leave_interval_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['created_at', 'id'], name='job_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='leaverecord',
+            index=models.Index(fields=['created_at', 'id'], name='leaverecord_created_idx'),
+        ),
+    ]
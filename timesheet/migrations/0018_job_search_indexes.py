@@ -0,0 +1,88 @@
+from django.db import migrations
+
+
+# Postgres: trigram GIN indexes matching Django's icontains expression
+# (UPPER(col::text) LIKE UPPER(%s)) plus a full-text index on description.
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS job_job_no_trgm ON timesheet_job USING gin (UPPER(job_no::text) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS job_ship_name_trgm ON timesheet_job USING gin (UPPER(ship_name::text) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS job_location_trgm ON timesheet_job USING gin (UPPER(location::text) gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS job_description_fts ON timesheet_job "
+    "USING gin (to_tsvector('simple'::regconfig, COALESCE(description::text, '')))",
+]
+
+POSTGRES_REVERSE = [
+    "DROP INDEX IF EXISTS job_job_no_trgm",
+    "DROP INDEX IF EXISTS job_ship_name_trgm",
+    "DROP INDEX IF EXISTS job_location_trgm",
+    "DROP INDEX IF EXISTS job_description_fts",
+]
+
+# SQLite: external-content FTS5 table over the same columns, kept in sync by triggers.
+# SQLite drops the triggers when a migration rebuilds timesheet_job (most AlterField
+# and RemoveField operations do), so such a migration must run SQLITE_FORWARD again.
+# JobSearchTests would catch a search index that stopped following writes.
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS timesheet_job_fts USING fts5("
+    "job_no, ship_name, location, description, "
+    "content='timesheet_job', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS timesheet_job_fts_ai AFTER INSERT ON timesheet_job BEGIN "
+    "INSERT INTO timesheet_job_fts(rowid, job_no, ship_name, location, description) "
+    "VALUES (new.id, new.job_no, new.ship_name, new.location, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS timesheet_job_fts_ad AFTER DELETE ON timesheet_job BEGIN "
+    "INSERT INTO timesheet_job_fts(timesheet_job_fts, rowid, job_no, ship_name, location, description) "
+    "VALUES ('delete', old.id, old.job_no, old.ship_name, old.location, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS timesheet_job_fts_au AFTER UPDATE ON timesheet_job BEGIN "
+    "INSERT INTO timesheet_job_fts(timesheet_job_fts, rowid, job_no, ship_name, location, description) "
+    "VALUES ('delete', old.id, old.job_no, old.ship_name, old.location, old.description); "
+    "INSERT INTO timesheet_job_fts(rowid, job_no, ship_name, location, description) "
+    "VALUES (new.id, new.job_no, new.ship_name, new.location, new.description); END",
+    "INSERT INTO timesheet_job_fts(timesheet_job_fts) VALUES ('rebuild')",
+]
+
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS timesheet_job_fts_ai",
+    "DROP TRIGGER IF EXISTS timesheet_job_fts_ad",
+    "DROP TRIGGER IF EXISTS timesheet_job_fts_au",
+    "DROP TABLE IF EXISTS timesheet_job_fts",
+]
+
+
+def sqlite_has_trigram_fts(connection):
+    # The trigram tokenizer arrived in SQLite 3.34
+    if connection.Database.sqlite_version_info < (3, 34):
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("PRAGMA compile_options")
+        return any(row[0] == "ENABLE_FTS5" for row in cursor.fetchall())
+
+
+def create_search_indexes(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == "postgresql":
+        statements = POSTGRES_FORWARD
+    elif connection.vendor == "sqlite" and sqlite_has_trigram_fts(connection):
+        statements = SQLITE_FORWARD
+    else:
+        return
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_search_indexes(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"postgresql": POSTGRES_REVERSE, "sqlite": SQLITE_REVERSE}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet', '0017_cursor_pagination_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
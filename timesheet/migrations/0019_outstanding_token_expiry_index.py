@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+# prune_token_blacklist and the blacklist filter select by expiry; simplejwt does not
+# index expires_at and its models belong to another app, so the index is plain SQL.
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet', '0018_job_search_indexes'),
+        ('token_blacklist', '0013_alter_blacklistedtoken_options_and_more'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS outstandingtoken_expires_idx "
+            "ON token_blacklist_outstandingtoken (expires_at)",
+            "DROP INDEX IF EXISTS outstandingtoken_expires_idx",
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-17 20:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet', '0019_outstanding_token_expiry_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaveAllocationPolicy',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('category', models.CharField(choices=[('A', 'Supervisor / Technician'), ('B', 'Office Staff'), ('C', 'Manager / Coordinator / Marketing')], max_length=1)),
+                ('leave_type', models.CharField(choices=[('sick', 'Sick'), ('casual', 'Casual'), ('annual', 'Annual Leave'), ('compoff', 'Comp-Off'), ('lossofpay', 'Loss of Pay'), ('restrictedholiday', 'Restricted Holiday')], max_length=50)),
+                ('annual_allocation', models.PositiveIntegerField(default=0)),
+                ('rollover', models.CharField(choices=[('reset', 'Reset to the annual allocation'), ('carry_forward', 'Carry forward unused days')], default='reset', max_length=20)),
+                ('carry_forward_cap', models.PositiveIntegerField(blank=True, null=True)),
+                ('prorate_joiners', models.BooleanField(default=True)),
+            ],
+            options={
+                'ordering': ['category', 'leave_type'],
+                'unique_together': {('category', 'leave_type')},
+            },
+        ),
+        migrations.CreateModel(
+            name='LeaveRollover',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=100, unique=True)),
+                ('year', models.PositiveIntegerField()),
+                ('applied_at', models.DateTimeField(auto_now_add=True)),
+                ('summary', models.JSONField(default=dict)),
+                ('applied_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+    ]
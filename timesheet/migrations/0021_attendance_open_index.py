@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet', '0020_leave_rollover'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendance',
+            index=models.Index(condition=models.Q(('logout_time__isnull', True)), fields=['employee', '-id'], name='attendance_open_idx'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet', '0021_attendance_open_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmployeeDaySummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('present', 'Present'), ('on_duty', 'On Duty'), ('leave', 'Leave')], max_length=20)),
+                ('duration', models.DurationField(blank=True, null=True)),
+                ('job_no', models.TextField(blank=True, default='')),
+                ('job_details', models.TextField(blank=True, default='')),
+                ('holiday_worked', models.BooleanField(default=False)),
+                ('off_station', models.BooleanField(default=False)),
+                ('local_site', models.BooleanField(default=False)),
+                ('driv', models.BooleanField(default=False)),
+                ('work_entries', models.PositiveIntegerField(default=0)),
+                ('leave_type', models.CharField(blank=True, max_length=50, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_summaries', to='timesheet.employee')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='daysummary_date_idx')],
+                'constraints': [models.UniqueConstraint(fields=('employee', 'date'), name='daysummary_emp_date_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-17 21:16
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('timesheet', '0022_employee_day_summary'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthClose',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.PositiveIntegerField()),
+                ('month', models.PositiveSmallIntegerField()),
+                ('closed_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('employees', models.PositiveIntegerField(default=0)),
+                ('needs_reclose', models.BooleanField(default=False)),
+                ('closed_by', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='MonthlyTimesheetSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('days', models.JSONField(default=dict)),
+                ('employee', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='month_snapshots', to='timesheet.employee')),
+                ('month_close', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='snapshots', to='timesheet.monthclose')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='monthclose',
+            constraint=models.UniqueConstraint(fields=('year', 'month'), name='monthclose_year_month_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='monthlytimesheetsnapshot',
+            constraint=models.UniqueConstraint(fields=('month_close', 'employee'), name='monthsnapshot_close_emp_uniq'),
+        ),
+    ]
@@ -1,7 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
-from datetime import date
 
 class Employee(models.Model):
     CATEGORY_CHOICES = [
@@ -31,8 +30,31 @@ class Attendance(models.Model):
     selected_time = models.TimeField(null=True, blank=True)
     logout_time = models.DateTimeField(null=True, blank=True)
     duration = models.DurationField(null=True, blank=True)
+    # Local calendar day of login_time, stored so lookups don't cast the column
+    work_date = models.DateField(editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['employee', 'work_date'], name='attendance_emp_workdate_idx'),
+            models.Index(fields=['work_date'], name='attendance_workdate_idx'),
+            # Only open sessions: the logout lookup reads one entry per employee
+            models.Index(
+                fields=['employee', '-id'], name='attendance_open_idx',
+                condition=models.Q(logout_time__isnull=True),
+            ),
+        ]
+
+    @staticmethod
+    def local_date(value):
+        """Calendar day of a datetime in the configured TIME_ZONE"""
+        if timezone.is_naive(value):
+            value = timezone.make_aware(value)
+        return timezone.localtime(value, timezone.get_default_timezone()).date()
 
     def save(self, *args, **kwargs):
+        if self.login_time:
+            self.work_date = self.local_date(self.login_time)
+
         # Calculate duration safely with timezone-aware datetimes
         if self.logout_time and self.login_time:
             login = self.login_time
@@ -51,6 +73,9 @@ class Attendance(models.Model):
     
     @property
     def computed_duration(self):
+        # The stored column (set by the database on logout) is the source of truth
+        if self.duration is not None:
+            return self.duration
         if self.logout_time and self.login_time:
             return self.logout_time - self.login_time
         return None
@@ -94,6 +119,11 @@ class Job(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='job_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.attendance.employee.user.username} - {self.status}"
 
@@ -117,10 +147,34 @@ class LeaveRecord(models.Model):
     reason = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='leaverecord_created_idx'),
+        ]
+
     def __str__(self):
         return f"{self.employee.user.username} {self.leave_type} ({self.start_date} → {self.end_date})"
 
 
+class LeaveDay(models.Model):
+    """
+    One row per calendar day covered by a LeaveRecord. Used as the leave interval
+    index on databases without range types; Postgres uses a GiST index instead.
+    """
+    leave = models.ForeignKey(LeaveRecord, on_delete=models.CASCADE, related_name='days')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='leave_days')
+    date = models.DateField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['employee', 'date'], name='leaveday_emp_date_idx'),
+            models.Index(fields=['date'], name='leaveday_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} on leave {self.date}"
+
+
 class LeaveBalance(models.Model):
     LEAVE_TYPES = [
         ('sick', 'Sick'),
@@ -146,3 +200,125 @@ class LeaveBalance(models.Model):
     def __str__(self):
         return f"{self.employee.user.username} - {self.leave_type}: {self.remaining()} left"
 
+
+
+class LeaveAllocationPolicy(models.Model):
+    """How one category's balance of one leave type is set at year-end rollover"""
+    ROLLOVER_CHOICES = [
+        ('reset', 'Reset to the annual allocation'),
+        ('carry_forward', 'Carry forward unused days'),
+    ]
+
+    category = models.CharField(max_length=1, choices=Employee.CATEGORY_CHOICES)
+    leave_type = models.CharField(max_length=50, choices=LeaveBalance.LEAVE_TYPES)
+    annual_allocation = models.PositiveIntegerField(default=0)
+    rollover = models.CharField(max_length=20, choices=ROLLOVER_CHOICES, default='reset')
+    # Most unused days carried into the new year; empty means no cap
+    carry_forward_cap = models.PositiveIntegerField(null=True, blank=True)
+    # Employees who join during the year get the allocation for their remaining months
+    prorate_joiners = models.BooleanField(default=True)
+
+    class Meta:
+        unique_together = ('category', 'leave_type')
+        ordering = ['category', 'leave_type']
+
+    def __str__(self):
+        return f"{self.category} {self.leave_type}: {self.annual_allocation} ({self.rollover})"
+
+
+class LeaveRollover(models.Model):
+    """One applied rollover; the unique key makes a retried run a no-op"""
+    key = models.CharField(max_length=100, unique=True)
+    year = models.PositiveIntegerField()
+    applied_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    applied_at = models.DateTimeField(auto_now_add=True)
+    summary = models.JSONField(default=dict)
+
+    def __str__(self):
+        return f"Rollover {self.year} ({self.key})"
+
+class DailyStats(models.Model):
+    """Per-day dashboard counters, kept in step with the writes that change them"""
+    date = models.DateField(primary_key=True)
+    total_employees = models.PositiveIntegerField(default=0)
+    suspended_employees = models.PositiveIntegerField(default=0)
+    attendance_coverage = models.PositiveIntegerField(default=0)
+    total_work_entries = models.PositiveIntegerField(default=0)
+    total_leave_today = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Stats {self.date}"
+
+
+class EmployeeDaySummary(models.Model):
+    """
+    What one employee did on one day, rolled up from Attendance, Job and
+    LeaveRecord (timesheet.day_summary) so reports read one indexed range.
+    """
+    STATUS_CHOICES = [
+        ('present', 'Present'),
+        ('on_duty', 'On Duty'),
+        ('leave', 'Leave'),
+    ]
+
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='day_summaries')
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES)
+    # Sum of the day's closed attendance sessions
+    duration = models.DurationField(null=True, blank=True)
+    job_no = models.TextField(blank=True, default='')
+    job_details = models.TextField(blank=True, default='')
+    holiday_worked = models.BooleanField(default=False)
+    off_station = models.BooleanField(default=False)
+    local_site = models.BooleanField(default=False)
+    driv = models.BooleanField(default=False)
+    work_entries = models.PositiveIntegerField(default=0)
+    # From a LeaveRecord covering the day, else from a leave job
+    leave_type = models.CharField(max_length=50, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['employee', 'date'], name='daysummary_emp_date_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['date'], name='daysummary_date_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.employee_id} {self.date} {self.status}"
+
+
+class MonthClose(models.Model):
+    """A payroll-closed month: monthly timesheets for it are served from its snapshots"""
+    year = models.PositiveIntegerField()
+    month = models.PositiveSmallIntegerField()
+    closed_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    closed_at = models.DateTimeField(default=timezone.now)
+    employees = models.PositiveIntegerField(default=0)
+    # Set by any write dated in the month after it closed; cleared by closing it again
+    needs_reclose = models.BooleanField(default=False)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['year', 'month'], name='monthclose_year_month_uniq'),
+        ]
+
+    def __str__(self):
+        return f"Closed {self.year:04d}-{self.month:02d}"
+
+
+class MonthlyTimesheetSnapshot(models.Model):
+    month_close = models.ForeignKey(MonthClose, on_delete=models.CASCADE, related_name='snapshots')
+    employee = models.ForeignKey(Employee, on_delete=models.CASCADE, related_name='month_snapshots')
+    # Only the days (and fields) that differ from a blank day, keyed by day number
+    days = models.JSONField(default=dict)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['month_close', 'employee'], name='monthsnapshot_close_emp_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.month_close} {self.employee_id}"
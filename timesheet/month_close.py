@@ -0,0 +1,139 @@
+"""
+Month close for payroll.
+
+close_month() computes every employee's monthly timesheet in one pass (the
+same three merged cursors as the export) and stores it as compact snapshots:
+only the days, and the fields of those days, that differ from a blank day.
+A closed month is then served from the snapshots by monthly_timesheet and
+the monthly export, so later edits cannot change what payroll saw.
+
+Edits dated in a closed month are still accepted, but flag the month
+needs_reclose. Closing it again takes a fresh snapshot; reopen_month()
+drops the snapshots and the month is computed live again. The set of closed
+months is cached, so writes to open months pay nothing for the check.
+"""
+from datetime import date
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import MonthClose, MonthlyTimesheetSnapshot
+from .timesheets import blank_month, iter_monthly_timesheets
+from .versions import bump, month_scope
+
+CLOSED_MONTHS_KEY = "month_close:closed"
+
+
+def parse_month(value):
+    """(year, month) from "YYYY-MM"; raises ValueError"""
+    year, month = map(int, str(value).split("-"))
+    date(year, month, 1)
+    return year, month
+
+
+def closed_months():
+    """{(year, month)} of every closed month, from the cache when possible"""
+    months = cache.get(CLOSED_MONTHS_KEY)
+    if months is None:
+        months = set(MonthClose.objects.values_list("year", "month"))
+        cache.set(CLOSED_MONTHS_KEY, months, None)
+    return months
+
+
+def _closed_months_changed():
+    cache.delete(CLOSED_MONTHS_KEY)
+    transaction.on_commit(lambda: cache.delete(CLOSED_MONTHS_KEY))
+
+
+def get_month_close(year, month):
+    """The MonthClose of a closed month, or None (without a query for open months)"""
+    if (year, month) not in closed_months():
+        return None
+    return MonthClose.objects.filter(year=year, month=month).first()
+
+
+# 🔹 Snapshots
+
+def _compact(year, month, rows):
+    blank = blank_month(year, month)
+    days = {}
+    for row in rows:
+        changed = {key: value for key, value in row.items() if value != blank[row["date"]][key]}
+        if changed:
+            days[str(row["date"])] = changed
+    return days
+
+
+def _expand(year, month, days):
+    data = blank_month(year, month)
+    for day, changed in days.items():
+        data[int(day)].update(changed)
+    return data
+
+
+def month_snapshot(close, employee_id):
+    """fill_month()-shaped rows of one employee, or None if the employee postdates the close"""
+    days = MonthlyTimesheetSnapshot.objects.filter(
+        month_close=close, employee_id=employee_id
+    ).values_list("days", flat=True).first()
+    if days is None:
+        return None
+    return _expand(close.year, close.month, days)
+
+
+def iter_closed_month(close, chunk_size=2000):
+    """(employee, rows) for every snapshot, like iter_monthly_timesheets()"""
+    snapshots = close.snapshots.select_related("employee__user").order_by("employee_id")
+    for snapshot in snapshots.iterator(chunk_size=chunk_size):
+        yield snapshot.employee, _expand(close.year, close.month, snapshot.days).values()
+
+
+# 🔹 Closing and reopening
+
+def close_month(year, month, user=None, batch_size=1000):
+    """Snapshot every employee's month; closing a closed month takes a fresh snapshot"""
+    with transaction.atomic():
+        close, _ = MonthClose.objects.select_for_update().get_or_create(year=year, month=month)
+        close.snapshots.all().delete()
+
+        batch, count = [], 0
+        for employee, rows in iter_monthly_timesheets(year, month):
+            batch.append(MonthlyTimesheetSnapshot(
+                month_close=close, employee=employee, days=_compact(year, month, rows),
+            ))
+            if len(batch) >= batch_size:
+                MonthlyTimesheetSnapshot.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        MonthlyTimesheetSnapshot.objects.bulk_create(batch)
+
+        close.employees = count + len(batch)
+        close.closed_by = user
+        close.closed_at = timezone.now()
+        close.needs_reclose = False
+        close.save()
+        _closed_months_changed()
+        bump([month_scope(year, month)])
+    return close
+
+
+def reopen_month(year, month):
+    """Drop a month's close and snapshots; returns False if it was not closed"""
+    with transaction.atomic():
+        deleted, _ = MonthClose.objects.filter(year=year, month=month).delete()
+        _closed_months_changed()
+        bump([month_scope(year, month)])
+    return bool(deleted)
+
+
+def days_changed(days):
+    """Flag closed months touched by a write on these days"""
+    touched = {(day.year, day.month) for day in days if day} & closed_months()
+    if not touched:
+        return
+    query = Q()
+    for year, month in touched:
+        query |= Q(year=year, month=month)
+    MonthClose.objects.filter(query, needs_reclose=False).update(needs_reclose=True)
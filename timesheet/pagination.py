@@ -0,0 +1,28 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class TimesheetCursorPagination(CursorPagination):
+    """
+    Keyset pagination: each page is an indexed range read from the previous
+    cursor, so deep pages cost the same as the first one.
+    """
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
+    ordering = ("-id",)
+
+
+class CreatedAtCursorPagination(TimesheetCursorPagination):
+    ordering = ("-created_at", "-id")
+
+
+class LoginTimeCursorPagination(TimesheetCursorPagination):
+    ordering = ("-login_time", "-id")
+
+
+class SearchPagination(PageNumberPagination):
+    """Ranked results have no stable key to page on, so search pages by number"""
+    page_size = settings.API_PAGE_SIZE
+    page_size_query_param = "page_size"
+    max_page_size = settings.API_MAX_PAGE_SIZE
@@ -0,0 +1,110 @@
+"""
+Frozen snapshots of past daywise reports.
+
+A day before today rarely changes, so its report rows are cached per
+(date, employee, job_no) together with an ETag. All snapshots of one date live
+under one cache key, and a read is one get_many of that key plus the
+generation key, which changes when a username changes (usernames appear in
+the rows).
+
+Writes that touch a date (Job, Attendance and LeaveRecord signals, and the
+bulk work-entry view) replace the date's entry with an empty one under a new
+version, now and again on commit. A report computed while that happened
+carries the old version and is not stored. Today and later dates are always
+computed live.
+"""
+import hashlib
+import json
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.utils.encoders import JSONEncoder
+
+GENERATION_KEY = "daywise:generation"
+
+
+def _day_key(day):
+    return f"daywise:{day.isoformat()}"
+
+
+def _filter_key(employee_id, job_no):
+    return f"{employee_id or ''}|{job_no or ''}"
+
+
+def is_frozen(day):
+    return day < timezone.localdate()
+
+
+def etag_for(rows):
+    # DRF's encoder, so times hash exactly as they render
+    body = json.dumps(rows, cls=JSONEncoder, sort_keys=True).encode()
+    return f'"{hashlib.md5(body, usedforsecurity=False).hexdigest()}"'
+
+
+def daywise_snapshot(day, employee_id, job_no, build):
+    """(etag, rows) for the report; build() computes the rows on a miss or for a live day"""
+    if not is_frozen(day):
+        rows = build()
+        return etag_for(rows), rows
+
+    filter_key = _filter_key(employee_id, job_no)
+    cached = cache.get_many([GENERATION_KEY, _day_key(day)])
+    generation = cached.get(GENERATION_KEY)
+    entry = cached.get(_day_key(day))
+    if entry and generation and entry["generation"] == generation and filter_key in entry["reports"]:
+        return entry["reports"][filter_key]
+
+    rows = build()
+    snapshot = (etag_for(rows), rows)
+    _store(day, filter_key, snapshot, generation, entry and entry["version"])
+    return snapshot
+
+
+def _store(day, filter_key, snapshot, generation, version):
+    if generation is None:
+        cache.add(GENERATION_KEY, uuid.uuid4().hex, None)
+        generation = cache.get(GENERATION_KEY)
+
+    # Skip the store if a write (or a username change) landed while the rows were built
+    current = cache.get_many([GENERATION_KEY, _day_key(day)])
+    entry = current.get(_day_key(day))
+    if current.get(GENERATION_KEY) != generation or (entry and entry["version"] != version):
+        return
+
+    reports = dict(entry["reports"]) if entry and entry["generation"] == generation else {}
+    reports[filter_key] = snapshot
+    # Oldest filter combinations go first once a date holds too many
+    while len(reports) > settings.DAYWISE_CACHE_FILTERS:
+        reports.pop(next(iter(reports)))
+    cache.set(
+        _day_key(day),
+        {"version": version or uuid.uuid4().hex, "generation": generation, "reports": reports},
+        settings.DAYWISE_CACHE_TIMEOUT,
+    )
+
+
+def invalidate_daywise(days):
+    """Empty the snapshots of these past days now and again on commit"""
+    def empty():
+        frozen = [day for day in days if day and is_frozen(day)]
+        if frozen:
+            cache.set_many(
+                {_day_key(day): {"version": uuid.uuid4().hex, "generation": None, "reports": {}} for day in frozen},
+                settings.DAYWISE_CACHE_TIMEOUT,
+            )
+
+    days = set(days)
+    empty()
+    transaction.on_commit(empty)
+
+
+def usernames_changed():
+    """Retire every snapshot at once, now and again on commit"""
+    def retire():
+        cache.set(GENERATION_KEY, uuid.uuid4().hex, None)
+
+    retire()
+    transaction.on_commit(retire)
@@ -0,0 +1,117 @@
+from .models import EmployeeDaySummary, Job
+from .timesheets import MONTH_FLAGS, summary_description, worked_on_labels
+from .utils import leave_records_on
+
+
+# 🔹 Day-wise report, shared by the sync and async views
+
+def daywise_leaves(report_date, employee_id=None):
+    leave_qs = leave_records_on(report_date).select_related("employee__user")
+    if employee_id:
+        leave_qs = leave_qs.filter(employee_id=employee_id)
+    return leave_qs
+
+
+def daywise_jobs(report_date, employee_id=None, job_no=None):
+    filters = {"attendance__work_date": report_date}
+
+    if employee_id:
+        filters["attendance__employee_id"] = employee_id
+
+    if job_no:
+        filters["job_no__icontains"] = job_no
+
+    return Job.objects.filter(**filters).select_related(
+        "attendance__employee__user"
+    )
+
+
+def daywise_rows(leaves, jobs):
+    """Report rows: leave records first, then jobs of employees not on leave"""
+    data = []
+
+    # 🔹 STEP 1: Annual leaves for this day
+    annual_leave_employees = set()
+
+    for leave in leaves:
+        annual_leave_employees.add(leave.employee_id)
+
+        description = "Annual Leave"
+        if leave.reason:
+            description += f" - {leave.reason}"
+
+        data.append({
+            "employee": leave.employee.user.username,
+            "status": "leave",
+            "description": description,
+            "job_no": "-",
+            "ship_name": "-",
+            "location": "-",
+            "worked_on": "-",
+            "start_time": "-",
+            "end_time": "-",
+        })
+
+    # 🔹 STEP 2: Jobs (excluding employees on annual leave)
+    for job in jobs:
+        employee = job.attendance.employee
+
+        # ❌ Skip — already covered by annual leave
+        if employee.id in annual_leave_employees:
+            continue
+
+        worked_on_list = []
+        if job.holiday_worked:
+            worked_on_list.append("Holiday Worked")
+        if job.off_station:
+            worked_on_list.append("Off Station")
+        if job.local_site:
+            worked_on_list.append("Local Site")
+        if job.driv:
+            worked_on_list.append("Driving")
+
+        if job.status == "leave":
+            status = "leave"
+            description = f"Leave: {job.leave_type.capitalize()}"
+            if job.leave_reason:
+                description += f" - {job.leave_reason}"
+        else:
+            status = "on_duty"
+            description = job.description or "-"
+
+        data.append({
+            "employee": employee.user.username,
+            "status": status,
+            "description": description,
+            "job_no": job.job_no or "-",
+            "ship_name": job.ship_name or "-",
+            "location": job.location or "-",
+            "worked_on": ", ".join(worked_on_list) or "-",
+            "start_time": job.start_time or "-",
+            "end_time": job.end_time or "-",
+        })
+
+    return data
+
+
+def summary_daywise_rows(report_date, employee_id=None, job_no=None):
+    """One row per employee from EmployeeDaySummary, with the day's jobs joined"""
+    summaries = EmployeeDaySummary.objects.filter(date=report_date)
+    if employee_id:
+        summaries = summaries.filter(employee_id=employee_id)
+    if job_no:
+        summaries = summaries.filter(job_no__icontains=job_no)
+
+    return [
+        {
+            "employee": row["employee__user__username"],
+            "status": row["status"],
+            "description": summary_description(row["leave_type"], row["job_details"]),
+            "job_no": row["job_no"] or "-",
+            "worked_on": worked_on_labels(row),
+            "duration": str(row["duration"]) if row["duration"] else "-",
+        }
+        for row in summaries.order_by("employee__user__username").values(
+            "employee__user__username", "status", "leave_type", "job_details", "job_no", "duration", *MONTH_FLAGS
+        )
+    ]
@@ -0,0 +1,148 @@
+"""
+Year-end leave rollover driven by LeaveAllocationPolicy rows.
+
+For every (category, leave_type) policy:
+
+reset           total_allocated = annual allocation, used = 0
+carry_forward   total_allocated = annual allocation + unused days (up to the cap), used = 0
+
+Existing balances are rewritten with one UPDATE per policy. Employees who
+joined during the year get the allocation for their remaining months
+(bulk_update). Employees with no balance row for a policy get one
+(bulk_create). Everything runs in one transaction with a LeaveRollover row,
+whose unique key turns a retried run into a no-op. A preview runs the same
+statements and rolls them back, so its numbers are exactly what a real run
+would write.
+"""
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .models import Employee, LeaveAllocationPolicy, LeaveBalance, LeaveRollover
+from .versions import bump_employees
+
+
+def _allocation(policy, date_joined, year):
+    """Annual allocation, pro-rated by whole months for someone who joined during the year"""
+    joined = timezone.localtime(date_joined)
+    if not policy.prorate_joiners or joined.year < year:
+        return policy.annual_allocation
+    if joined.year > year:
+        return 0
+    return policy.annual_allocation * (13 - joined.month) // 12
+
+
+def _carried(policy, total_allocated, used):
+    if policy.rollover != "carry_forward":
+        return 0
+    unused = max(0, total_allocated - used)
+    return unused if policy.carry_forward_cap is None else min(unused, policy.carry_forward_cap)
+
+
+def _carried_expression(policy):
+    unused = Greatest(F("total_allocated") - F("used"), Value(0))
+    return unused if policy.carry_forward_cap is None else Least(unused, Value(policy.carry_forward_cap))
+
+
+def _apply_policy(policy, year):
+    year_start = timezone.make_aware(datetime(year, 1, 1))
+    balances = LeaveBalance.objects.filter(employee__category=policy.category, leave_type=policy.leave_type)
+    allocated_before = balances.aggregate(total=Sum("total_allocated"))["total"] or 0
+
+    # Everyone employed before the year: one set-based UPDATE
+    settled = balances.filter(employee__user__date_joined__lt=year_start) if policy.prorate_joiners else balances
+    new_total = Value(policy.annual_allocation)
+    if policy.rollover == "carry_forward":
+        new_total = new_total + _carried_expression(policy)
+    updated = settled.update(total_allocated=new_total, used=0)
+
+    # Joiners during the year: per-row pro-rated allocation
+    joiners = []
+    if policy.prorate_joiners:
+        joiners = list(balances.filter(employee__user__date_joined__gte=year_start).select_related("employee__user"))
+        for balance in joiners:
+            balance.total_allocated = (
+                _allocation(policy, balance.employee.user.date_joined, year)
+                + _carried(policy, balance.total_allocated, balance.used)
+            )
+            balance.used = 0
+        LeaveBalance.objects.bulk_update(joiners, ["total_allocated", "used"], batch_size=1000)
+
+    # Employees in the category without a balance of this type yet
+    missing = Employee.objects.filter(category=policy.category).exclude(
+        leave_balances__leave_type=policy.leave_type
+    ).values_list("id", "user__date_joined")
+    created = LeaveBalance.objects.bulk_create(
+        [
+            LeaveBalance(
+                employee_id=employee_id,
+                leave_type=policy.leave_type,
+                total_allocated=_allocation(policy, date_joined, year),
+            )
+            for employee_id, date_joined in missing
+        ],
+        batch_size=1000,
+    )
+
+    return {
+        "category": policy.category,
+        "leave_type": policy.leave_type,
+        "rollover": policy.rollover,
+        "updated": updated,
+        "prorated": len(joiners),
+        "created": len(created),
+        "allocated_before": allocated_before,
+        "allocated_after": balances.aggregate(total=Sum("total_allocated"))["total"] or 0,
+    }
+
+
+class RolloverKeyConflict(Exception):
+    """The key was already used for another year"""
+
+    def __init__(self, key, year):
+        super().__init__(f"Key {key} was already used for the {year} rollover")
+        self.year = year
+
+
+def _already_applied(record, year):
+    if record.year != year:
+        raise RolloverKeyConflict(record.key, record.year)
+    return {**record.summary, "already_applied": True, "applied_at": record.applied_at.isoformat()}
+
+
+def run_rollover(year, key, preview=False, user=None):
+    """
+    Apply every allocation policy for `year` once per key; returns a summary.
+    Raises RolloverKeyConflict when the key was applied for another year.
+    """
+    existing = LeaveRollover.objects.filter(key=key).first()
+    if existing:
+        return _already_applied(existing, year)
+
+    with transaction.atomic():
+        try:
+            # Claims the key first: a concurrent run with the same key waits here, then fails
+            with transaction.atomic():
+                record = LeaveRollover.objects.create(key=key, year=year, applied_by=user)
+        except IntegrityError:
+            return _already_applied(LeaveRollover.objects.get(key=key), year)
+
+        summary = {
+            "year": year,
+            "key": key,
+            "preview": preview,
+            "policies": [_apply_policy(policy, year) for policy in LeaveAllocationPolicy.objects.all()],
+        }
+        if preview:
+            transaction.set_rollback(True)
+            return summary
+
+        record.summary = summary
+        record.save(update_fields=["summary"])
+        # Set-based writes skip leave_balance_changed; one bump per employee
+        categories = {row["category"] for row in summary["policies"]}
+        bump_employees(Employee.objects.filter(category__in=categories).values_list("id", flat=True))
+    return summary
@@ -0,0 +1,68 @@
+from django.db import connection
+from django.db.models import Q
+from django.db.models.functions import Greatest
+
+SEARCH_FIELDS = ["job_no", "ship_name", "location"]
+FTS_TABLE = "timesheet_job_fts"
+
+
+def search_jobs(queryset, term):
+    """
+    Filter a Job queryset to entries whose job_no, ship_name, location or description
+    match term, best matches first. Uses pg_trgm + full-text indexes on Postgres and
+    the FTS5 trigram table on SQLite, falling back to icontains when neither applies.
+    """
+    term = term.strip()
+    if connection.vendor == "postgresql":
+        return _search_postgres(queryset, term)
+    # The trigram tokenizer can't match terms shorter than three characters
+    if connection.vendor == "sqlite" and len(term) >= 3 and _has_fts_table():
+        return _search_fts5(queryset, term)
+    return _search_icontains(queryset, term)
+
+
+def _field_matches(term):
+    matches = Q()
+    for field in SEARCH_FIELDS:
+        matches |= Q(**{f"{field}__icontains": term})
+    return matches
+
+
+def _search_postgres(queryset, term):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+
+    # Same expressions as the indexes created in migration 0018
+    vector = SearchVector("description", config="simple")
+    query = SearchQuery(term, config="simple")
+
+    return queryset.annotate(
+        description_vector=vector,
+    ).filter(
+        _field_matches(term) | Q(description_vector=query)
+    ).annotate(
+        rank=Greatest(
+            *(TrigramSimilarity(field, term) for field in SEARCH_FIELDS),
+            SearchRank(vector, query),
+        )
+    ).order_by("-rank", "-created_at", "-id")
+
+
+def _has_fts_table():
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def _search_fts5(queryset, term):
+    # Quoted as a single FTS5 string so user input can't inject query syntax
+    match = '"' + term.replace('"', '""') + '"'
+    return queryset.extra(
+        tables=[FTS_TABLE],
+        where=[f"{FTS_TABLE}.rowid = timesheet_job.id", f"{FTS_TABLE} MATCH %s"],
+        params=[match],
+        select={"rank": f"{FTS_TABLE}.rank"},
+    ).order_by("rank", "-created_at", "-id")
+
+
+def _search_icontains(queryset, term):
+    return queryset.filter(
+        _field_matches(term) | Q(description__icontains=term)
+    ).order_by("-created_at", "-id")
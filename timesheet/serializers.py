@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from django.contrib.auth.models import User
-from .models import Employee, Attendance, Job, LeaveRecord, LeaveBalance
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from .models import Employee, Attendance, Job, LeaveRecord, LeaveBalance, MonthClose
 from datetime import date
 
 # 🔹 User serializer (no major change)
@@ -47,6 +48,23 @@ class EmployeeSerializer(serializers.ModelSerializer):
         return instance
 
 
+# 🔹 Employee import row (bulk onboarding, see employee_import.py)
+class EmployeeImportSerializer(serializers.Serializer):
+    username = serializers.CharField(max_length=150, validators=[UnicodeUsernameValidator()])
+    password = serializers.CharField(required=False, default="123456")
+    emp_no = serializers.CharField(max_length=50)
+    mobile = serializers.CharField(max_length=15, required=False, allow_null=True)
+    category = serializers.ChoiceField(choices=Employee.CATEGORY_CHOICES, required=False, allow_null=True)
+    is_suspended = serializers.BooleanField(required=False, default=False)
+    balances = serializers.DictField(child=serializers.IntegerField(min_value=0), required=False)
+
+    def validate_balances(self, value):
+        unknown = set(value) - {leave_type for leave_type, _ in LeaveBalance.LEAVE_TYPES}
+        if unknown:
+            raise serializers.ValidationError(f"Unknown leave types: {', '.join(sorted(unknown))}")
+        return value
+
+
 # 🔹 Attendance Serializer
 class AttendanceSerializer(serializers.ModelSerializer):
     class Meta:
@@ -151,6 +169,13 @@ class LeaveBalanceSerializer(serializers.ModelSerializer):
     def get_remaining(self, obj):
         return obj.remaining()
 
+class MonthCloseSerializer(serializers.ModelSerializer):
+    closed_by_name = serializers.CharField(source="closed_by.username", read_only=True, default=None)
+
+    class Meta:
+        model = MonthClose
+        fields = ["id", "year", "month", "closed_by", "closed_by_name", "closed_at", "employees", "needs_reclose"]
+
 class LeaveApplySerializer(serializers.Serializer):
     leave_type = serializers.ChoiceField(choices=LeaveRecord.LEAVE_TYPES)
     start_date = serializers.DateField()
@@ -167,19 +192,6 @@ class LeaveApplySerializer(serializers.Serializer):
         if start < date.today():
             raise serializers.ValidationError("Leave cannot start in the past")
 
-        total_days = (end - start).days + 1
-        employee = self.context['employee']
-
-        balance = LeaveBalance.objects.filter(
-            employee=employee,
-            leave_type=data['leave_type']
-        ).first()
-
-        if not balance:
-            raise serializers.ValidationError("Leave balance not found")
-
-        if balance.used + total_days > balance.total_allocated:
-            raise serializers.ValidationError("Insufficient leave balance")
-
-        data['total_days'] = total_days
+        # The balance is checked by the conditional debit in ApplyLeaveAPIView, not read here
+        data['total_days'] = (end - start).days + 1
         return data
@@ -0,0 +1,192 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from . import stats
+from .authentication import invalidate_auth_stamp
+from .blacklist_filter import blacklist_changed
+from .day_state import invalidate_day_state
+from .day_summary import summaries_changed
+from .models import Attendance, Employee, Job, LeaveBalance, LeaveRecord
+from .month_close import days_changed
+from .report_cache import invalidate_daywise, usernames_changed
+from .stats import date_range
+from .utils import sync_leave_days
+from .versions import bump_employees
+
+
+def _job_attendance(job):
+    try:
+        return job.attendance
+    except Attendance.DoesNotExist:
+        return None
+
+
+# 🔹 Attendance
+
+@receiver(pre_save, sender=Attendance)
+def attendance_remember_previous(sender, instance, **kwargs):
+    # An edited login_time can move the session's jobs to another day's report
+    instance._previous_work_date = None
+    if instance.pk:
+        instance._previous_work_date = Attendance.objects.filter(pk=instance.pk).values_list(
+            "work_date", flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Attendance)
+def attendance_saved(sender, instance, created, **kwargs):
+    # An open session from an earlier day still shows up in today's state
+    invalidate_day_state(instance.employee_id, {instance.work_date, timezone.localdate()})
+    days = {instance.work_date, getattr(instance, "_previous_work_date", None)}
+    invalidate_daywise(days)
+    days_changed(days)
+    summaries_changed(instance.employee_id, days)
+    bump_employees([instance.employee_id])
+
+    if created:
+        stats.attendance_created(instance)
+
+
+@receiver(post_delete, sender=Attendance)
+def attendance_deleted(sender, instance, **kwargs):
+    invalidate_day_state(instance.employee_id, {instance.work_date, timezone.localdate()})
+    invalidate_daywise({instance.work_date})
+    days_changed({instance.work_date})
+    summaries_changed(instance.employee_id, {instance.work_date})
+    bump_employees([instance.employee_id])
+    stats.rebuild_tracked_days([instance.work_date])
+
+
+# 🔹 Jobs
+
+@receiver(pre_save, sender=Job)
+def job_remember_previous(sender, instance, **kwargs):
+    instance._previous = None
+    if instance.pk:
+        instance._previous = Job.objects.filter(pk=instance.pk).values(
+            "status", "attendance__work_date"
+        ).first()
+
+
+@receiver(post_save, sender=Job)
+def job_saved(sender, instance, created, **kwargs):
+    attendance = instance.attendance
+    invalidate_day_state(attendance.employee_id, {
+        attendance.work_date, timezone.localdate(instance.created_at), timezone.localdate(),
+    })
+    previous = getattr(instance, "_previous", None)
+    days = {attendance.work_date, previous and previous["attendance__work_date"]}
+    invalidate_daywise(days)
+    days_changed(days)
+    summaries_changed(attendance.employee_id, days)
+    bump_employees([attendance.employee_id])
+
+    if created:
+        stats.job_created(instance)
+        return
+
+    day = attendance.work_date
+    if previous and (previous["status"], previous["attendance__work_date"]) != (instance.status, day):
+        stats.rebuild_tracked_days({previous["attendance__work_date"], day})
+
+
+@receiver(post_delete, sender=Job)
+def job_deleted(sender, instance, **kwargs):
+    attendance = _job_attendance(instance)
+    if attendance:
+        invalidate_day_state(attendance.employee_id, {
+            attendance.work_date, timezone.localdate(instance.created_at), timezone.localdate(),
+        })
+        invalidate_daywise({attendance.work_date})
+        days_changed({attendance.work_date})
+        summaries_changed(attendance.employee_id, {attendance.work_date})
+        bump_employees([attendance.employee_id])
+    stats.job_deleted(instance, attendance)
+
+
+# 🔹 Leave records
+
+@receiver(pre_save, sender=LeaveRecord)
+def leave_remember_previous(sender, instance, **kwargs):
+    instance._previous = None
+    if instance.pk:
+        instance._previous = LeaveRecord.objects.filter(pk=instance.pk).values(
+            "start_date", "end_date"
+        ).first()
+
+
+@receiver(post_save, sender=LeaveRecord)
+def leave_saved(sender, instance, created, **kwargs):
+    sync_leave_days(instance)
+
+    previous = getattr(instance, "_previous", None) or {}
+    days = set(date_range(instance.start_date, instance.end_date))
+    days.update(date_range(previous.get("start_date"), previous.get("end_date")))
+    invalidate_day_state(instance.employee_id, days)
+    invalidate_daywise(days)
+    days_changed(days)
+    summaries_changed(instance.employee_id, days)
+    bump_employees([instance.employee_id])
+
+    if created:
+        stats.leave_created(instance)
+    else:
+        stats.rebuild_tracked_days(days)
+
+
+@receiver(post_delete, sender=LeaveRecord)
+def leave_deleted(sender, instance, **kwargs):
+    days = date_range(instance.start_date, instance.end_date)
+    invalidate_day_state(instance.employee_id, days)
+    invalidate_daywise(days)
+    days_changed(days)
+    summaries_changed(instance.employee_id, days)
+    bump_employees([instance.employee_id])
+    stats.rebuild_tracked_days(days)
+
+
+# 🔹 Employees
+
+@receiver(post_save, sender=Employee)
+def employee_saved(sender, instance, created, **kwargs):
+    invalidate_auth_stamp(instance.user_id)
+    bump_employees([instance.pk])
+    stats.employees_changed()
+
+
+@receiver(post_delete, sender=Employee)
+def employee_deleted(sender, instance, **kwargs):
+    invalidate_auth_stamp(instance.user_id)
+    bump_employees([instance.pk])
+    stats.employees_changed()
+
+
+# 🔹 Users (token claims)
+
+@receiver([post_save, post_delete], sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_auth_stamp(instance.pk)
+
+    # Report rows show usernames; logins only touch last_login
+    update_fields = kwargs.get("update_fields")
+    if kwargs.get("created") is False and (update_fields is None or "username" in update_fields):
+        usernames_changed()
+        bump_employees(Employee.objects.filter(user_id=instance.pk).values_list("id", flat=True))
+
+
+# 🔹 Leave balances
+
+@receiver([post_save, post_delete], sender=LeaveBalance)
+def leave_balance_changed(sender, instance, **kwargs):
+    bump_employees([instance.employee_id])
+
+
+# 🔹 Token blacklist
+
+@receiver(post_save, sender=BlacklistedToken)
+def token_blacklisted(sender, instance, created, **kwargs):
+    if created:
+        blacklist_changed()
@@ -0,0 +1,215 @@
+from datetime import timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Q, Sum
+from django.utils import timezone
+
+from .models import Attendance, DailyStats, Employee, EmployeeDaySummary, Job
+from .utils import employees_on_leave, leave_records_on
+
+COUNTER_FIELDS = [
+    "total_employees",
+    "suspended_employees",
+    "attendance_coverage",
+    "total_work_entries",
+    "total_leave_today",
+]
+
+
+def daily_stats_queries(day):
+    """
+    The independent source queries behind one day's counters, as callables.
+    compute_daily_stats runs them in turn; the async dashboard runs them concurrently.
+    """
+    return {
+        "totals": _employee_totals,
+        "attendance_ids": lambda: set(
+            Attendance.objects.filter(work_date=day).values_list("employee_id", flat=True)
+        ),
+        "daily_leave_ids": lambda: set(
+            Job.objects.filter(
+                status="leave",
+                attendance__work_date=day,
+            ).values_list("attendance__employee_id", flat=True)
+        ),
+        "leave_record_ids": lambda: employees_on_leave(day),
+        "work_entries": lambda: Job.objects.filter(
+            attendance__work_date=day,
+            status="on_duty",
+        ).count(),
+    }
+
+
+def combine_daily_stats(results):
+    """Counters from the results of daily_stats_queries()"""
+    daily_leave_ids = results["daily_leave_ids"]
+    leave_record_ids = results["leave_record_ids"]
+    return {
+        **results["totals"],
+        "attendance_coverage": len(results["attendance_ids"] | daily_leave_ids | leave_record_ids),
+        "total_work_entries": results["work_entries"],
+        "total_leave_today": len(daily_leave_ids | leave_record_ids),
+    }
+
+
+def compute_daily_stats(day):
+    """Count the dashboard figures for one day straight from the source tables"""
+    return combine_daily_stats({name: query() for name, query in daily_stats_queries(day).items()})
+
+
+def summary_daily_stats(day):
+    """The same figures from the day's EmployeeDaySummary rows, in two queries"""
+    counts = EmployeeDaySummary.objects.filter(date=day).aggregate(
+        attendance_coverage=Count("id"),
+        total_work_entries=Sum("work_entries"),
+        total_leave_today=Count("id", filter=Q(status="leave")),
+    )
+    return {**_employee_totals(), **counts, "total_work_entries": counts["total_work_entries"] or 0}
+
+
+def rebuild_daily_stats(day):
+    """Recompute and store the counters for one day"""
+    stats, _ = DailyStats.objects.update_or_create(date=day, defaults=compute_daily_stats(day))
+    return stats
+
+
+def get_daily_stats(day):
+    """Return the counters for a day, building the row from source on first use"""
+    try:
+        return DailyStats.objects.get(date=day)
+    except DailyStats.DoesNotExist:
+        pass
+
+    return store_daily_stats(day, compute_daily_stats(day))
+
+
+def store_daily_stats(day, counters):
+    """
+    Insert a freshly computed row, or return the one a concurrent request stored first.
+
+    A write that committed after the counters were computed but before the insert
+    found no row to update, so once the row exists the counters are computed again
+    under its lock. Writes that reach the row after that wait for the lock and add
+    their delta on top.
+    """
+    try:
+        with transaction.atomic():
+            DailyStats.objects.create(date=day, **counters)
+    except IntegrityError:
+        return DailyStats.objects.get(date=day)
+
+    with transaction.atomic():
+        stats = DailyStats.objects.select_for_update().get(date=day)
+        fresh = compute_daily_stats(day)
+        changed = [field for field in COUNTER_FIELDS if getattr(stats, field) != fresh[field]]
+        if changed:
+            for field in changed:
+                setattr(stats, field, fresh[field])
+            stats.save(update_fields=changed + ["updated_at"])
+    return stats
+
+
+def _employee_totals():
+    return Employee.objects.aggregate(
+        total_employees=Count("id"),
+        suspended_employees=Count("id", filter=Q(is_suspended=True)),
+    )
+
+
+def _coverage_flags(employee_id, day, exclude_attendance=None, exclude_job=None, exclude_leave=None):
+    """
+    (attended, daily_leave, leave_record) for one employee on one day, ignoring
+    the excluded rows. Used to work out whether a write changed the distinct counts.
+    """
+    attendances = Attendance.objects.filter(employee_id=OuterRef("pk"), work_date=day)
+    leave_jobs = Job.objects.filter(
+        status="leave",
+        attendance__employee_id=OuterRef("pk"),
+        attendance__work_date=day,
+    )
+    leave_records = leave_records_on(day).filter(employee_id=OuterRef("pk"))
+    if exclude_attendance:
+        attendances = attendances.exclude(pk=exclude_attendance)
+    if exclude_job:
+        leave_jobs = leave_jobs.exclude(pk=exclude_job)
+    if exclude_leave:
+        leave_records = leave_records.exclude(pk=exclude_leave)
+
+    row = Employee.objects.filter(pk=employee_id).values_list(
+        Exists(attendances), Exists(leave_jobs), Exists(leave_records)
+    ).first()
+    return tuple(row) if row else (False, False, False)
+
+
+def _apply_delta(day, before, after, work_entries=0):
+    covered = int(any(after)) - int(any(before))
+    on_leave = int(after[1] or after[2]) - int(before[1] or before[2])
+    if not (covered or on_leave or work_entries):
+        return
+
+    DailyStats.objects.filter(date=day).update(
+        attendance_coverage=F("attendance_coverage") + covered,
+        total_leave_today=F("total_leave_today") + on_leave,
+        total_work_entries=F("total_work_entries") + work_entries,
+        updated_at=timezone.now(),
+    )
+
+
+def _tracked_days(days):
+    """Subset of days that already have a stats row; other days are built on demand"""
+    return list(DailyStats.objects.filter(date__in=days).values_list("date", flat=True))
+
+
+def date_range(start, end):
+    if not start or not end:
+        return []
+    return [start + timedelta(days=i) for i in range((end - start).days + 1)]
+
+
+# 🔹 Write hooks (wired up in signals.py)
+
+def attendance_created(attendance):
+    day = attendance.work_date
+    if not _tracked_days([day]):
+        return
+    before = _coverage_flags(attendance.employee_id, day, exclude_attendance=attendance.pk)
+    after = (True, before[1], before[2])
+    _apply_delta(day, before, after)
+
+
+def job_created(job):
+    day = job.attendance.work_date
+    if not _tracked_days([day]):
+        return
+    before = _coverage_flags(job.attendance.employee_id, day, exclude_job=job.pk)
+    after = (before[0], before[1] or job.status == "leave", before[2])
+    _apply_delta(day, before, after, work_entries=int(job.status == "on_duty"))
+
+
+def job_deleted(job, attendance):
+    if not attendance or not _tracked_days([attendance.work_date]):
+        return
+    day = attendance.work_date
+    after = _coverage_flags(attendance.employee_id, day)
+    before = (after[0], after[1] or job.status == "leave", after[2])
+    _apply_delta(day, before, after, work_entries=-int(job.status == "on_duty"))
+
+
+def leave_created(leave):
+    for day in _tracked_days(date_range(leave.start_date, leave.end_date)):
+        before = _coverage_flags(leave.employee_id, day, exclude_leave=leave.pk)
+        after = (before[0], before[1], True)
+        _apply_delta(day, before, after)
+
+
+def rebuild_tracked_days(days):
+    """Fallback for edits and deletes that don't map onto a simple delta"""
+    for day in _tracked_days(days):
+        rebuild_daily_stats(day)
+
+
+def employees_changed():
+    """Refresh employee totals on today's and any later rows"""
+    DailyStats.objects.filter(date__gte=timezone.localdate()).update(
+        **_employee_totals(), updated_at=timezone.now()
+    )
@@ -1,3 +1,1347 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta, timezone as dt_timezone
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import OperationalError, connections
+from django.db.models import F, Sum
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+
+from .admission import password_gate
+from .async_views import run_concurrently
+from .attendance_sessions import close_stale_attendance
+from .authentication import ClaimsRefreshToken, ClaimsTokenRefreshSerializer
+from .blacklist_filter import BloomFilter, blacklist_filter
+from .day_state import _cache_key as day_state_key, get_day_state
+from .day_summary import rebuild_day_summaries
+from .employee_import import import_employees
+from .fast_serializers import job_rows, serialize_job_rows
+from .metrics import Registry
+from .models import (
+    Attendance, Employee, EmployeeDaySummary, Job, LeaveAllocationPolicy, LeaveBalance, LeaveRecord, LeaveRollover,
+    MonthClose,
+)
+from .month_close import close_month, closed_months
+from .rollover import RolloverKeyConflict, run_rollover
+from .search import _has_fts_table, search_jobs
+from .serializers import JobSerializer
+from .stats import COUNTER_FIELDS, compute_daily_stats, get_daily_stats, store_daily_stats
+from .timesheets import iter_monthly_timesheets, stream_monthly_csv
+from .utils import (
+    InsufficientLeaveBalance, LeaveBalanceMissing, debit_leave_balance, employees_on_leave, is_employee_on_leave,
+    leave_records_on,
+)
+
+
+# 🔹 Token blacklist
+
+class BloomFilterTests(TestCase):
+    def test_no_false_negatives(self):
+        bloom = BloomFilter(5000, 0.01)
+        items = [f"jti-{i}" for i in range(5000)]
+        for item in items:
+            bloom.add(item)
+        self.assertTrue(all(item in bloom for item in items))
+
+    def test_false_positive_rate_near_target(self):
+        bloom = BloomFilter(5000, 0.01)
+        for i in range(5000):
+            bloom.add(f"jti-{i}")
+        false_positives = sum(f"other-{i}" in bloom for i in range(20000))
+        self.assertLess(false_positives / 20000, 0.03)
+
+
+class BlacklistFilterTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        blacklist_filter.reset()
+        self.user = User.objects.create_user("filter-user", password="pw")
+
+    def tearDown(self):
+        blacklist_filter.reset()
+
+    def test_unlisted_token_skips_database(self):
+        token = ClaimsRefreshToken.for_user(self.user)
+        token.check_blacklist()  # builds the filter
+        with self.assertNumQueries(0):
+            token.check_blacklist()
+
+    def test_false_positive_falls_back_to_database(self):
+        token = ClaimsRefreshToken.for_user(self.user)
+        token.check_blacklist()
+        with mock.patch.object(BloomFilter, "__contains__", return_value=True):
+            with self.assertNumQueries(1):
+                token.check_blacklist()
+
+        serializer = ClaimsTokenRefreshSerializer(data={"refresh": str(token)})
+        with mock.patch.object(BloomFilter, "__contains__", return_value=True):
+            self.assertTrue(serializer.is_valid())
+        self.assertIn("access", serializer.validated_data)
+
+    def test_blacklisted_token_rejected(self):
+        token = ClaimsRefreshToken.for_user(self.user)
+        token.blacklist()
+        with self.assertRaises(TokenError):
+            ClaimsRefreshToken(str(token))
+
+    def test_token_blacklisted_after_build_rejected(self):
+        token = ClaimsRefreshToken.for_user(self.user)
+        token.check_blacklist()
+        with self.captureOnCommitCallbacks(execute=True):
+            token.blacklist()
+
+        serializer = ClaimsTokenRefreshSerializer(data={"refresh": str(token)})
+        with self.assertRaises(TokenError):
+            serializer.is_valid()
+
+    def test_catch_up_counts_each_token_once(self):
+        for _ in range(5):
+            ClaimsRefreshToken.for_user(self.user).blacklist()
+        blacklist_filter.might_contain("build")
+        self.assertEqual(blacklist_filter.bloom.count, 5)
+
+        with mock.patch.object(blacklist_filter, "_rebuild") as rebuild:
+            # Every catch-up reads the overlap again
+            for _ in range(3):
+                with self.captureOnCommitCallbacks(execute=True):
+                    ClaimsRefreshToken.for_user(self.user).blacklist()
+                blacklist_filter.might_contain("catch-up")
+        rebuild.assert_not_called()
+        self.assertEqual(blacklist_filter.bloom.count, 8)
+
+    @override_settings(TOKEN_BLACKLIST_FILTER=False)
+    def test_disabled_filter_always_queries(self):
+        token = ClaimsRefreshToken.for_user(self.user)
+        with self.assertNumQueries(1):
+            token.check_blacklist()
+
+
+class PruneTokenBlacklistTests(TestCase):
+    def test_deletes_only_expired_rows(self):
+        user = User.objects.create_user("prune-user", password="pw")
+        now = timezone.now()
+        for i in range(5):
+            expired = OutstandingToken.objects.create(
+                user=user, jti=f"old-{i}", token="x", expires_at=now - timedelta(days=1)
+            )
+            BlacklistedToken.objects.create(token=expired)
+        live = OutstandingToken.objects.create(
+            user=user, jti="live", token="x", expires_at=now + timedelta(days=1)
+        )
+        BlacklistedToken.objects.create(token=live)
+
+        call_command("prune_token_blacklist", batch_size=2, stdout=io.StringIO())
+
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), ["live"])
+        self.assertEqual(BlacklistedToken.objects.get().token_id, live.id)
+
+    def test_max_batches_stops_early(self):
+        user = User.objects.create_user("prune-user", password="pw")
+        expires = timezone.now() - timedelta(days=1)
+        OutstandingToken.objects.bulk_create(
+            OutstandingToken(user=user, jti=f"old-{i}", token="x", expires_at=expires)
+            for i in range(5)
+        )
+
+        call_command("prune_token_blacklist", batch_size=2, max_batches=1, stdout=io.StringIO())
+
+        self.assertEqual(OutstandingToken.objects.count(), 3)
+
+
+# 🔹 Login admission control
+
+class PasswordCheckGateTests(TestCase):
+    @override_settings(LOGIN_ADMISSION_CONTROL=True, LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE=1, LOGIN_HASH_WAIT=10)
+    def test_full_gate_answers_429_with_retry_after(self):
+        release = threading.Event()
+
+        def slow_check(credentials):
+            release.wait(10)
+            return None
+
+        with mock.patch("timesheet.admission._check_password", side_effect=slow_check):
+            # One login hashing and one queued fill the gate
+            waiting = [
+                threading.Thread(target=password_gate.authenticate, kwargs={"username": f"u{i}", "password": "pw"})
+                for i in range(2)
+            ]
+            for thread in waiting:
+                thread.start()
+            deadline = time.monotonic() + 5
+            while password_gate._pending < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+            try:
+                response = APIClient().post("/api/login/", {"username": "storm", "password": "pw"}, format="json")
+            finally:
+                release.set()
+                for thread in waiting:
+                    thread.join()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response["Retry-After"], "2")
+
+
+# 🔹 JWT claims
+
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("claims-user", password="pw")
+        self.employee = Employee.objects.create(user=self.user, emp_no="CLAIMS-1", category="B")
+        self.refresh = ClaimsRefreshToken.for_user(self.user)
+        self.client = APIClient()
+        self._use(self.refresh.access_token)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _use(self, access):
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+
+    def _me(self):
+        return self.client.get("/api/employees/me/")
+
+    def test_current_stamp_authenticates_without_queries(self):
+        self.assertEqual(self._me().status_code, 200)  # caches the stamp
+        with self.assertNumQueries(0):
+            response = self._me()
+        self.assertEqual(response.json(), {"id": self.employee.id, "username": "claims-user", "category": "B", "emp_no": "CLAIMS-1"})
+
+    def test_suspended_employee_rejected_once_stamp_is_dropped(self):
+        self._me()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.is_suspended = True
+            self.employee.save()
+        response = self._me()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["detail"], "Your account is suspended")
+
+    def test_deactivated_user_rejected_once_stamp_is_dropped(self):
+        self._me()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+        response = self._me()
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(response.json()["detail"], "User is inactive")
+
+    def test_refresh_reissues_current_claims(self):
+        self._me()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.employee.emp_no = "CLAIMS-2"
+            self.employee.save()
+        # The stale token is served from the database user meanwhile
+        self.assertEqual(self._me().json()["emp_no"], "CLAIMS-2")
+
+        serializer = ClaimsTokenRefreshSerializer(data={"refresh": str(self.refresh)})
+        blacklist_filter.might_contain(self.refresh["jti"])  # builds the filter
+        with self.assertNumQueries(1):  # the user and employee, once
+            self.assertTrue(serializer.is_valid())
+        access = AccessToken(serializer.validated_data["access"])
+        self.assertEqual(access["emp_no"], "CLAIMS-2")
+        self._use(access)
+        with self.assertNumQueries(0):
+            self.assertEqual(self._me().json()["emp_no"], "CLAIMS-2")
+
+
+# 🔹 Employee import
+
+class EmployeeImportTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user("import-admin", password="pw", is_staff=True))
+
+    def _rows(self, n):
+        return [{"username": f"imp-{i}", "password": f"pw-{i}", "emp_no": f"IMP-{i}", "balances": {"casual": 4}} for i in range(n)]
+
+    @override_settings(EMPLOYEE_IMPORT_API_MAX_ROWS=3)
+    def test_api_hashes_in_process_and_caps_rows(self):
+        response = self.client.post("/api/employees/import/", self._rows(4), format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("import_employees", response.json()["error"])
+        # Dry runs hash nothing, so they take any number of rows
+        response = self.client.post("/api/employees/import/?dry_run=1", self._rows(4), format="json")
+        self.assertEqual(response.status_code, 200)
+
+        with mock.patch("timesheet.employee_import.ProcessPoolExecutor") as pool:
+            response = self.client.post("/api/employees/import/", self._rows(3), format="json")
+        self.assertEqual(response.status_code, 201)
+        pool.assert_not_called()
+        self.assertEqual(Employee.objects.filter(emp_no__startswith="IMP-").count(), 3)
+
+    def test_import_creates_users_employees_and_balances(self):
+        report = import_employees(self._rows(3))
+        self.assertEqual((report["created"], report["balances"], report["errors"]), (3, 3, []))
+        user = User.objects.get(username="imp-1")
+        self.assertEqual((user.employee.emp_no, user.employee.leave_balances.get().total_allocated), ("IMP-1", 4))
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$"))
+        self.assertTrue(user.check_password("pw-1"))
+
+    def test_dry_run_writes_nothing(self):
+        report = import_employees(self._rows(3), dry_run=True)
+        self.assertEqual((report["valid"], report["created"]), (3, 0))
+        self.assertFalse(Employee.objects.exists())
+
+    def test_duplicate_rows_refuse_the_whole_import(self):
+        Employee.objects.create(user=User.objects.create_user("taken", password="pw"), emp_no="IMP-2")
+        rows = self._rows(3) + [{"username": "imp-0", "emp_no": "IMP-9"}]
+        report = import_employees(rows)
+        self.assertEqual(report["errors"], [
+            {"row": 3, "errors": {"emp_no": ["IMP-2 already exists."]}},
+            {"row": 4, "errors": {"username": ["imp-0 is repeated from row 1."]}},
+        ])
+        self.assertFalse(User.objects.filter(username__startswith="imp-").exists())
+
+    def _legacy_import_hashes(self):
+        # Hashes written by earlier versions of the import
+        import_employees(self._rows(2))
+        for user in User.objects.filter(username__startswith="imp-"):
+            user.password = make_password(f"pw-{user.username[4:]}", hasher="pbkdf2_sha256_import")
+            user.save(update_fields=["password"])
+
+    def test_first_login_upgrades_a_legacy_import_hash(self):
+        self._legacy_import_hashes()
+        user = User.objects.get(username="imp-0")
+        self.assertTrue(user.check_password("pw-0"))
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith("pbkdf2_sha256$"))
+
+    def test_harden_wraps_hashes_never_upgraded(self):
+        self._legacy_import_hashes()
+        User.objects.filter(username__startswith="imp-").update(date_joined=timezone.now() - timedelta(days=30))
+        User.objects.get(username="imp-1").check_password("pw-1")  # logged in: already upgraded
+        call_command("harden_import_passwords", processes=1, stdout=io.StringIO())
+
+        hardened, upgraded = User.objects.get(username="imp-0"), User.objects.get(username="imp-1")
+        self.assertTrue(hardened.password.startswith("pbkdf2_sha256_import_wrapped$"))
+        self.assertTrue(upgraded.password.startswith("pbkdf2_sha256$"))
+        self.assertFalse(hardened.check_password("wrong"))
+        self.assertTrue(hardened.check_password("pw-0"))
+        hardened.refresh_from_db()
+        self.assertTrue(hardened.password.startswith("pbkdf2_sha256$"))
+
+
+# 🔹 Attendance work date
+
+@override_settings(TIME_ZONE="Asia/Kolkata")  # UTC+05:30
+class WorkDateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user("workdate-user", password="pw", is_staff=True)
+        self.employee = Employee.objects.create(user=user, emp_no="WORKDATE-1", category="B")
+        # 23:59 and 00:01 local time either side of midnight on 1-2 March
+        self.before = Attendance.objects.create(
+            employee=self.employee, login_time=datetime(2026, 3, 1, 18, 29, tzinfo=dt_timezone.utc),
+        )
+        self.after = Attendance.objects.create(
+            employee=self.employee, login_time=datetime(2026, 3, 1, 18, 31, tzinfo=dt_timezone.utc),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+    def test_work_date_is_the_local_calendar_day(self):
+        self.assertEqual(self.before.work_date, date(2026, 3, 1))
+        self.assertEqual(self.after.work_date, date(2026, 3, 2))
+
+    def test_daywise_report_uses_the_local_day(self):
+        Job.objects.create(attendance=self.before, description="Late shift")
+        Job.objects.create(attendance=self.after, description="Early shift")
+        rows = self.client.get("/api/daywise-report/", {"date": "2026-03-02"}).json()
+        self.assertEqual([row["description"] for row in rows], ["Early shift"])
+
+    def test_editing_login_time_moves_the_work_date(self):
+        self.before.login_time = datetime(2026, 3, 2, 18, 31, tzinfo=dt_timezone.utc)
+        self.before.save()
+        self.assertEqual(Attendance.objects.get(pk=self.before.pk).work_date, date(2026, 3, 3))
+
+
+# 🔹 Day state
+
+class DayStateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.employee = Employee.objects.create(
+            user=User.objects.create_user("state-user", password="pw"), emp_no="STATE-1", category="B",
+        )
+        self.attendance = Attendance.objects.create(employee=self.employee)
+        self.day = self.attendance.work_date
+
+    def _flags(self):
+        state = get_day_state(self.employee, self.day)
+        return state["has_on_duty"], state["has_leave"]
+
+    def test_cached_until_a_job_write(self):
+        self.assertEqual(self._flags(), (False, False))
+        with self.assertNumQueries(0):
+            self.assertEqual(self._flags(), (False, False))
+
+        job = Job.objects.create(attendance=self.attendance, description="Hull survey")
+        self.assertEqual(self._flags(), (True, False))
+        job.status, job.leave_type = "leave", "casual"
+        job.save()
+        self.assertEqual(self._flags(), (False, True))
+        job.delete()
+        self.assertEqual(self._flags(), (False, False))
+
+    def test_refill_before_commit_is_dropped_on_commit(self):
+        stale = get_day_state(self.employee, self.day)
+        with self.captureOnCommitCallbacks(execute=True):
+            Job.objects.create(attendance=self.attendance, description="Hull survey")
+            # Another request reads the old state before this transaction commits
+            cache.set(day_state_key(self.employee.pk, self.day), stale)
+        self.assertEqual(self._flags(), (True, False))
+
+
+# 🔹 Leave lookups
+
+class LeaveLookupTests(TestCase):
+    def setUp(self):
+        self.employee = Employee.objects.create(
+            user=User.objects.create_user("lookup-user", password="pw"), emp_no="LOOKUP-1",
+        )
+        self.leave = LeaveRecord.objects.create(
+            employee=self.employee, leave_type="sick", start_date=date(2026, 3, 10),
+            end_date=date(2026, 3, 12), total_days=3,
+        )
+
+    def _on_leave(self, day):
+        records = set(leave_records_on(day).values_list("pk", flat=True))
+        employees = employees_on_leave(day)
+        self.assertEqual(is_employee_on_leave(self.employee, day), bool(employees))
+        return records, employees
+
+    def test_both_ends_are_inclusive(self):
+        self.assertEqual(self._on_leave(date(2026, 3, 9)), (set(), set()))
+        for day in (date(2026, 3, 10), date(2026, 3, 11), date(2026, 3, 12)):
+            self.assertEqual(self._on_leave(day), ({self.leave.pk}, {self.employee.pk}))
+        self.assertEqual(self._on_leave(date(2026, 3, 13)), (set(), set()))
+
+    def test_single_day_leave(self):
+        single = LeaveRecord.objects.create(
+            employee=self.employee, leave_type="casual", start_date=date(2026, 3, 20),
+            end_date=date(2026, 3, 20), total_days=1,
+        )
+        self.assertEqual(self._on_leave(date(2026, 3, 20)), ({single.pk}, {self.employee.pk}))
+        self.assertEqual(self._on_leave(date(2026, 3, 21)), (set(), set()))
+
+    def test_edits_and_deletes_move_the_edges(self):
+        self.leave.start_date, self.leave.end_date = date(2026, 3, 11), date(2026, 3, 14)
+        self.leave.save()
+        self.assertEqual(self._on_leave(date(2026, 3, 10)), (set(), set()))
+        self.assertEqual(self._on_leave(date(2026, 3, 14)), ({self.leave.pk}, {self.employee.pk}))
+        self.leave.delete()
+        self.assertEqual(self._on_leave(date(2026, 3, 12)), (set(), set()))
+
+
+# 🔹 Job search
+
+class JobSearchTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("search-user", password="pw", is_superuser=True)
+        self.attendance = Attendance.objects.create(
+            employee=Employee.objects.create(user=user, emp_no="SEARCH-1", category="A"),
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+    def _job(self, **fields):
+        return Job.objects.create(attendance=self.attendance, **fields)
+
+    def _search(self, term):
+        response = self.client.get("/api/workentries/search/", {"q": term})
+        self.assertEqual(response.status_code, 200)
+        return [row["id"] for row in response.json()["results"]]
+
+    def test_search_index_follows_inserts_updates_and_deletes(self):
+        if connections["default"].vendor == "sqlite":
+            self.assertTrue(_has_fts_table())
+        job = self._job(ship_name="Ocean Voyager", description="Hull survey")
+        self.assertEqual(self._search("voyag"), [job.pk])
+        job.ship_name = "Sea Breeze"
+        job.save()
+        self.assertEqual(self._search("voyag"), [])
+        self.assertEqual(self._search("breeze"), [job.pk])
+        job.delete()
+        self.assertEqual(self._search("breeze"), [])
+
+    def test_better_matches_rank_first(self):
+        often = self._job(ship_name="Pump Master", location="Pump house", description="Pump overhaul")
+        # Newer, but a weaker match
+        once = self._job(description="Replaced the pump seal on the port side engine room cooling line")
+        self._job(description="Hull survey")
+        self.assertEqual(self._search("pump"), [often.pk, once.pk])
+
+    def test_short_terms_fall_back_to_newest_first(self):
+        # Too short for the trigram index
+        older = self._job(job_no="J7-100")
+        newer = self._job(location="Bay J7")
+        self._job(job_no="K8")
+        self.assertEqual(self._search("j7"), [newer.pk, older.pk])
+        with mock.patch("timesheet.search._search_fts5") as fts:
+            list(search_jobs(Job.objects.all(), "j7"))
+        fts.assert_not_called()
+
+
+# 🔹 Leave balance debits
+
+class LeaveDebitConcurrencyTests(TransactionTestCase):
+    def test_concurrent_debits_never_overdraw(self):
+        user = User.objects.create_user("debit-user", password="pw")
+        employee = Employee.objects.create(user=user, emp_no="DEBIT-1", category="B")
+        balance = LeaveBalance.objects.create(employee=employee, leave_type="casual", total_allocated=5)
+
+        start = threading.Barrier(20)
+        outcomes = []
+
+        def apply():
+            start.wait()
+            try:
+                while True:
+                    try:
+                        debit_leave_balance(employee.pk, "casual", 1)
+                        outcomes.append("ok")
+                    except InsufficientLeaveBalance:
+                        outcomes.append("insufficient")
+                    except OperationalError as exc:
+                        # The shared-cache SQLite test database reports contention instead of waiting
+                        if "locked" not in str(exc):
+                            raise
+                        time.sleep(0.01)
+                        continue
+                    break
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=apply) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        balance.refresh_from_db()
+        self.assertEqual(outcomes.count("ok"), 5)
+        self.assertEqual(outcomes.count("insufficient"), 15)
+        self.assertEqual(balance.used, 5)
+
+
+class LeaveDebitTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        closed_months()  # warm, as it is between month closes
+        self.user = User.objects.create_user("apply-user", password="pw")
+        self.employee = Employee.objects.create(user=self.user, emp_no="APPLY-1", category="B")
+        self.balance = LeaveBalance.objects.create(employee=self.employee, leave_type="casual", total_allocated=3)
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _apply(self, days):
+        start = date.today() + timedelta(days=30)
+        return self.client.post("/api/leaves/apply/", {
+            "leave_type": "casual",
+            "start_date": str(start),
+            "end_date": str(start + timedelta(days=days - 1)),
+        }, format="json")
+
+    def test_debit_returns_new_row_and_refuses_overdraw(self):
+        row = debit_leave_balance(self.employee, "casual", 2)
+        if row is not None:  # backends with UPDATE ... RETURNING
+            self.assertEqual(tuple(row), (2, 3))
+        with self.assertRaises(InsufficientLeaveBalance):
+            debit_leave_balance(self.employee, "casual", 2)
+        with self.assertRaises(LeaveBalanceMissing):
+            debit_leave_balance(self.employee, "sick", 1)
+        self.balance.refresh_from_db()
+        self.assertEqual(self.balance.used, 2)
+
+    def test_apply_leave_debits_with_one_statement(self):
+        with self.assertNumQueries(7):
+            response = self._apply(2)
+        self.assertEqual(response.status_code, 201)
+        self.balance.refresh_from_db()
+        self.assertEqual(self.balance.used, 2)
+
+    def test_apply_leave_insufficient_balance_writes_nothing(self):
+        response = self._apply(4)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"non_field_errors": ["Insufficient leave balance"]})
+        self.assertFalse(LeaveRecord.objects.exists())
+        self.balance.refresh_from_db()
+        self.assertEqual(self.balance.used, 0)
+
+
+class LeaveRolloverTests(TestCase):
+    def setUp(self):
+        LeaveAllocationPolicy.objects.create(category="A", leave_type="casual", annual_allocation=12)
+        LeaveAllocationPolicy.objects.create(
+            category="A", leave_type="annual", annual_allocation=20, rollover="carry_forward", carry_forward_cap=5,
+        )
+        veteran = User.objects.create_user("veteran", password="pw", date_joined=timezone.make_aware(timezone.datetime(2020, 3, 1)))
+        joiner = User.objects.create_user("joiner", password="pw", date_joined=timezone.make_aware(timezone.datetime(2027, 7, 15)))
+        self.veteran = Employee.objects.create(user=veteran, emp_no="ROLL-1", category="A")
+        self.joiner = Employee.objects.create(user=joiner, emp_no="ROLL-2", category="A")
+        LeaveBalance.objects.create(employee=self.veteran, leave_type="casual", total_allocated=12, used=3)
+        LeaveBalance.objects.create(employee=self.veteran, leave_type="annual", total_allocated=20, used=8)
+        LeaveBalance.objects.create(employee=self.joiner, leave_type="casual", total_allocated=12)
+
+    def _balances(self):
+        return {
+            (b.employee.emp_no, b.leave_type): (b.total_allocated, b.used)
+            for b in LeaveBalance.objects.select_related("employee")
+        }
+
+    def test_reset_carry_forward_cap_and_prorating(self):
+        summary = run_rollover(2027, "k1")
+        self.assertEqual(self._balances(), {
+            ("ROLL-1", "casual"): (12, 0),   # reset
+            ("ROLL-1", "annual"): (25, 0),   # 12 unused, capped at 5
+            ("ROLL-2", "casual"): (6, 0),    # joined in July: 6 of 12 months
+            ("ROLL-2", "annual"): (10, 0),   # created, pro-rated
+        })
+        annual = next(row for row in summary["policies"] if row["leave_type"] == "annual")
+        self.assertEqual((annual["updated"], annual["created"], annual["allocated_after"]), (1, 1, 35))
+
+    def test_preview_rolls_back_and_matches_the_real_run(self):
+        before = self._balances()
+        preview = run_rollover(2027, "k1", preview=True)
+        self.assertEqual(self._balances(), before)
+        self.assertFalse(LeaveRollover.objects.exists())
+        applied = run_rollover(2027, "k1")
+        self.assertEqual(applied["policies"], preview["policies"])
+
+    def test_same_key_is_applied_once(self):
+        run_rollover(2027, "k1")
+        debit_leave_balance(self.veteran, "casual", 1)
+        replay = run_rollover(2027, "k1")
+        self.assertTrue(replay["already_applied"])
+        self.assertEqual(self._balances()[("ROLL-1", "casual")], (12, 1))
+
+    def test_key_of_another_year_conflicts(self):
+        run_rollover(2027, "k1")
+        with self.assertRaises(RolloverKeyConflict):
+            run_rollover(2028, "k1")
+
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user("rollover-admin", password="pw", is_staff=True))
+        response = client.post("/api/leavebalances/rollover/", {"year": 2028, "key": "k1"}, format="json")
+        self.assertEqual((response.status_code, response.json()["year"]), (409, 2027))
+        response = client.post("/api/leavebalances/rollover/", {"year": 2028, "key": "k" * 101}, format="json")
+        self.assertEqual(response.status_code, 400)
+
+
+class JobBulkCreateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("bulk-user", password="pw")
+        self.employee = Employee.objects.create(user=self.user, emp_no="BULK-1", category="B")
+        LeaveBalance.objects.create(employee=self.employee, leave_type="sick", total_allocated=5)
+        LeaveBalance.objects.create(employee=self.employee, leave_type="casual", total_allocated=1)
+        Attendance.objects.create(employee=self.employee, login_time=timezone.now())
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def tearDown(self):
+        cache.clear()
+
+    def _post(self, jobs):
+        return self.client.post("/api/workentries/bulk/", {"jobs": jobs}, format="json")
+
+    def _on_duty(self, n=1):
+        return [{"status": "on_duty", "description": f"Task {i}", "start_time": "09:00", "end_time": "10:00"} for i in range(n)]
+
+    def _leave(self, leave_type):
+        return {"status": "leave", "leave_type": leave_type}
+
+    def test_on_duty_batch_is_created(self):
+        response = self._post(self._on_duty(3))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Job.objects.count(), 3)
+
+    def test_insufficient_balance_rolls_back_the_whole_batch(self):
+        response = self._post([self._leave("sick"), self._leave("casual"), self._leave("casual")])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"][1], {"error": "No casual leaves remaining!"})
+        # The sick debit succeeded before the casual one failed, and is undone too
+        self.assertEqual(dict(LeaveBalance.objects.values_list("leave_type", "used")), {"sick": 0, "casual": 0})
+        self.assertFalse(Job.objects.exists())
+        self.assertFalse(LeaveRecord.objects.exists())
+
+    def test_leave_and_on_duty_cannot_be_mixed(self):
+        response = self._post([*self._on_duty(), self._leave("sick")])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            {error["error"] for error in response.json()["errors"]},
+            {"Leave and on-duty entries cannot be submitted together."},
+        )
+        self.assertFalse(Job.objects.exists())
+        self.assertEqual(LeaveBalance.objects.get(leave_type="sick").used, 0)
+
+    def test_entry_limit(self):
+        response = self._post(self._on_duty(51))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "At most 50 jobs per request"})
+        self.assertEqual(self._post(self._on_duty(50)).status_code, 201)
+
+
+class JobRowSerializerTests(TestCase):
+    def setUp(self):
+        staff = Employee.objects.create(user=User.objects.create_user("rows-a", password="pw"), emp_no="ROWS-1", category="A")
+        office = Employee.objects.create(user=User.objects.create_user("rows-b", password="pw"), emp_no="ROWS-2")
+        # Just before midnight UTC, so the local date and the weekday name differ
+        login = datetime(2026, 3, 1, 23, 30, tzinfo=dt_timezone.utc)
+        closed = Attendance.objects.create(employee=staff, login_time=login, logout_time=login + timedelta(hours=9, seconds=5))
+        still_open = Attendance.objects.create(employee=office, login_time=login + timedelta(days=1))
+        Job.objects.create(
+            attendance=closed, description="Hull survey", start_time="08:00", end_time="12:30:15", job_no="J1",
+            ship_name="MV Test", location="Dock 2", holiday_worked=True, off_station=True, local_site=True, driv=True,
+        )
+        Job.objects.create(attendance=closed, description="Pump check")
+        Job.objects.create(attendance=still_open, status="leave", leave_type="sick", leave_reason="Fever")
+
+    def _render(self, data):
+        return JSONRenderer().render(data)
+
+    def assertSameBytes(self):
+        queryset = Job.objects.order_by("id")
+        self.assertEqual(
+            self._render(serialize_job_rows(job_rows(queryset))),
+            self._render(JobSerializer(queryset, many=True).data),
+        )
+
+    def test_matches_job_serializer_byte_for_byte(self):
+        self.assertSameBytes()
+
+    @override_settings(TIME_ZONE="Asia/Kolkata")
+    def test_matches_job_serializer_in_another_time_zone(self):
+        self.assertSameBytes()
+
+
+class CursorPaginationTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("pages-user", password="pw")
+        employee = Employee.objects.create(user=user, emp_no="PAGES-1", category="B")
+        self.attendance = Attendance.objects.create(employee=employee)
+        self.jobs = [Job.objects.create(attendance=self.attendance, description=f"Job {i}") for i in range(7)]
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+    def _walk(self, insert_after_first_page=0):
+        ids, url = [], "/api/workentries/?page_size=3"
+        while url:
+            body = self.client.get(url).json()
+            ids += [row["id"] for row in body["results"]]
+            url = body["next"]
+            for i in range(insert_after_first_page):
+                Job.objects.create(attendance=self.attendance, description=f"New {i}")
+            insert_after_first_page = 0
+        return ids
+
+    def test_inserts_while_paging_neither_repeat_nor_skip_rows(self):
+        ids = self._walk(insert_after_first_page=4)
+        self.assertEqual(ids, [job.pk for job in reversed(self.jobs)])
+
+    def test_equal_timestamps_page_by_id(self):
+        Job.objects.update(created_at=timezone.now())
+        self.assertEqual(self._walk(), [job.pk for job in reversed(self.jobs)])
+
+
+class CloseStaleAttendanceTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("stale-user", password="pw")
+        self.employee = Employee.objects.create(user=user, emp_no="STALE-1", category="B")
+        day = timezone.localdate() - timedelta(days=2)
+        self.stale = Attendance.objects.create(
+            employee=self.employee,
+            login_time=timezone.make_aware(timezone.datetime.combine(day, timezone.datetime.min.time()))
+            + timedelta(hours=20),
+        )
+        self.today = Attendance.objects.create(employee=self.employee)
+
+    def test_max_hours_stops_at_end_of_work_day(self):
+        summary = close_stale_attendance(policy="max_hours", hours=9)
+        self.assertEqual(summary["closed"], 1)
+        self.stale.refresh_from_db()
+        self.assertEqual(self.stale.work_date, timezone.localtime(self.stale.logout_time).date())
+        self.assertEqual(self.stale.duration, self.stale.logout_time - self.stale.login_time)
+        self.assertLess(self.stale.duration, timedelta(hours=4))
+        self.today.refresh_from_db()
+        self.assertIsNone(self.today.logout_time)
+
+    def test_max_hours_within_day(self):
+        self.stale.login_time -= timedelta(hours=12)
+        self.stale.save()
+        close_stale_attendance(policy="max_hours", hours=9)
+        self.stale.refresh_from_db()
+        self.assertEqual(self.stale.duration, timedelta(hours=9))
+        self.assertEqual(self.stale.logout_time, self.stale.login_time + timedelta(hours=9))
+
+    def test_logout_closes_todays_session_only(self):
+        close_stale_attendance()
+        client = APIClient()
+        client.force_authenticate(user=self.employee.user)
+        self.assertEqual(client.post("/api/attendance/logout/").status_code, 200)
+        self.assertEqual(client.post("/api/attendance/logout/").status_code, 400)
+        self.assertFalse(Attendance.objects.filter(logout_time__isnull=True).exists())
+
+
+class EmployeeTimeSheetTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("sheet-user", password="pw")
+        self.employee = Employee.objects.create(user=user, emp_no="SHEET-1", category="A")
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user("sheet-admin", password="pw", is_staff=True))
+        self.today = timezone.localdate()
+        for days_ago in (0, 1, 90):
+            login = timezone.now() - timedelta(days=days_ago)
+            attendance = Attendance.objects.create(
+                employee=self.employee, login_time=login, logout_time=login + timedelta(hours=8)
+            )
+            Job.objects.create(attendance=attendance, description=f"Job {days_ago}", job_no=f"J{days_ago}", driv=True)
+            Job.objects.create(attendance=attendance, description="", job_no=f"K{days_ago}", off_station=days_ago == 0)
+
+    def test_groups_days_in_default_window(self):
+        body = self.client.get(f"/api/timesheet/{self.employee.id}/").json()
+        self.assertEqual(body["end"], str(self.today))
+        self.assertEqual([row["date"] for row in body["results"]], [str(self.today), str(self.today - timedelta(days=1))])
+        self.assertEqual(body["results"][0], {
+            "date": str(self.today),
+            "day": self.today.strftime("%A"),
+            "job_details": "Job 0",
+            "job_no": "J0, K0",
+            "worked_on": "Driving, Off Station",
+            "duration": "8:00:00",
+        })
+        self.assertIsNone(body["previous"])
+
+    def test_next_skips_to_older_work(self):
+        body = self.client.get(f"/api/timesheet/{self.employee.id}/").json()
+        older = self.client.get(body["next"]).json()
+        self.assertEqual(older["end"], str(self.today - timedelta(days=90)))
+        self.assertEqual(len(older["results"]), 1)
+        self.assertIsNone(older["next"])
+        self.assertIsNotNone(older["previous"])
+
+    def test_rejects_oversized_window(self):
+        response = self.client.get(f"/api/timesheet/{self.employee.id}/", {"start": "2000-01-01", "end": "2020-01-01"})
+        self.assertEqual(response.status_code, 400)
+
+
+class DaywiseSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user("report-user", password="pw")
+        self.employee = Employee.objects.create(user=user, emp_no="REPORT-1", category="B")
+        self.day = timezone.localdate() - timedelta(days=3)
+        login = timezone.make_aware(timezone.datetime.combine(self.day, timezone.datetime.min.time())) + timedelta(hours=9)
+        attendance = Attendance.objects.create(employee=self.employee, login_time=login)
+        self.job = Job.objects.create(attendance=attendance, description="Hull survey", job_no="J1")
+        self.client = APIClient()
+        self.client.force_authenticate(user=user)
+
+    def _get(self, **headers):
+        return self.client.get("/api/daywise-report/", {"date": str(self.day)}, **headers)
+
+    def test_past_day_served_from_snapshot(self):
+        first = self._get()
+        with self.assertNumQueries(0):
+            second = self._get()
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(second["ETag"], first["ETag"])
+        with self.assertNumQueries(0):
+            self.assertEqual(self._get(HTTP_IF_NONE_MATCH=first["ETag"]).status_code, 304)
+
+    def test_write_to_day_replaces_snapshot(self):
+        etag = self._get()["ETag"]
+        self.job.description = "Pump inspection"
+        self.job.save()
+        response = self._get(HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()[0]["description"], "Pump inspection")
+
+    def test_username_change_replaces_snapshot(self):
+        self._get()
+        self.employee.user.username = "renamed-user"
+        self.employee.user.save()
+        self.assertEqual(self._get().json()[0]["employee"], "renamed-user")
+
+
+class EmployeeDaySummaryTests(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("summary-user", password="pw")
+        self.employee = Employee.objects.create(user=user, emp_no="SUMMARY-1", category="A")
+        self.day = timezone.localdate() - timedelta(days=2)
+        login = timezone.make_aware(timezone.datetime.combine(self.day, timezone.datetime.min.time())) + timedelta(hours=8)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.attendance = Attendance.objects.create(
+                employee=self.employee, login_time=login, logout_time=login + timedelta(hours=8)
+            )
+            self.job = Job.objects.create(attendance=self.attendance, description="Hull survey", job_no="J1", driv=True)
+            Job.objects.create(attendance=self.attendance, description="Pump check", job_no="J2")
+
+    def _summary(self, day=None):
+        return EmployeeDaySummary.objects.get(employee=self.employee, date=day or self.day)
+
+    def test_writes_keep_summary_current(self):
+        summary = self._summary()
+        self.assertEqual(summary.status, "on_duty")
+        self.assertEqual(summary.duration, timedelta(hours=8))
+        self.assertEqual(sorted(summary.job_no.split(", ")), ["J1", "J2"])
+        self.assertTrue(summary.driv)
+        self.assertEqual(summary.work_entries, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.delete()
+            LeaveRecord.objects.create(
+                employee=self.employee, leave_type="sick", start_date=self.day,
+                end_date=self.day + timedelta(days=1), total_days=2,
+            )
+        summary = self._summary()
+        self.assertEqual((summary.status, summary.leave_type, summary.job_no, summary.driv), ("leave", "sick", "J2", False))
+        self.assertEqual(self._summary(self.day + timedelta(days=1)).status, "leave")
+
+    def test_rebuild_matches_incremental_rows(self):
+        fields = ["status", "duration", "job_no", "job_details", "driv", "work_entries", "leave_type"]
+        before = EmployeeDaySummary.objects.values(*fields).get()
+        EmployeeDaySummary.objects.all().delete()
+        self.assertEqual(rebuild_day_summaries([self.day]), 1)
+        self.assertEqual(EmployeeDaySummary.objects.values(*fields).get(), before)
+
+    def test_timesheet_reads_only_summary(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user("summary-admin", password="pw", is_staff=True))
+        url = f"/api/timesheet/{self.employee.id}/"
+        live = client.get(url).json()["results"]
+        with self.assertNumQueries(3):  # employee exists, older work date, one summary range scan
+            summary = client.get(url, {"source": "summary"}).json()["results"]
+        self.assertEqual(summary, live)
+
+
+# 🔹 Dashboard stats
+
+class DailyStatsTests(TestCase):
+    def setUp(self):
+        self.day = timezone.localdate()
+        self.employees = [
+            Employee.objects.create(
+                user=User.objects.create_user(f"stats-{i}", password="pw"), emp_no=f"STATS-{i}", category="A",
+            )
+            for i in range(3)
+        ]
+
+    def _attend(self, employee):
+        return Attendance.objects.create(employee=employee, login_time=timezone.now())
+
+    def assertStatsMatchSource(self):
+        stats = get_daily_stats(self.day)
+        stats.refresh_from_db()
+        self.assertEqual({field: getattr(stats, field) for field in COUNTER_FIELDS}, compute_daily_stats(self.day))
+
+    def test_creates_and_deletes_keep_row_equal_to_source(self):
+        get_daily_stats(self.day)
+        first, second, third = self.employees
+
+        attendance = self._attend(first)
+        self.assertStatsMatchSource()
+        on_duty = Job.objects.create(attendance=attendance, description="Hull survey")
+        Job.objects.create(attendance=attendance, description="Pump check")
+        self.assertStatsMatchSource()
+        leave_job = Job.objects.create(attendance=self._attend(second), status="leave", leave_type="casual")
+        self.assertStatsMatchSource()
+        leave = LeaveRecord.objects.create(
+            employee=third, leave_type="sick", start_date=self.day - timedelta(days=1),
+            end_date=self.day + timedelta(days=1), total_days=3,
+        )
+        self.assertStatsMatchSource()
+        self.assertEqual(get_daily_stats(self.day).total_leave_today, 2)
+
+        on_duty.delete()
+        self.assertStatsMatchSource()
+        leave_job.delete()
+        self.assertStatsMatchSource()
+        leave.delete()
+        self.assertStatsMatchSource()
+        attendance.delete()
+        self.assertStatsMatchSource()
+        self.assertEqual(get_daily_stats(self.day).attendance_coverage, 1)
+
+    def test_write_before_first_store_is_counted(self):
+        stale = compute_daily_stats(self.day)
+        # Lands after the counters were computed, while no row exists to update
+        self._attend(self.employees[0])
+        stats = store_daily_stats(self.day, stale)
+        self.assertEqual(stats.attendance_coverage, 1)
+        self.assertStatsMatchSource()
+
+
+# 🔹 Seeding
+
+class SeedOrganisationTests(TestCase):
+    def setUp(self):
+        call_command(
+            "seed_organisation", employees=6, days=14, jobs_per_day=2, annual_leaves_per_year=30,
+            daily_leave_rate=0.2, prefix="t", stdout=io.StringIO(),
+        )
+        self.employees = Employee.objects.filter(emp_no__startswith="T-")
+
+    def test_seeds_consistent_rows(self):
+        self.assertEqual(self.employees.count(), 6)
+        self.assertTrue(User.objects.get(username="t_admin").is_superuser)
+        self.assertTrue(User.objects.get(username="t_00000").check_password("seed-password"))
+
+        attendances = Attendance.objects.filter(employee__in=self.employees)
+        self.assertTrue(attendances.exists())
+        for attendance in attendances:
+            self.assertEqual(attendance.work_date, Attendance.local_date(attendance.login_time))
+            self.assertNotEqual(attendance.work_date.weekday(), 6)
+        # Dated by their attendance, not by when the seeder ran
+        self.assertFalse(Job.objects.exclude(created_at=F("attendance__login_time")).exists())
+
+        annual = LeaveRecord.objects.filter(employee__in=self.employees, leave_type="annual")
+        self.assertTrue(annual.exists())
+        for leave in annual:
+            self.assertFalse(attendances.filter(
+                employee=leave.employee_id, work_date__range=(leave.start_date, leave.end_date),
+            ).exists())
+            self.assertIn(leave.employee_id, employees_on_leave(leave.end_date))
+
+        for balance in LeaveBalance.objects.filter(employee__in=self.employees):
+            taken = LeaveRecord.objects.filter(
+                employee=balance.employee_id, leave_type=balance.leave_type,
+            ).aggregate(days=Sum("total_days"))["days"] or 0
+            self.assertEqual(balance.used, taken)
+            self.assertLessEqual(balance.used, balance.total_allocated)
+
+        summarised = set(EmployeeDaySummary.objects.filter(
+            employee__in=self.employees, status="on_duty",
+        ).values_list("employee_id", "date"))
+        self.assertEqual(summarised, set(
+            attendances.filter(jobs__status="on_duty").values_list("employee_id", "work_date")
+        ))
+
+    def test_refuses_an_existing_prefix(self):
+        with self.assertRaises(CommandError):
+            call_command("seed_organisation", employees=1, days=1, prefix="t", stdout=io.StringIO())
+
+
+# 🔹 Async reports
+
+class RunConcurrentlyTests(TransactionTestCase):
+    def _run(self, query):
+        calls = []
+
+        def timer(execute, sql, params, many, context):
+            calls.append(sql)
+            return execute(sql, params, many, context)
+
+        async def request():
+            # Installed on the event loop's connection, like RequestMetricsMiddleware
+            with connections["default"].execute_wrapper(timer):
+                return await run_concurrently(a=query, b=query, c=query)
+
+        return async_to_sync(request)(), calls
+
+    def test_request_wrappers_do_not_stay_on_thread_connections(self):
+        seen = []
+
+        def query():
+            connection = connections["default"]
+            seen.append(connection)
+            return (len(connection.execute_wrappers), User.objects.count())
+
+        for _ in range(2):
+            results, calls = self._run(query)
+            self.assertEqual({wrappers for wrappers, _ in results.values()}, {1})
+            self.assertEqual(len(calls), 3)
+        for connection in seen:
+            self.assertEqual(connection.execute_wrappers, [])
+
+    def test_first_query_stays_on_shared_thread_and_pool_connections_are_reused(self):
+        threads, seen = [], []
+
+        def query():
+            threads.append(threading.get_ident())
+            seen.append(connections["default"])
+            return User.objects.count()
+
+        with mock.patch.dict(connections.settings["default"], {"CONN_MAX_AGE": 60}):
+            self._run(query)
+            pooled = [connection for connection in seen if connection is not connections["default"]]
+            self.assertEqual(len(pooled), 2)
+            self.assertTrue(all(connection.connection is not None for connection in pooled))
+        # async_to_sync from this thread makes it the shared thread
+        self.assertIn(threading.get_ident(), threads)
+        for connection in pooled:
+            connection.inc_thread_sharing()
+            connection.close()
+
+
+# 🔹 Monthly export
+
+class MonthlyExportTests(TestCase):
+    """The live (not yet closed) month export"""
+
+    def setUp(self):
+        admin = User.objects.create_user("export-admin", password="pw", is_staff=True)
+        self.employees = [
+            Employee.objects.create(user=User.objects.create_user(f"export-{i}", password="pw"), emp_no=f"EXPORT-{i}")
+            for i in range(3)
+        ]
+        first, second, _ = self.employees
+        day = timezone.make_aware(timezone.datetime(2026, 3, 4, 9))
+        attendance = Attendance.objects.create(employee=first, login_time=day)
+        Job.objects.create(attendance=attendance, description="Hull survey", job_no="J1")
+        Job.objects.create(attendance=attendance, description="Pump check", job_no="J2")
+        Job.objects.create(
+            attendance=Attendance.objects.create(employee=first, login_time=day + timedelta(days=1)),
+            status="leave", leave_type="sick",
+        )
+        # Starts in February: only its March days show
+        LeaveRecord.objects.create(
+            employee=second, leave_type="annual", start_date=date(2026, 2, 27), end_date=date(2026, 3, 2), total_days=4,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=admin)
+
+    def _export(self, output):
+        response = self.client.get("/api/timesheet/monthly/export/", {"month": "2026-03", "output": output})
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_has_every_day_of_every_employee(self):
+        lines = self._export("csv").splitlines()
+        self.assertEqual(lines[0], "employee,emp_no,date,day,job_details,job_no,holiday_worked,off_station,local_site,driv")
+        self.assertEqual(len(lines), 1 + 3 * 31)
+        self.assertIn("export-0,EXPORT-0,2026-03-04,Wednesday,Pump check,J2,False,False,False,False", lines)
+        self.assertIn("export-0,EXPORT-0,2026-03-05,Thursday,Leave: sick,-,False,False,False,False", lines)
+        self.assertIn("export-1,EXPORT-1,2026-03-02,Monday,Annual Leave,-,False,False,False,False", lines)
+        self.assertIn("export-1,EXPORT-1,2026-03-03,Tuesday,-,-,False,False,False,False", lines)
+
+    def test_ndjson_matches_the_monthly_timesheet_view(self):
+        lines = [json.loads(line) for line in self._export("ndjson").splitlines()]
+        self.assertEqual([line["emp_no"] for line in lines], ["EXPORT-0", "EXPORT-1", "EXPORT-2"])
+        for employee, line in zip(self.employees, lines):
+            view = self.client.get("/api/timesheet/monthly/", {"employee": employee.pk, "month": "2026-03"}).json()
+            self.assertEqual(line, {key: view[key] for key in ("employee", "emp_no", "month", "data")})
+
+    def test_small_chunks_merge_the_same_rows(self):
+        expected = "".join(stream_monthly_csv(2026, 3))
+        chunked = "".join(stream_monthly_csv(2026, 3, iter_monthly_timesheets(2026, 3, chunk_size=1)))
+        self.assertEqual(chunked, expected)
+
+
+# 🔹 Month close
+
+class MonthCloseFixture:
+    def setUp(self):
+        cache.clear()
+        admin = User.objects.create_user("payroll-admin", password="pw", is_staff=True)
+        user = User.objects.create_user("close-user", password="pw")
+        self.employee = Employee.objects.create(user=user, emp_no="CLOSE-1", category="A")
+        self.day = (timezone.localdate().replace(day=1) - timedelta(days=1)).replace(day=10)
+        self.month = self.day.strftime("%Y-%m")
+        login = timezone.make_aware(timezone.datetime.combine(self.day, timezone.datetime.min.time())) + timedelta(hours=8)
+        attendance = Attendance.objects.create(employee=self.employee, login_time=login, logout_time=login + timedelta(hours=8))
+        self.job = Job.objects.create(attendance=attendance, description="Hull survey", job_no="J1", driv=True)
+        self.client = APIClient()
+        self.client.force_authenticate(user=admin)
+
+    def tearDown(self):
+        cache.clear()
+
+
+class MonthCloseTests(MonthCloseFixture, TestCase):
+    def _row(self):
+        response = self.client.get("/api/timesheet/monthly/", {"employee": self.employee.id, "month": self.month})
+        return response.json()["closed"], response.json()["data"][self.day.day - 1]
+
+    def test_closed_month_served_from_snapshot(self):
+        live = self.client.get("/api/timesheet/monthly/", {"employee": self.employee.id, "month": self.month}).json()
+        response = self.client.post("/api/month-closes/close/", {"month": self.month}, format="json")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()["employees"], 1)
+        closed = self.client.get("/api/timesheet/monthly/", {"employee": self.employee.id, "month": self.month}).json()
+        self.assertTrue(closed.pop("closed"))
+        live.pop("closed")
+        self.assertEqual(closed, live)
+
+        self.job.description = "Pump check"
+        self.job.save()
+        self.assertEqual(self._row()[1]["job_details"], "Hull survey")
+        self.assertTrue(MonthClose.objects.get().needs_reclose)
+
+        close_month(self.day.year, self.day.month)
+        self.assertEqual(self._row()[1]["job_details"], "Pump check")
+        self.assertFalse(MonthClose.objects.get().needs_reclose)
+
+    def test_reopen_returns_to_live_data(self):
+        close_month(self.day.year, self.day.month)
+        self.job.description = "Pump check"
+        self.job.save()
+        self.assertEqual(self.client.post("/api/month-closes/reopen/", {"month": self.month}, format="json").status_code, 204)
+        closed, row = self._row()
+        self.assertFalse(closed)
+        self.assertEqual(row["job_details"], "Pump check")
+        self.assertEqual(self.client.post("/api/month-closes/reopen/", {"month": self.month}, format="json").status_code, 404)
+
+    def test_export_streams_snapshot(self):
+        close_month(self.day.year, self.day.month)
+        self.job.description = "Pump check"
+        self.job.save()
+        response = self.client.get("/api/timesheet/monthly/export/", {"month": self.month})
+        body = b"".join(response.streaming_content).decode()
+        self.assertIn("Hull survey", body)
+        self.assertNotIn("Pump check", body)
+
+
+class AsyncMonthCloseTests(MonthCloseFixture, TransactionTestCase):
+    # Worker threads read on their own connections, so the fixture must be committed
+    def test_async_view_serves_snapshot_and_falls_back_for_new_employees(self):
+        close_month(self.day.year, self.day.month)
+        self.job.description = "Pump check"
+        self.job.save()
+        joiner = Employee.objects.create(user=User.objects.create_user("late-joiner", password="pw"), emp_no="CLOSE-2")
+        admin = User.objects.get(username="payroll-admin")
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {ClaimsRefreshToken.for_user(admin).access_token}")
+        for employee in (self.employee, joiner):
+            params = {"employee": employee.id, "month": self.month}
+            self.assertEqual(
+                client.get("/api/async/timesheet/monthly/", params).json(),
+                self.client.get("/api/timesheet/monthly/", params).json(),
+            )
+        response = client.get("/api/async/timesheet/monthly/", {"employee": self.employee.id, "month": self.month})
+        self.assertEqual(response.json()["data"][self.day.day - 1]["job_details"], "Hull survey")
+
+
+# 🔹 Conditional GETs
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("mobile-user", password="pw", is_staff=True)
+        self.employee = Employee.objects.create(user=self.user, emp_no="MOBILE-1", category="A")
+        LeaveBalance.objects.create(employee=self.employee, leave_type="casual", total_allocated=5)
+        self.day = timezone.localdate().replace(day=1)
+        self.month = self.day.strftime("%Y-%m")
+        self.client = APIClient()
+        token = ClaimsRefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.urls = [
+            ("/api/profile/", {}),
+            ("/api/employees/me/", {}),
+            ("/api/leavebalances/me/", {}),
+            ("/api/timesheet/monthly/", {"employee": self.employee.id, "month": self.month}),
+            (f"/api/timesheet/{self.employee.id}/", {}),
+        ]
+
+    def tearDown(self):
+        cache.clear()
+
+    def _revalidate(self, url, params, etag):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_reads_answer_304_without_queries(self):
+        for url, params in self.urls:
+            first = self.client.get(url, params)
+            self.assertEqual(first.status_code, 200, url)
+            with self.assertNumQueries(0):
+                response = self._revalidate(url, params, first["ETag"])
+            self.assertEqual(response.status_code, 304, url)
+            self.assertEqual(response["ETag"], first["ETag"])
+
+    def test_writes_change_the_etag(self):
+        etags = {url: self.client.get(url, params)["ETag"] for url, params in self.urls}
+        login = timezone.make_aware(timezone.datetime.combine(self.day, timezone.datetime.min.time())) + timedelta(hours=8)
+        attendance = Attendance.objects.create(employee=self.employee, login_time=login)
+        Job.objects.create(attendance=attendance, description="Hull survey", job_no="J1")
+        debit_leave_balance(self.employee, "casual", 1)
+        for url, params in self.urls:
+            self.assertEqual(self._revalidate(url, params, etags[url]).status_code, 200, url)
+
+        url, params = self.urls[2]
+        self.assertEqual(self.client.get(url, params).json()[0]["used"], 1)
+
+    def test_month_close_changes_monthly_etag(self):
+        url, params = self.urls[3]
+        etag = self.client.get(url, params)["ETag"]
+        close_month(self.day.year, self.day.month)
+        response = self._revalidate(url, params, etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.json()["closed"])
+
+
+# 🔹 Request metrics
+
+class RequestMetricsTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = directory.name
+        self.enterContext(override_settings(METRICS_DIR=self.directory, METRICS_FLUSH_INTERVAL=0))
+        self.registry = Registry()
+        self.enterContext(mock.patch("timesheet.middleware.registry", self.registry))
+        self.enterContext(mock.patch("timesheet.views.registry", self.registry))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user("metrics-admin", password="pw", is_staff=True))
+
+    def test_endpoint_sums_requests_of_every_worker(self):
+        self.client.get("/api/employees/")
+        self.client.get("/api/employees/")
+        # Another worker's last snapshot
+        with open(os.path.join(self.directory, "other-worker.json"), "w") as fh:
+            json.dump([["employee-list", "GET", 1, 0.02, [0, 0, 1] + [0] * 9, 3, 0.001, 10, {"200": 1}]], fh)
+
+        response = self.client.get("/api/metrics/")
+        self.assertEqual(response.status_code, 200)
+        lines = response.content.decode().splitlines()
+        labels = 'endpoint="employee-list",method="GET"'
+        self.assertIn("# TYPE timesheet_http_requests_total counter", lines)
+        self.assertIn("# TYPE timesheet_http_request_duration_seconds histogram", lines)
+        self.assertIn(f'timesheet_http_requests_total{{{labels},status="200"}} 3', lines)
+        self.assertIn(f'timesheet_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} 3', lines)
+        self.assertIn(f"timesheet_http_request_duration_seconds_count{{{labels}}} 3", lines)
+
+        buckets = [
+            int(line.rsplit(" ", 1)[1]) for line in lines
+            if line.startswith(f"timesheet_http_request_duration_seconds_bucket{{{labels}")
+        ]
+        self.assertEqual(buckets, sorted(buckets))
+        queries = next(line for line in lines if line.startswith(f"timesheet_db_queries_total{{{labels}"))
+        self.assertGreater(int(queries.rsplit(" ", 1)[1]), 3)
+
+    def test_concurrent_flushes_leave_one_complete_file(self):
+        self.registry.observe("employee-list", "GET", 200, 0.01, 1, 0.001, 10)
+        threads = [threading.Thread(target=self.registry._maybe_flush, kwargs={"force": True}) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        names = os.listdir(self.directory)
+        self.assertEqual(len(names), 1)
+        self.assertTrue(names[0].endswith(".json"))
+        with open(os.path.join(self.directory, names[0])) as fh:
+            self.assertEqual(json.load(fh)[0][:3], ["employee-list", "GET", 1])
+
+    def test_unwritable_directory_never_fails_the_request(self):
+        blocker = os.path.join(self.directory, "not-a-directory")
+        open(blocker, "w").close()
+        with override_settings(METRICS_DIR=os.path.join(blocker, "metrics")), self.assertLogs("timesheet.metrics"):
+            self.assertEqual(self.client.get("/api/employees/").status_code, 200)
+            response = self.client.get("/api/metrics/")
+        self.assertIn('timesheet_http_requests_total{endpoint="employee-list",method="GET",status="200"} 1', response.content.decode())
@@ -0,0 +1,252 @@
+import calendar
+import csv
+import json
+from datetime import date, timedelta
+from itertools import groupby
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import OuterRef, Subquery
+
+from .aggregates import bool_or, string_agg
+from .models import Attendance, Employee, EmployeeDaySummary, Job, LeaveRecord
+
+MONTH_FLAGS = ["holiday_worked", "off_station", "local_site", "driv"]
+CSV_HEADER = ["employee", "emp_no", "date", "day", "job_details", "job_no"] + MONTH_FLAGS
+WORKED_ON_LABELS = {
+    "holiday_worked": "Holiday Worked",
+    "off_station": "Off Station",
+    "local_site": "Local Site",
+    "driv": "Driving",
+}
+
+
+# 🔹 Day filling rules shared by monthly_timesheet and the monthly export
+
+def month_bounds(year, month):
+    days_in_month = calendar.monthrange(year, month)[1]
+    return date(year, month, 1), date(year, month, days_in_month)
+
+
+def blank_month(year, month):
+    """One placeholder row per day of the month, keyed by day number"""
+    days_in_month = calendar.monthrange(year, month)[1]
+    return {
+        d: {
+            "date": d,
+            "day": date(year, month, d).strftime("%A"),
+            "job_details": "-",
+            "job_no": "-",
+            "holiday_worked": False,
+            "off_station": False,
+            "local_site": False,
+            "driv": False,
+        }
+        for d in range(1, days_in_month + 1)
+    }
+
+
+def apply_job(row, status, leave_type, description, job_no):
+    """Later jobs on the same day overwrite earlier ones"""
+    if status == "leave":
+        row["job_details"] = f"Leave: {leave_type}"
+    else:
+        row["job_details"] = description or "-"
+        row["job_no"] = job_no or "-"
+
+
+def apply_annual_leave(data, year, month, start_date, end_date):
+    first, last = month_bounds(year, month)
+    cur = max(start_date, first)
+    while cur <= min(end_date, last):
+        data[cur.day]["job_details"] = "Annual Leave"
+        cur += timedelta(days=1)
+
+
+def month_jobs(year, month):
+    """(employee_id, work_date, status, leave_type, description, job_no) in employee and day order"""
+    first, last = month_bounds(year, month)
+    return Job.objects.filter(
+        attendance__work_date__range=(first, last),
+    ).order_by(
+        "attendance__employee_id", "attendance__work_date", "attendance_id", "id",
+    ).values_list(
+        "attendance__employee_id", "attendance__work_date",
+        "status", "leave_type", "description", "job_no",
+    )
+
+
+def month_annual_leaves(year, month):
+    """(employee_id, start_date, end_date) of annual leave overlapping the month"""
+    first, last = month_bounds(year, month)
+    return LeaveRecord.objects.filter(
+        leave_type="annual",
+        start_date__lte=last,
+        end_date__gte=first,
+    ).order_by("employee_id", "start_date").values_list("employee_id", "start_date", "end_date")
+
+
+def fill_month(year, month, jobs, annual_leaves):
+    """Build the month rows for one employee from its month_jobs / month_annual_leaves rows"""
+    data = blank_month(year, month)
+    for _, work_date, status, leave_type, description, job_no in jobs:
+        apply_job(data[work_date.day], status, leave_type, description, job_no)
+    for _, start_date, end_date in annual_leaves:
+        apply_annual_leave(data, year, month, start_date, end_date)
+    return data
+
+
+# 🔹 Streaming export for all employees
+
+def iter_monthly_timesheets(year, month, chunk_size=2000):
+    """
+    Yield (employee, rows) for every employee, reading employees, jobs and annual
+    leave as three cursors merged in employee order so only one employee's month
+    is held in memory at a time.
+    """
+    employees = Employee.objects.select_related("user").order_by("id").iterator(chunk_size=chunk_size)
+    jobs = groupby(month_jobs(year, month).iterator(chunk_size=chunk_size), key=lambda r: r[0])
+    leaves = groupby(month_annual_leaves(year, month).iterator(chunk_size=chunk_size), key=lambda r: r[0])
+
+    next_jobs = next(jobs, None)
+    next_leaves = next(leaves, None)
+
+    for employee in employees:
+        employee_jobs = []
+        while next_jobs and next_jobs[0] <= employee.id:
+            if next_jobs[0] == employee.id:
+                employee_jobs = list(next_jobs[1])
+            next_jobs = next(jobs, None)
+
+        employee_leaves = []
+        while next_leaves and next_leaves[0] <= employee.id:
+            if next_leaves[0] == employee.id:
+                employee_leaves = list(next_leaves[1])
+            next_leaves = next(leaves, None)
+
+        yield employee, fill_month(year, month, employee_jobs, employee_leaves).values()
+
+
+class _Echo:
+    """File-like object for csv.writer that hands each line back instead of buffering it"""
+    def write(self, value):
+        return value
+
+
+def stream_monthly_csv(year, month, timesheets=None):
+    """timesheets: (employee, rows) pairs, by default computed with iter_monthly_timesheets"""
+    writer = csv.writer(_Echo())
+    yield writer.writerow(CSV_HEADER)
+    for employee, rows in timesheets or iter_monthly_timesheets(year, month):
+        for row in rows:
+            yield writer.writerow(
+                [employee.user.username, employee.emp_no, date(year, month, row["date"]).isoformat(),
+                 row["day"], row["job_details"], row["job_no"]]
+                + [row[flag] for flag in MONTH_FLAGS]
+            )
+
+
+def stream_monthly_ndjson(year, month, timesheets=None):
+    """One line per employee, shaped like the monthly_timesheet response"""
+    month_str = f"{year:04d}-{month:02d}"
+    for employee, rows in timesheets or iter_monthly_timesheets(year, month):
+        yield json.dumps({
+            "employee": employee.user.username,
+            "emp_no": employee.emp_no,
+            "month": month_str,
+            "data": list(rows),
+        }, cls=DjangoJSONEncoder) + "\n"
+
+
+# 🔹 One employee's timesheet, grouped per work date in SQL
+
+def employee_days(employee_id, start, end):
+    """
+    One row per work date in [start, end], newest first, from a single GROUP BY
+    over attendance and jobs. Duration is the day's first session, as before.
+    """
+    first_session = Attendance.objects.filter(
+        employee_id=employee_id, work_date=OuterRef("work_date")
+    ).order_by("login_time").values("duration")[:1]
+
+    days = (
+        Attendance.objects.filter(employee_id=employee_id, work_date__range=(start, end))
+        .values("work_date")
+        .annotate(
+            job_details=string_agg("jobs__description", order_by=("-login_time", "jobs__id")),
+            job_no=string_agg("jobs__job_no", order_by=("-login_time", "jobs__id")),
+            duration=Subquery(first_session),
+            **{flag: bool_or(f"jobs__{flag}") for flag in WORKED_ON_LABELS},
+        )
+        .order_by("-work_date")
+    )
+    return [
+        {
+            "date": day["work_date"],
+            "day": day["work_date"].strftime("%A"),
+            "job_details": day["job_details"] or "-",
+            "job_no": day["job_no"] or "-",
+            "worked_on": ", ".join(sorted(
+                label for flag, label in WORKED_ON_LABELS.items() if day[flag]
+            )) or "-",
+            "duration": str(day["duration"]) if day["duration"] else "-",
+        }
+        for day in days
+    ]
+
+
+def previous_work_date(employee_id, before):
+    """Latest work date before `before`, so paging skips empty windows"""
+    return Attendance.objects.filter(employee_id=employee_id, work_date__lt=before).order_by(
+        "-work_date"
+    ).values_list("work_date", flat=True).first()
+
+
+# 🔹 The same reports read from EmployeeDaySummary (?source=summary)
+
+def worked_on_labels(row):
+    return ", ".join(sorted(label for flag, label in WORKED_ON_LABELS.items() if row[flag])) or "-"
+
+
+def summary_description(leave_type, job_details):
+    if leave_type == "annual":
+        return "Annual Leave"
+    if leave_type:
+        return f"Leave: {leave_type}"
+    return job_details or "-"
+
+
+def summary_days(employee_id, start, end):
+    """summary rows of one employee in [start, end], newest first: one index range scan"""
+    return EmployeeDaySummary.objects.filter(
+        employee_id=employee_id, date__range=(start, end)
+    ).order_by("-date").values(
+        "date", "status", "duration", "job_no", "job_details", "leave_type", *MONTH_FLAGS
+    )
+
+
+def summary_employee_days(employee_id, start, end):
+    """employee_days() rows from the summary table; duration is the whole day's"""
+    return [
+        {
+            "date": row["date"],
+            "day": row["date"].strftime("%A"),
+            "job_details": row["job_details"] or "-",
+            "job_no": row["job_no"] or "-",
+            "worked_on": worked_on_labels(row),
+            "duration": str(row["duration"]) if row["duration"] else "-",
+        }
+        for row in summary_days(employee_id, start, end)
+    ]
+
+
+def summary_month(employee_id, year, month):
+    """fill_month() rows from the summary table; a day's jobs are joined instead of the last one winning"""
+    data = blank_month(year, month)
+    for row in summary_days(employee_id, *month_bounds(year, month)):
+        day = data[row["date"].day]
+        day["job_details"] = summary_description(row["leave_type"], row["job_details"])
+        if row["status"] != "leave":
+            day["job_no"] = row["job_no"] or "-"
+        for flag in MONTH_FLAGS:
+            day[flag] = row[flag]
+    return data
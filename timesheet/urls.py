@@ -2,7 +2,7 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     AttendanceLoginView, AttendanceLogoutView, JobListCreateView,
-    JobDetailView, AdminManageEmployee, LoginView, SuspendEmployeeView,AdminLeaveViewSet, AdminLeaveBalanceViewSet,EmployeeTimeSheetView,employee_profile, AttendanceStatusView,daywise_report,monthly_timesheet,monthly_leave_report_employee,my_leave_balances, ProfileView, ApplyLeaveAPIView, dashboard_today_stats
+    JobDetailView, JobBulkCreateView, JobSearchView, AdminManageEmployee, LoginView, SuspendEmployeeView,AdminLeaveViewSet, AdminLeaveBalanceViewSet,EmployeeTimeSheetView,employee_profile, AttendanceStatusView,daywise_report,monthly_timesheet,monthly_timesheet_export,monthly_leave_report_employee,my_leave_balances, ProfileView, ApplyLeaveAPIView, dashboard_today_stats, request_metrics, MonthCloseViewSet
 )
 from .admin_profile_views import (
     AdminProfileView,
@@ -12,11 +12,13 @@ from .admin_profile_views import (
 )
 
 from .views_admin_manage import ManageAdminsView, DeleteAdminView
+from . import async_views
 
 router = DefaultRouter()
 router.register(r'employees', AdminManageEmployee, basename='employee')
 router.register(r'leaves', AdminLeaveViewSet, basename='leave') 
 router.register(r'leavebalances', AdminLeaveBalanceViewSet, basename='leavebalance')
+router.register(r'month-closes', MonthCloseViewSet, basename='month-close')
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
@@ -25,10 +27,13 @@ urlpatterns = [
     path('attendance/status/', AttendanceStatusView.as_view(), name='attendance-status'),
     path("profile/", ProfileView.as_view(), name="user-profile"),
     path("dashboard/today/", dashboard_today_stats),
+    path("metrics/", request_metrics, name="metrics"),
 
 
 
     path('workentries/', JobListCreateView.as_view(), name='workentry-list'),
+    path('workentries/bulk/', JobBulkCreateView.as_view(), name='workentry-bulk'),
+    path('workentries/search/', JobSearchView.as_view(), name='workentry-search'),
     path('workentries/<int:pk>/', JobDetailView.as_view(), name='workentry-detail'),
 
     path('employees/<int:pk>/suspend/', SuspendEmployeeView.as_view(), name='suspend-employee'),
@@ -40,10 +45,16 @@ urlpatterns = [
     path("leavebalances/me/", my_leave_balances, name="my-leave-balances"),
 
     path("timesheet/monthly/", monthly_timesheet),
+    path("timesheet/monthly/export/", monthly_timesheet_export),
 
     path("daywise-report/", daywise_report),
     path("leaves/report/employee/", monthly_leave_report_employee),
 
+    # Async variants for ASGI deployments (same parameters and responses)
+    path("async/dashboard/today/", async_views.dashboard_today_stats, name="async-dashboard-today"),
+    path("async/daywise-report/", async_views.daywise_report, name="async-daywise-report"),
+    path("async/timesheet/monthly/", async_views.monthly_timesheet, name="async-monthly-timesheet"),
+
     path('', include(router.urls)),
 
     path("admin/profile/", AdminProfileView.as_view()),
@@ -1,10 +1,134 @@
-from datetime import date
-from .models import LeaveRecord
+from datetime import date, timedelta
+
+from django.db import connection
+from django.db.models import F, Func
+
+from .models import LeaveBalance, LeaveDay, LeaveRecord
+from .versions import bump_employees
+
+
+def uses_leave_range_index():
+    """Postgres answers leave lookups from a GiST daterange index, others from LeaveDay"""
+    return connection.vendor == "postgresql"
+
+
+def supports_update_returning():
+    """Whether UPDATE ... RETURNING can be used on the default connection"""
+    # Django has no feature flag for UPDATE ... RETURNING. PostgreSQL always
+    # supports it, and SQLite added RETURNING to INSERT, UPDATE and DELETE in
+    # the same release (3.35), which is exactly when Django sets the bulk-insert
+    # flag for SQLite. MySQL and MariaDB have no UPDATE ... RETURNING at all.
+    return connection.vendor in ("postgresql", "sqlite") and connection.features.can_return_rows_from_bulk_insert
+
+
+class LeaveBalanceMissing(Exception):
+    pass
+
+
+class InsufficientLeaveBalance(Exception):
+    pass
+
+
+def debit_leave_balance(employee, leave_type, days):
+    """
+    Take days from a leave balance in one conditional UPDATE, so concurrent
+    debits can never overdraw it. Returns the new (used, total_allocated)
+    where the database supports UPDATE ... RETURNING, otherwise None.
+    Raises LeaveBalanceMissing or InsufficientLeaveBalance when no row changed.
+    """
+    employee_id = getattr(employee, "pk", employee)
+    if supports_update_returning():
+        qn = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(LeaveBalance._meta.db_table)} SET {qn('used')} = {qn('used')} + %s "
+                f"WHERE {qn('employee_id')} = %s AND {qn('leave_type')} = %s "
+                f"AND {qn('used')} + %s <= {qn('total_allocated')} "
+                f"RETURNING {qn('used')}, {qn('total_allocated')}",
+                [days, employee_id, leave_type, days],
+            )
+            row = cursor.fetchone()
+        if row is not None:
+            bump_employees([employee_id])
+            return row
+    elif LeaveBalance.objects.filter(
+        employee_id=employee_id, leave_type=leave_type, used__lte=F("total_allocated") - days,
+    ).update(used=F("used") + days):
+        bump_employees([employee_id])
+        return None
+
+    # Only a failed debit pays for the read that explains it
+    if not LeaveBalance.objects.filter(employee_id=employee_id, leave_type=leave_type).exists():
+        raise LeaveBalanceMissing(leave_type)
+    raise InsufficientLeaveBalance(leave_type)
+
+
+def leave_records_on(check_date):
+    """LeaveRecord queryset of every leave covering check_date"""
+    if uses_leave_range_index():
+        from django.contrib.postgres.fields import DateRangeField
+
+        # Must match the expression of the leaverecord_period_gist index
+        period = Func(
+            F("start_date"), F("end_date"),
+            template="daterange(%(expressions)s, '[]')",
+            output_field=DateRangeField(),
+        )
+        return LeaveRecord.objects.filter(
+            start_date__isnull=False,
+            end_date__isnull=False,
+        ).alias(period=period).filter(period__contains=check_date)
+
+    return LeaveRecord.objects.filter(days__date=check_date)
+
+
+def employees_on_leave(check_date):
+    """Set of employee ids on leave on check_date"""
+    if uses_leave_range_index():
+        return set(leave_records_on(check_date).values_list("employee_id", flat=True))
+    return set(LeaveDay.objects.filter(date=check_date).values_list("employee_id", flat=True))
+
 
 def is_employee_on_leave(employee, check_date=None):
     check_date = check_date or date.today()
-    return LeaveRecord.objects.filter(
-        employee=employee,
-        start_date__lte=check_date,
-        end_date__gte=check_date
-    ).exists()
\ No newline at end of file
+    employee_id = getattr(employee, "pk", employee)
+    if uses_leave_range_index():
+        return leave_records_on(check_date).filter(employee_id=employee_id).exists()
+    return LeaveDay.objects.filter(employee_id=employee_id, date=check_date).exists()
+
+
+def sync_leave_days(leave):
+    """Rewrite the LeaveDay rows of one leave record (no-op on Postgres)"""
+    if uses_leave_range_index():
+        return
+    LeaveDay.objects.filter(leave=leave).delete()
+    if not leave.start_date or not leave.end_date:
+        return
+    LeaveDay.objects.bulk_create(
+        LeaveDay(leave=leave, employee_id=leave.employee_id, date=leave.start_date + timedelta(days=i))
+        for i in range((leave.end_date - leave.start_date).days + 1)
+    )
+
+
+def bulk_expand_leave_days(leaves, batch_size=5000):
+    """
+    Create LeaveDay rows for a LeaveRecord queryset inserted with bulk_create,
+    which skips the signal that normally does it (no-op on Postgres).
+    """
+    if uses_leave_range_index():
+        return 0
+
+    created = 0
+    batch = []
+    rows = leaves.filter(
+        start_date__isnull=False, end_date__isnull=False
+    ).values_list("id", "employee_id", "start_date", "end_date")
+    for leave_id, employee_id, start, end in rows.iterator():
+        for offset in range((end - start).days + 1):
+            batch.append(LeaveDay(leave_id=leave_id, employee_id=employee_id, date=start + timedelta(days=offset)))
+        if len(batch) >= batch_size:
+            LeaveDay.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+    LeaveDay.objects.bulk_create(batch)
+    return created + len(batch)
@@ -0,0 +1,91 @@
+"""
+Change counters behind conditional GETs.
+
+Every write that can change what an employee sees in their profile, leave
+balances or timesheets bumps that employee's counter. Closing, re-closing or
+reopening a payroll month bumps the month's counter. Profile, balance and
+timesheet endpoints hash the counters they depend on, together with the
+request, into an ETag. A matching If-None-Match is answered with 304 after
+one cache read, before any query or serializer runs.
+
+Counters are random tokens rather than integers: a counter evicted from the
+cache comes back as a new token, never as a value an old ETag was built from.
+Bumps happen now and again on commit, like the other cache invalidations, and
+views read the counters before building the response. A write landing during
+a build can therefore only cost the client one extra full response.
+"""
+import hashlib
+import json
+import uuid
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+
+def employee_scope(employee_id):
+    return f"employee:{employee_id}"
+
+
+def month_scope(year, month):
+    return f"month:{year:04d}-{month:02d}"
+
+
+def _key(scope):
+    return f"version:{scope}"
+
+
+def current_versions(scopes):
+    """The current token of every scope, created for scopes not seen yet"""
+    keys = [_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = [key for key in keys if key not in found]
+    for key in missing:
+        # add(): two first readers agree on one token
+        cache.add(key, uuid.uuid4().hex, None)
+    if missing:
+        found.update(cache.get_many(missing))
+    return [found.get(key) for key in keys]
+
+
+def bump(scopes):
+    """Give these scopes new tokens now and again on commit"""
+    keys = [_key(scope) for scope in scopes]
+    if not keys:
+        return
+
+    def renew():
+        cache.set_many({key: uuid.uuid4().hex for key in keys}, None)
+
+    renew()
+    transaction.on_commit(renew)
+
+
+def bump_employees(employee_ids):
+    bump([employee_scope(employee_id) for employee_id in set(employee_ids) if employee_id])
+
+
+# 🔹 Views
+
+def conditional(request, scopes, *extra):
+    """
+    (etag, response) for a read that depends on these scopes; response is a 304
+    when the client already holds this version, else None. extra holds anything
+    else the body depends on, such as today's date.
+    """
+    renderer = getattr(request, "accepted_renderer", None)
+    parts = [
+        request.get_full_path(), str(request.user.pk), renderer and renderer.format,
+        [str(value) for value in extra], current_versions(scopes),
+    ]
+    digest = hashlib.md5(json.dumps(parts).encode(), usedforsecurity=False).hexdigest()
+    etag = f'"{digest}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    return etag, not_modified and tagged(not_modified, etag)
+
+
+def tagged(response, etag):
+    """Attach the ETag; clients must revalidate, and shared caches keep out"""
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
@@ -1,23 +1,44 @@
 from rest_framework import generics, permissions, viewsets, status
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 from rest_framework.views import APIView
 from django.utils import timezone
-from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
-from .models import Attendance, Job, Employee, LeaveRecord, LeaveBalance
-from .serializers import AttendanceSerializer, JobSerializer, EmployeeSerializer, LeaveRecordSerializer,LeaveBalanceSerializer,LeaveApplySerializer
+from .models import Attendance, DailyStats, Job, Employee, LeaveRecord, LeaveBalance, LeaveRollover, MonthClose
+from .serializers import AttendanceSerializer, JobSerializer, EmployeeSerializer, LeaveRecordSerializer,LeaveBalanceSerializer,LeaveApplySerializer, MonthCloseSerializer
 from rest_framework.permissions import AllowAny
 from rest_framework.authentication import BasicAuthentication
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
-from django.db.models import Prefetch
-from collections import defaultdict
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+import csv
+from collections import Counter
 from rest_framework.permissions import IsAuthenticated
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from rest_framework import serializers
-import calendar
-from django.db import transaction
-from .utils import is_employee_on_leave
+from django.db import IntegrityError, transaction
+from .reports import daywise_jobs, daywise_leaves, daywise_rows, summary_daywise_rows
+from .report_cache import daywise_snapshot, etag_for, invalidate_daywise
+from .day_summary import summaries_changed, wants_summary
+from .month_close import close_month, days_changed, get_month_close, iter_closed_month, month_snapshot, parse_month, reopen_month
+from .stats import get_daily_stats, rebuild_tracked_days, summary_daily_stats
+from .day_state import get_day_state, invalidate_day_state
+from .timesheets import (
+    employee_days, fill_month, month_annual_leaves, month_jobs, previous_work_date,
+    stream_monthly_csv, stream_monthly_ndjson, summary_employee_days, summary_month,
+)
+from .pagination import CreatedAtCursorPagination, LoginTimeCursorPagination, SearchPagination, TimesheetCursorPagination
+from .search import search_jobs
+from .fast_serializers import job_rows, serialize_job_rows
+from .metrics import registry, render_prometheus
+from .authentication import ClaimsRefreshToken
+from .admission import password_gate
+from .utils import InsufficientLeaveBalance, LeaveBalanceMissing, bulk_expand_leave_days, debit_leave_balance
+from .versions import bump_employees, conditional, employee_scope, month_scope, tagged
+from .employee_import import import_employees, parse_csv, parse_json
+from .rollover import RolloverKeyConflict, run_rollover
+from .attendance_sessions import close_open_attendance
 
 # 🔹 Unified Login (admin + employee)
 class LoginView(APIView):
@@ -28,11 +49,12 @@ class LoginView(APIView):
         username = request.data.get('username')
         password = request.data.get('password')
 
-        user = authenticate(username=username, password=password)
+        # Bounded per worker; raises LoginBusy (429 + Retry-After) during a login storm
+        user = password_gate.authenticate(username=username, password=password)
         if not user:
             return Response({'error': 'Invalid username or password'}, status=401)
 
-        today = date.today()
+        today = timezone.localdate()
         category = None
         role = None
 
@@ -53,25 +75,20 @@ class LoginView(APIView):
             if employee.is_suspended:
                 return Response({'error': 'Your account is suspended'}, status=403)
 
+            state = get_day_state(employee, today)
+
            # ❌ BLOCK if today is inside ANY approved leave (annual / sick / etc)
-            if LeaveRecord.objects.filter(
-                employee=employee,
-                start_date__lte=today,
-                end_date__gte=today
-            ).exists():
+            if state["on_leave"]:
                 return Response(
                     {"error": "You are on approved leave today. Login not allowed."},
                     status=403
                 )
 
             # 🔍 Check attendance (ONLY block AFTER logout)
-            attendance_today = Attendance.objects.filter(
-                employee=employee,
-                login_time__date=today
-            ).last()
+            attendance_today = state["attendance"]
 
             # ❌ Only block if logout_time exists (attendance completed)
-            if attendance_today and attendance_today.logout_time is not None:
+            if attendance_today and attendance_today["logout_time"] is not None:
                 return Response(
                     {"error": "You have already completed attendance today. Login not allowed."},
                     status=400
@@ -84,7 +101,7 @@ class LoginView(APIView):
             return Response({'error': 'Invalid role'}, status=403)
 
         # SUCCESS
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
         current_date = datetime.now().strftime("%A %d %B %Y")
 
         return Response({
@@ -100,59 +117,39 @@ class LoginView(APIView):
 @permission_classes([IsAuthenticated])
 def dashboard_today_stats(request):
     today = timezone.localdate()
+    if wants_summary(request):
+        stats = DailyStats(date=today, **summary_daily_stats(today))
+    else:
+        stats = get_daily_stats(today)
 
-    total_employees = Employee.objects.count()
-    suspended = Employee.objects.filter(is_suspended=True).count()
-    active_employees = total_employees - suspended
-
-    attendance_ids = set(
-        Attendance.objects.filter(
-            login_time__date=today,
-            employee_id__isnull=False
-        ).values_list("employee_id", flat=True)
-    )
-
-    daily_leave_ids = set(
-        Job.objects.filter(
-            status="leave",
-            attendance__login_time__date=today,
-            attendance__employee_id__isnull=False
-        ).values_list("attendance__employee_id", flat=True)
-    )
-
-    annual_leave_ids = set(
-        LeaveRecord.objects.filter(
-            start_date__lte=today,
-            end_date__gte=today,
-            employee_id__isnull=False
-        ).values_list("employee_id", flat=True)
-    )
-
-    attendance_coverage = attendance_ids | daily_leave_ids | annual_leave_ids
-
-    total_work_entries = Job.objects.filter(
-        attendance__login_time__date=today,
-        status="on_duty"
-    ).count()
-
-    total_leave_today = len(daily_leave_ids | annual_leave_ids)
+    active_employees = stats.total_employees - stats.suspended_employees
 
     THRESHOLD_PERCENT = 80
     required_attendance = max(1, round(active_employees * THRESHOLD_PERCENT / 100))
-    alert = len(attendance_coverage) < required_attendance
+    alert = stats.attendance_coverage < required_attendance
 
     return Response({
         "date": str(today),
-        "total_employees": total_employees,
+        "total_employees": stats.total_employees,
         "active_employees": active_employees,
-        "attendance_coverage": len(attendance_coverage),
+        "attendance_coverage": stats.attendance_coverage,
         "required_attendance": required_attendance,
-        "total_work_entries": total_work_entries,
-        "total_leave_today": total_leave_today,
+        "total_work_entries": stats.total_work_entries,
+        "total_leave_today": stats.total_leave_today,
         "alert": alert,
     })
 
 
+# 🔹 Request metrics (Prometheus text format, summed over all workers)
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def request_metrics(request):
+    return HttpResponse(
+        render_prometheus(registry.collect()),
+        content_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 # 🔹 Attendance
 class AttendanceLoginView(APIView):
     permission_classes = [permissions.IsAuthenticated]
@@ -160,44 +157,42 @@ class AttendanceLoginView(APIView):
     def post(self, request):
         employee = request.user.employee
         selected_time = request.data.get('selected_time')
-        today = date.today()
+        today = timezone.localdate()
+        state = get_day_state(employee, today)
 
-        if is_employee_on_leave(employee, today):
+        if state["on_leave"]:
             return Response(
                 {"error": "You are on leave today"},
                 status=400
             )
 
         # 🔒 Check if user already marked leave today
-        if Job.objects.filter(
-            attendance__employee=employee,
-            created_at__date=today,
-            status='leave'
-        ).exists():
+        if state["leave_marked_today"]:
             return Response(
                 {"error": "You have already marked leave for today. Attendance not allowed."},
                 status=400
             )
 
         # 🔍 Check if attendance exists for today
-        existing = Attendance.objects.filter(employee=employee, login_time__date=today).last()
+        existing = state["attendance"]
 
-        if existing and existing.logout_time is None:
+        if existing and existing["logout_time"] is None:
             # ✅ Resume ongoing session
             return Response({
                 "message": "Resuming your existing attendance session.",
-                "attendance_id": existing.id,
-                "selected_time": existing.selected_time
+                "attendance_id": existing["id"],
+                "selected_time": existing["selected_time"]
             })
 
-        if existing and existing.logout_time:
+        if existing and existing["logout_time"]:
             return Response(
                 {"error": "You have already completed attendance today."},
                 status=400
             )
 
         # ✅ Create new attendance
-        attendance = Attendance.objects.create(employee=employee, selected_time=selected_time)
+        with transaction.atomic():
+            attendance = Attendance.objects.create(employee=employee, selected_time=selected_time)
         return Response({
             "message": "Login recorded successfully",
             "attendance_id": attendance.id
@@ -210,22 +205,16 @@ class AttendanceLogoutView(APIView):
     def post(self, request):
         employee = request.user.employee
 
-        attendance = Attendance.objects.filter(
-            employee=employee, 
-            logout_time__isnull=True
-        ).last()
+        # One UPDATE ... RETURNING: finds the open session, sets logout and duration in the database
+        closed = close_open_attendance(employee.id)
 
-        if not attendance:
+        if not closed:
             return Response({"error": "No active session found"}, status=400)
 
-        attendance.logout_time = timezone.now()
-        attendance.save()  # Triggers duration calculation
-        attendance.refresh_from_db()  # ✅ Ensure updated duration is loaded
-
         return Response({
             "message": "Logout recorded successfully",
-            "logout_time": attendance.logout_time,
-            "duration": str(attendance.duration) if attendance.duration else "0:00:00"
+            "logout_time": closed["logout_time"],
+            "duration": str(closed["duration"]) if closed["duration"] else "0:00:00"
         })
 
 
@@ -236,24 +225,14 @@ class AttendanceStatusView(APIView):
         employee = request.user.employee
         today = timezone.localdate()  # ✅ FIXED
 
-        # Debug logs
-        print("Checking attendance for:", employee.id, employee.user.username)
-        print("Today:", today)
-
-        attendance = Attendance.objects.filter(
-            employee=employee,
-            login_time__date=today,
-            logout_time__isnull=True
-        ).last()
-
-        print("Found attendance:", attendance)
+        attendance = get_day_state(employee, today)["open_today"]
 
         if attendance:
             return Response({
                 "active_attendance": True,
-                "attendance_id": attendance.id,
-                "login_time": attendance.login_time,
-                "selected_time": attendance.selected_time,
+                "attendance_id": attendance["id"],
+                "login_time": attendance["login_time"],
+                "selected_time": attendance["selected_time"],
             })
 
         return Response({"active_attendance": False})
@@ -262,6 +241,7 @@ class AttendanceStatusView(APIView):
 class JobListCreateView(generics.ListCreateAPIView):
     serializer_class = JobSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         user = self.request.user
@@ -292,58 +272,55 @@ class JobListCreateView(generics.ListCreateAPIView):
 
         return queryset.order_by("-created_at")
 
+    def list(self, request, *args, **kwargs):
+        # Read-only fast path: same JSON as JobSerializer, built from a .values() projection
+        page = self.paginate_queryset(job_rows(self.get_queryset()))
+        return self.get_paginated_response(serialize_job_rows(page))
+
+    @transaction.atomic
     def perform_create(self, serializer):
         employee = self.request.user.employee
         data = self.request.data
         status_value = data.get("status")
         leave_type = data.get("leave_type")
 
-        if is_employee_on_leave(employee, date.today()):
+        today = timezone.localdate()
+        state = get_day_state(employee, today)
+
+        if state["on_leave"]:
             raise serializers.ValidationError(
                 {"error": "Cannot create job while on leave"}
             )
         # ✅ Find the employee's current attendance
-        attendance = Attendance.objects.filter(employee=employee, logout_time__isnull=True).last()
+        open_attendance = state["open_attendance"]
+        attendance = open_attendance and Attendance.objects.select_related(
+            "employee__user"
+        ).filter(pk=open_attendance["id"]).first()
         if not attendance:
             return Response({"error": "No active login session found."}, status=400)
 
         # ✅ Check if the employee already has on-duty work today
-        today = timezone.now().date()
-        if status_value == 'leave' and Job.objects.filter(
-            attendance__employee=employee,
-            attendance__login_time__date=today,
-            status='on_duty'
-        ).exists():
+        if status_value == 'leave' and state["has_on_duty"]:
             raise serializers.ValidationError(
                 {"error": "You are already marked as On Duty today. Leave not allowed."}
             )
 
         # ✅ Check if the employee already has leave for today
-        if status_value == 'on_duty' and Job.objects.filter(
-            attendance__employee=employee,
-            attendance__login_time__date=today,
-            status='leave'
-        ).exists():
+        if status_value == 'on_duty' and state["has_leave"]:
             raise serializers.ValidationError(
                 {"error": "You have already marked Leave today. On-duty not allowed."}
             )
 
-        # ✅ Deduct leave if type = leave
+        # ✅ Deduct leave if type = leave (one conditional UPDATE, safe under concurrency)
         if status_value == 'leave':
             try:
-                balance = LeaveBalance.objects.get(employee=employee, leave_type=leave_type)
-            except LeaveBalance.DoesNotExist:
+                debit_leave_balance(employee, leave_type, 1)
+            except LeaveBalanceMissing:
                 raise serializers.ValidationError({"error": f"No leave balance found for {leave_type}"})
-
-            if balance.remaining() <= 0:
+            except InsufficientLeaveBalance:
                 raise serializers.ValidationError({"error": f"No {leave_type} leaves remaining!"})
 
-            balance.used += 1
-            balance.save()
-
              # save leave history record
-            today = timezone.localdate()
-
             LeaveRecord.objects.create(
                 employee=employee,
                 leave_type=leave_type,
@@ -357,6 +334,121 @@ class JobListCreateView(generics.ListCreateAPIView):
         serializer.save(attendance=attendance)
 
 
+# 🔹 Bulk Work Entries (a whole day's jobs in one request)
+class JobBulkCreateView(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    max_entries = 50
+
+    @transaction.atomic
+    def post(self, request):
+        entries = request.data.get("jobs") if isinstance(request.data, dict) else request.data
+        if not isinstance(entries, list) or not entries:
+            return Response({"error": "jobs must be a non-empty list"}, status=400)
+        if len(entries) > self.max_entries:
+            return Response({"error": f"At most {self.max_entries} jobs per request"}, status=400)
+
+        employee = request.user.employee
+        today = timezone.localdate()
+        state = get_day_state(employee, today)
+
+        # Session checks run once for the whole batch
+        if state["on_leave"]:
+            return Response({"error": "Cannot create job while on leave"}, status=400)
+        open_attendance = state["open_attendance"]
+        attendance = open_attendance and Attendance.objects.select_related(
+            "employee__user"
+        ).filter(pk=open_attendance["id"]).first()
+        if not attendance:
+            return Response({"error": "No active login session found."}, status=400)
+
+        serializer = JobSerializer(data=entries, many=True, context={"request": request})
+        if not serializer.is_valid():
+            return Response({"errors": serializer.errors}, status=400)
+        items = serializer.validated_data
+        statuses = [item.get("status", "on_duty") for item in items]
+
+        # Same on-duty / leave rules as one entry, counting the rest of the batch too
+        errors = [{} for _ in items]
+        for i, status_value in enumerate(statuses):
+            if status_value == "leave" and state["has_on_duty"]:
+                errors[i]["error"] = "You are already marked as On Duty today. Leave not allowed."
+            elif status_value == "on_duty" and state["has_leave"]:
+                errors[i]["error"] = "You have already marked Leave today. On-duty not allowed."
+            elif len(set(statuses)) > 1:
+                errors[i]["error"] = "Leave and on-duty entries cannot be submitted together."
+
+        if any(errors):
+            return Response({"errors": errors}, status=400)
+
+        # One conditional debit per leave type for the whole batch
+        needed = Counter(item["leave_type"] for item, s in zip(items, statuses) if s == "leave")
+        failed = {}
+        for leave_type, count in needed.items():
+            try:
+                debit_leave_balance(employee, leave_type, count)
+            except LeaveBalanceMissing:
+                failed[leave_type] = f"No leave balance found for {leave_type}"
+            except InsufficientLeaveBalance:
+                failed[leave_type] = f"No {leave_type} leaves remaining!"
+        if failed:
+            transaction.set_rollback(True)
+            return Response({"errors": [
+                {"error": failed[item["leave_type"]]} if s == "leave" and item["leave_type"] in failed else {}
+                for item, s in zip(items, statuses)
+            ]}, status=400)
+
+        jobs = Job.objects.bulk_create(Job(attendance=attendance, **item) for item in items)
+
+        leaves = LeaveRecord.objects.bulk_create(
+            LeaveRecord(
+                employee=employee,
+                leave_type=item["leave_type"],
+                start_date=today,
+                end_date=today,
+                total_days=1,
+                reason=item.get("leave_reason") or "",
+            )
+            for item, status_value in zip(items, statuses) if status_value == "leave"
+        )
+
+        # bulk_create skips the signals that keep leave days, day state and the dashboard current
+        if leaves:
+            bulk_expand_leave_days(LeaveRecord.objects.filter(pk__in=[leave.pk for leave in leaves]))
+        days = {attendance.work_date, today}
+        invalidate_day_state(employee.id, days)
+        invalidate_daywise(days)
+        summaries_changed(employee.id, days)
+        days_changed(days)
+        bump_employees([employee.id])
+        rebuild_tracked_days(days)
+
+        return Response(JobSerializer(jobs, many=True, context={"request": request}).data, status=201)
+
+
+# 🔹 Work Entry Search (ranked)
+class JobSearchView(generics.ListAPIView):
+    serializer_class = JobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    pagination_class = SearchPagination
+
+    def get_queryset(self):
+        term = self.request.query_params.get("q", "")
+        if not term.strip():
+            raise serializers.ValidationError({"error": "q parameter is required"})
+
+        queryset = Job.objects.select_related("attendance__employee__user")
+
+        # ✅ Non-admin users search only their own jobs
+        if not self.request.user.is_superuser:
+            queryset = queryset.filter(attendance__employee__user=self.request.user)
+
+        return search_jobs(queryset, term)
+
+    def list(self, request, *args, **kwargs):
+        page = self.paginate_queryset(job_rows(self.get_queryset()))
+        return self.get_paginated_response(serialize_job_rows(page))
+
+
 # 🔹 Work Entry Detail (update/delete)
 class JobDetailView(generics.RetrieveUpdateDestroyAPIView):
     serializer_class = JobSerializer
@@ -370,7 +462,8 @@ class JobDetailView(generics.RetrieveUpdateDestroyAPIView):
     
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
-        self.perform_destroy(instance)
+        with transaction.atomic():
+            self.perform_destroy(instance)
 
         return Response({"message": "Job entry deleted successfully"}, status=200)
 
@@ -388,9 +481,10 @@ class SuspendEmployeeView(APIView):
 
     def post(self, request, pk):
         try:
-            employee = Employee.objects.get(pk=pk)
-            employee.is_suspended = not employee.is_suspended
-            employee.save()
+            with transaction.atomic():
+                employee = Employee.objects.select_for_update().get(pk=pk)
+                employee.is_suspended = not employee.is_suspended
+                employee.save()
             status_text = "suspended" if employee.is_suspended else "reactivated"
             return Response({"message": f"Employee {status_text} successfully"})
         except Employee.DoesNotExist:
@@ -402,6 +496,7 @@ class AdminLeaveViewSet(viewsets.ModelViewSet):
     queryset = LeaveRecord.objects.select_related('employee__user').all()
     serializer_class = LeaveRecordSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = CreatedAtCursorPagination
 
     def get_queryset(self):
         # Optionally filter by employee in query params: ?employee=<id>
@@ -416,6 +511,7 @@ class AdminLeaveBalanceViewSet(viewsets.ModelViewSet):
     queryset = LeaveBalance.objects.select_related('employee__user').all()
     serializer_class = LeaveBalanceSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = TimesheetCursorPagination
 
     def create(self, request, *args, **kwargs):
         employee_id = request.data.get("employee")
@@ -442,7 +538,58 @@ class AdminLeaveBalanceViewSet(viewsets.ModelViewSet):
 
         serializer = self.get_serializer(balance)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+    # 🔹 Custom route: /api/leavebalances/rollover/ (year-end allocation from category policies)
+    @action(detail=False, methods=["post"])
+    def rollover(self, request):
+        try:
+            year = int(request.data.get("year") or timezone.localdate().year)
+        except (TypeError, ValueError):
+            return Response({"error": "year must be a number"}, status=400)
+        key = str(request.data.get("key") or f"rollover-{year}")
+        if len(key) > LeaveRollover._meta.get_field("key").max_length:
+            return Response({"error": "key must be at most 100 characters"}, status=400)
+        preview = str(request.data.get("preview", "")).lower() in ("1", "true", "yes")
+
+        try:
+            summary = run_rollover(year, key, preview=preview, user=request.user)
+        except RolloverKeyConflict as exc:
+            return Response({"error": str(exc), "year": exc.year}, status=409)
+        created = not (preview or summary.get("already_applied"))
+        return Response(summary, status=201 if created else 200)
     
+# 🔹 Payroll month close
+class MonthCloseViewSet(viewsets.ReadOnlyModelViewSet):
+    queryset = MonthClose.objects.select_related("closed_by")
+    serializer_class = MonthCloseSerializer
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = TimesheetCursorPagination
+
+    def _month(self, request):
+        try:
+            return parse_month(request.data.get("month"))
+        except ValueError:
+            return None
+
+    # 🔹 Custom route: /api/month-closes/close/ {"month": "YYYY-MM"} (closing again refreshes the snapshot)
+    @action(detail=False, methods=["post"])
+    def close(self, request):
+        month = self._month(request)
+        if not month:
+            return Response({"error": "month is required (YYYY-MM)"}, status=400)
+        close = close_month(*month, user=request.user)
+        return Response(MonthCloseSerializer(close).data, status=201)
+
+    # 🔹 Custom route: /api/month-closes/reopen/ {"month": "YYYY-MM"}
+    @action(detail=False, methods=["post"])
+    def reopen(self, request):
+        month = self._month(request)
+        if not month:
+            return Response({"error": "month is required (YYYY-MM)"}, status=400)
+        if not reopen_month(*month):
+            return Response({"error": "Month is not closed"}, status=404)
+        return Response(status=204)
+
 class EmployeeViewSet(AdminManageEmployee):  # reuse admin employee view
     @action(detail=True, methods=["get"], permission_classes=[permissions.IsAdminUser])
     def attendances(self, request, pk=None):
@@ -478,105 +625,117 @@ class EmployeeViewSet(AdminManageEmployee):  # reuse admin employee view
         return Response(serializer.data)
     
 class AdminManageEmployee(viewsets.ModelViewSet):
-    queryset = Employee.objects.all()
+    queryset = Employee.objects.select_related("user").all()
     serializer_class = EmployeeSerializer
     permission_classes = [permissions.IsAdminUser]
+    pagination_class = TimesheetCursorPagination
 
     # 🔹 Custom route: /api/employees/<id>/attendances/
     @action(detail=True, methods=["get"], permission_classes=[permissions.IsAdminUser])
     def attendances(self, request, pk=None):
-        """Fetch all attendance records for a specific employee"""
+        """Fetch a page of attendance records for a specific employee"""
         try:
             employee = self.get_object()
-            attendances = Attendance.objects.filter(employee=employee).order_by("-login_time")
-            serializer = AttendanceSerializer(attendances, many=True)
-            return Response(serializer.data)
+            attendances = Attendance.objects.filter(employee=employee)
+            paginator = LoginTimeCursorPagination()
+            page = paginator.paginate_queryset(attendances, request, view=self)
+            serializer = AttendanceSerializer(page, many=True)
+            return paginator.get_paginated_response(serializer.data)
         except Employee.DoesNotExist:
             return Response({"error": "Employee not found"}, status=404)
 
     # 🔹 Custom route: /api/employees/<id>/jobs/
     @action(detail=True, methods=["get"], permission_classes=[permissions.IsAdminUser])
     def jobs(self, request, pk=None):
-        """Fetch all jobs done by a specific employee"""
+        """Fetch a page of jobs done by a specific employee"""
         try:
             employee = self.get_object()
-            jobs = Job.objects.filter(attendance__employee=employee).select_related("attendance").order_by("-created_at")
-            serializer = JobSerializer(jobs, many=True)
-            return Response(serializer.data)
+            jobs = job_rows(Job.objects.filter(attendance__employee=employee))
+            paginator = CreatedAtCursorPagination()
+            page = paginator.paginate_queryset(jobs, request, view=self)
+            return paginator.get_paginated_response(serialize_job_rows(page))
         except Employee.DoesNotExist:
             return Response({"error": "Employee not found"}, status=404)
 
+    # 🔹 Custom route: /api/employees/import/ (CSV "file" upload or JSON list; ?dry_run=1 only validates)
+    @action(detail=False, methods=["post"], url_path="import", permission_classes=[permissions.IsAdminUser])
+    def bulk_import(self, request):
+        """Create employees, their users and opening leave balances in bulk"""
+        upload = request.FILES.get("file")
+        try:
+            rows = parse_csv(upload.read().decode("utf-8-sig")) if upload else parse_json(request.data)
+        except (UnicodeDecodeError, csv.Error, ValueError) as exc:
+            return Response({"error": f"Could not read import: {exc}"}, status=400)
+
+        dry_run = request.query_params.get("dry_run", "").lower() in ("1", "true", "yes")
+        if not dry_run and len(rows) > settings.EMPLOYEE_IMPORT_API_MAX_ROWS:
+            # Every password is hashed inside this request
+            return Response({"error": (
+                f"At most {settings.EMPLOYEE_IMPORT_API_MAX_ROWS} rows per import here; "
+                f"use the import_employees management command for larger files."
+            )}, status=400)
+        try:
+            report = import_employees(rows, dry_run=dry_run)
+        except IntegrityError:
+            # Another request took a username or emp_no after validation
+            return Response({"error": "Import conflicted with a concurrent change; run it again."}, status=409)
+
+        if report["errors"]:
+            return Response(report, status=400)
+        return Response(report, status=200 if dry_run else 201)
+
 class EmployeeTimeSheetView(APIView):
+    """
+    An employee's timesheet one date window at a time (?start=&end=, default the
+    last TIMESHEET_WINDOW_DAYS days), grouped per work date in the database.
+    "next" pages to older work, "previous" back towards today.
+    """
     permission_classes = [permissions.IsAdminUser]
 
     def get(self, request, employee_id):
-        try:
-            employee = Employee.objects.get(pk=employee_id)
-        except Employee.DoesNotExist:
-            return Response({"error": "Employee not found"}, status=404)
-
-        # Optional filters
-        start_date = request.GET.get("start")
-        end_date = request.GET.get("end")
+        # The default window and the "previous" link move with today
+        etag, not_modified = conditional(request, [employee_scope(employee_id)], timezone.localdate())
+        if not_modified:
+            return not_modified
 
-        attendances = Attendance.objects.filter(employee=employee)
+        if not Employee.objects.filter(pk=employee_id).exists():
+            return Response({"error": "Employee not found"}, status=404)
 
-        # Apply date range if given
-        if start_date and end_date:
-            attendances = attendances.filter(
-                login_time__date__range=[start_date, end_date]
+        try:
+            start = request.GET.get("start") and date.fromisoformat(request.GET["start"])
+            end = request.GET.get("end") and date.fromisoformat(request.GET["end"])
+        except ValueError:
+            return Response({"error": "Invalid date format"}, status=400)
+
+        window = timedelta(days=settings.TIMESHEET_WINDOW_DAYS - 1)
+        if not end:
+            end = start + window if start else timezone.localdate()
+        start = start or end - window
+        if start > end:
+            return Response({"error": "start must not be after end"}, status=400)
+        if (end - start).days >= settings.TIMESHEET_MAX_WINDOW_DAYS:
+            return Response(
+                {"error": f"Date range is limited to {settings.TIMESHEET_MAX_WINDOW_DAYS} days"}, status=400
             )
 
-        attendances = attendances.prefetch_related(
-            Prefetch('jobs', queryset=Job.objects.all())
-        ).order_by('-login_time')
-
-        grouped_data = defaultdict(lambda: {
-            "date": None,
-            "day": None,
-            "job_details": [],
-            "job_no": [],
-            "worked_on": set(),
-            "duration": None
-        })
+        span = end - start
+        url = request.build_absolute_uri()
+        older = previous_work_date(employee_id, start)
+        newer = end < timezone.localdate()
+
+        return tagged(Response({
+            "start": start,
+            "end": end,
+            "next": older and replace_query_param(
+                replace_query_param(url, "start", (older - span).isoformat()), "end", older.isoformat()
+            ),
+            "previous": replace_query_param(
+                replace_query_param(url, "start", (end + timedelta(days=1)).isoformat()),
+                "end", (end + timedelta(days=1) + span).isoformat(),
+            ) if newer else None,
+            "results": (summary_employee_days if wants_summary(request) else employee_days)(employee_id, start, end),
+        }), etag)
 
-        for attendance in attendances:
-            date_str = str(attendance.login_time.date())
-            group = grouped_data[date_str]
-
-            group["date"] = attendance.login_time.date()
-            group["day"] = attendance.login_time.strftime("%A")
-            group["duration"] = str(attendance.duration) if attendance.duration else None
-
-            for job in attendance.jobs.all():
-                if job.description:
-                    group["job_details"].append(job.description)
-                if job.job_no:
-                    group["job_no"].append(job.job_no)
-                if job.holiday_worked:
-                    group["worked_on"].add("Holiday Worked")
-                if job.off_station:
-                    group["worked_on"].add("Off Station")
-                if job.local_site:
-                    group["worked_on"].add("Local Site")
-                if job.driv:
-                    group["worked_on"].add("Driving")
-
-        result = []
-        for date, data in grouped_data.items():
-            result.append({
-                "date": data["date"],
-                "day": data["day"],
-                "job_details": ", ".join(data["job_details"]) or "-",
-                "job_no": ", ".join(data["job_no"]) or "-",
-                "worked_on": ", ".join(sorted(data["worked_on"])) or "-",
-                "duration": data["duration"] or "-"
-            })
-
-        result.sort(key=lambda x: x["date"], reverse=True)
-
-        return Response(result)
-    
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def employee_profile(request):
@@ -586,12 +745,16 @@ def employee_profile(request):
         return Response({"error": "User is not an employee"}, status=400)
 
     emp = user.employee
-    return Response({
+    etag, not_modified = conditional(request, [employee_scope(emp.id)])
+    if not_modified:
+        return not_modified
+
+    return tagged(Response({
         "id": emp.id,
         "username": user.username,
         "category": emp.category,
         "emp_no": emp.emp_no,
-    })
+    }), etag)
 
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
@@ -612,92 +775,19 @@ def daywise_report(request):
     except ValueError:
         return Response({"error": "Invalid date format"}, status=400)
 
-    data = []
-
-    # 🔹 STEP 1: Find annual leaves for this day
-    leave_qs = LeaveRecord.objects.filter(
-        start_date__lte=report_date,
-        end_date__gte=report_date
-    ).select_related("employee__user")
-
-    if employee_id:
-        leave_qs = leave_qs.filter(employee_id=employee_id)
-
-    annual_leave_employees = set()
-
-    for leave in leave_qs:
-        annual_leave_employees.add(leave.employee_id)
-
-        description = "Annual Leave"
-        if leave.reason:
-            description += f" - {leave.reason}"
-
-        data.append({
-            "employee": leave.employee.user.username,
-            "status": "leave",
-            "description": description,
-            "job_no": "-",
-            "ship_name": "-",
-            "location": "-",
-            "worked_on": "-",
-            "start_time": "-",
-            "end_time": "-",
-        })
-
-    # 🔹 STEP 2: Fetch jobs (excluding employees on annual leave)
-    filters = {"attendance__login_time__date": report_date}
-
-    if employee_id:
-        filters["attendance__employee_id"] = employee_id
-
-    if job_no:
-        filters["job_no__icontains"] = job_no
-
-    jobs = Job.objects.filter(**filters).select_related(
-        "attendance__employee__user"
-    )
-
-    for job in jobs:
-        employee = job.attendance.employee
-
-        # ❌ Skip — already covered by annual leave
-        if employee.id in annual_leave_employees:
-            continue
-
-        worked_on_list = []
-        if job.holiday_worked:
-            worked_on_list.append("Holiday Worked")
-        if job.off_station:
-            worked_on_list.append("Off Station")
-        if job.local_site:
-            worked_on_list.append("Local Site")
-        if job.driv:
-            worked_on_list.append("Driving")
-
-        if job.status == "leave":
-            status = "leave"
-            description = f"Leave: {job.leave_type.capitalize()}"
-            if job.leave_reason:
-                description += f" - {job.leave_reason}"
-        else:
-            status = "on_duty"
-            description = job.description or "-"
-
-        data.append({
-            "employee": employee.user.username,
-            "status": status,
-            "description": description,
-            "job_no": job.job_no or "-",
-            "ship_name": job.ship_name or "-",
-            "location": job.location or "-",
-            "worked_on": ", ".join(worked_on_list) or "-",
-            "start_time": job.start_time or "-",
-            "end_time": job.end_time or "-",
-        })
-
-    return Response(data)
+    if wants_summary(request):
+        rows = summary_daywise_rows(report_date, employee_id, job_no)
+        etag = etag_for(rows)
+    else:
+        # Past days come from a frozen snapshot: one cache read, and a 304 when the client's copy is current
+        etag, rows = daywise_snapshot(report_date, employee_id, job_no, lambda: daywise_rows(
+            daywise_leaves(report_date, employee_id), daywise_jobs(report_date, employee_id, job_no),
+        ))
+    response = get_conditional_response(request, etag=etag) or Response(rows)
+    response["ETag"] = etag
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
 
-from datetime import timedelta
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def monthly_timesheet(request):
@@ -705,64 +795,70 @@ def monthly_timesheet(request):
     month_str = request.GET.get("month")
 
     year, month = map(int, month_str.split("-"))
-    days_in_month = calendar.monthrange(year, month)[1]
 
-    employee = Employee.objects.get(id=employee_id)
-
-    data = {
-        d: {
-            "date": d,
-            "day": date(year, month, d).strftime("%A"),
-            "job_details": "-",
-            "job_no": "-",
-            "holiday_worked": False,
-            "off_station": False,
-            "local_site": False,
-            "driv": False,
-        }
-        for d in range(1, days_in_month + 1)
-    }
-
-    # 1️⃣ Fill attendance jobs
-    attendances = Attendance.objects.filter(
-        employee=employee,
-        login_time__year=year,
-        login_time__month=month
-    ).prefetch_related("jobs")
-
-    for att in attendances:
-        day = att.login_time.day
-        for job in att.jobs.all():
-            if job.status == "leave":
-                data[day]["job_details"] = f"Leave: {job.leave_type}"
-            else:
-                data[day]["job_details"] = job.description or "-"
-                data[day]["job_no"] = job.job_no or "-"
+    etag, not_modified = conditional(request, [employee_scope(employee_id), month_scope(year, month)])
+    if not_modified:
+        return not_modified
 
-    # 2️⃣ Inject annual leave
-    leaves = LeaveRecord.objects.filter(
-        employee=employee,
-        leave_type="annual",
-        start_date__year__lte=year,
-        end_date__year__gte=year
-    )
+    employee = Employee.objects.get(id=employee_id)
 
-    for leave in leaves:
-        cur = leave.start_date
-        while cur <= leave.end_date:
-            if cur.month == month:
-                data[cur.day]["job_details"] = "Annual Leave"
-            cur += timedelta(days=1)
+    # A payroll-closed month is served from its snapshot
+    close = get_month_close(year, month)
+    data = month_snapshot(close, employee.id) if close else None
+    if data is None and wants_summary(request):
+        data = summary_month(employee.id, year, month)
+    elif data is None:
+        # 1️⃣ Fill attendance jobs, 2️⃣ inject annual leave
+        data = fill_month(
+            year, month,
+            month_jobs(year, month).filter(attendance__employee=employee),
+            month_annual_leaves(year, month).filter(employee=employee),
+        )
 
-    return Response({
+    return tagged(Response({
         "employee": employee.user.username,
         "emp_no": employee.emp_no,
         "month": month_str,
+        "closed": bool(close),
         "data": list(data.values())
-    })
+    }), etag)
 
 
 
+@api_view(["GET"])
+@permission_classes([permissions.IsAdminUser])
+def monthly_timesheet_export(request):
+    """
+    Stream every employee's monthly timesheet for payroll.
+    Example: /api/timesheet/monthly/export/?month=2025-11&output=ndjson
+    """
+    month_str = request.GET.get("month")
+    output = request.GET.get("output", "csv")
+
+    try:
+        year, month = map(int, month_str.split("-"))
+        date(year, month, 1)
+    except (AttributeError, ValueError):
+        return Response({"error": "month parameter is required (YYYY-MM)"}, status=400)
+
+    if output not in ("csv", "ndjson"):
+        return Response({"error": "output must be csv or ndjson"}, status=400)
+
+    # Closed months stream their snapshots
+    close = get_month_close(year, month)
+    timesheets = iter_closed_month(close) if close else None
+
+    if output == "ndjson":
+        return StreamingHttpResponse(
+            stream_monthly_ndjson(year, month, timesheets),
+            content_type="application/x-ndjson",
+        )
+
+    response = StreamingHttpResponse(stream_monthly_csv(year, month, timesheets), content_type="text/csv")
+    response["Content-Disposition"] = f'attachment; filename="timesheet-{month_str}.csv"'
+    return response
+
+
 @api_view(["GET"])
 @permission_classes([IsAuthenticated])
 def monthly_leave_report_employee(request):
@@ -817,9 +913,13 @@ def my_leave_balances(request):
     if not hasattr(user, "employee"):
         return Response({"error": "User is not an employee"}, status=400)
 
+    etag, not_modified = conditional(request, [employee_scope(user.employee.id)])
+    if not_modified:
+        return not_modified
+
     balances = LeaveBalance.objects.filter(employee=user.employee)
     serializer = LeaveBalanceSerializer(balances, many=True)
-    return Response(serializer.data)
+    return tagged(Response(serializer.data), etag)
 
 
 class ProfileView(APIView):
@@ -838,21 +938,21 @@ class ProfileView(APIView):
         # If employee exists
         if hasattr(user, "employee"):
             employee = user.employee
+            # Today's open session is part of the profile
+            etag, not_modified = conditional(request, [employee_scope(employee.id)], today)
+            if not_modified:
+                return not_modified
             employee_no = employee.emp_no
             category_code = employee.category
             category_label = employee.get_category_display() 
         
-        attendance = Attendance.objects.filter(
-            employee=employee,
-            login_time__date=today,
-            logout_time__isnull=True
-        ).last()
+        attendance = get_day_state(employee, today)["open_today"] if employee else None
 
         if attendance:
-            login_time = attendance.login_time
-            selected_time = attendance.selected_time            
+            login_time = attendance["login_time"]
+            selected_time = attendance["selected_time"]
 
-        return Response({
+        response = Response({
             "username": user.username,
             "employee_no": employee_no,
             "category": category_code,
@@ -860,6 +960,7 @@ class ProfileView(APIView):
             "login_time": login_time,
             "selected_time": selected_time
         })
+        return tagged(response, etag) if employee else response
     
 class ApplyLeaveAPIView(APIView):
     permission_classes = [IsAuthenticated]
@@ -875,6 +976,14 @@ class ApplyLeaveAPIView(APIView):
         data = serializer.validated_data
 
         with transaction.atomic():
+            # One conditional UPDATE: no separate read, and concurrent applications can't overdraw
+            try:
+                debit_leave_balance(employee, data['leave_type'], data['total_days'])
+            except LeaveBalanceMissing:
+                raise serializers.ValidationError({"non_field_errors": ["Leave balance not found"]})
+            except InsufficientLeaveBalance:
+                raise serializers.ValidationError({"non_field_errors": ["Insufficient leave balance"]})
+
             leave = LeaveRecord.objects.create(
                 employee=employee,
                 leave_type=data['leave_type'],
@@ -884,13 +993,6 @@ class ApplyLeaveAPIView(APIView):
                 reason=data.get('reason')
             )
 
-            balance = LeaveBalance.objects.get(
-                employee=employee,
-                leave_type=data['leave_type']
-            )
-            balance.used += data['total_days']
-            balance.save()
-
         return Response({
             "message": "Leave applied successfully",
             "days": data['total_days']